@@ -0,0 +1,160 @@
+"""Load tests the notifications list, the sync (DRF) endpoint and its async variant, served by
+gunicorn (WSGI) and by uvicorn (ASGI), with many clients polling at once like the apps do.
+
+The servers run against the database of the current settings, where a benchmark user with
+`--notifications` notifications is created. Install the ASGI server with `pip install .[asgi]`.
+
+Usage: python benchmarks/api_load_test.py [--clients 50] [--duration 10] [--workers 2] [--migrate]
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from bootstrap import ROOT_DIR, setup_django
+
+SERVERS = {"wsgi": "gunicorn", "asgi": "uvicorn"}
+ENDPOINTS = {
+    "sync": "/api/v1/notifications/?limit=20",
+    "async": "/api/v1/async/notifications/?limit=20",
+}
+
+
+def create_benchmark_user(notifications: int) -> str:
+    """Returns the API token of the benchmark user, creating it and its notifications"""
+    from rest_framework.authtoken.models import Token
+
+    from push_notifications import models, services
+    from users.models import User
+
+    user, _created = User.objects.get_or_create(
+        email="load-test@example.com", defaults={"full_name": "Load Test"}
+    )
+    missing = notifications - models.PushNotification.objects.filter(user=user).count()
+    if missing > 0:
+        services.push_notification_bulk_create(
+            users=[user] * missing,
+            kind="int_comm",
+            title="Hey you, yes you!",
+            description="We have a new vaccine available",
+        )
+    token, _created = Token.objects.get_or_create(user=user)
+    return token.key
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind: str, port: int, workers: int) -> subprocess.Popen:
+    bind = f"127.0.0.1:{port}"
+    if kind == "wsgi":
+        command = [sys.executable, "-m", "gunicorn", "app.wsgi:application", "--bind", bind]
+        command += ["--workers", str(workers), "--threads", "4"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.asgi:application", "--port", str(port)]
+        command += ["--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    server = subprocess.Popen(command, cwd=ROOT_DIR / "src", env=os.environ.copy())
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://{bind}/health-check", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"The {kind} server didn't start")
+
+
+async def poll(port: int, path: str, token: str, until: float, latencies: list[float]) -> int:
+    """Sends requests over a single keep-alive connection until `until`. Returns the errors"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Token {token}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode()
+    errors = 0
+    try:
+        while time.monotonic() < until:
+            start = time.perf_counter()
+            writer.write(request)
+            status_line = await reader.readline()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _sep, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            await reader.readexactly(int(headers.get("content-length", 0)))
+            latencies.append(time.perf_counter() - start)
+            if b" 200 " not in status_line:
+                errors += 1
+            if headers.get("connection") == "close":
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    finally:
+        writer.close()
+    return errors
+
+
+async def load(port: int, path: str, token: str, clients: int, duration: float):
+    latencies: list[float] = []
+    until = time.monotonic() + duration
+    errors = await asyncio.gather(
+        *(poll(port, path, token, until, latencies) for _client in range(clients))
+    )
+    return latencies, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per run")
+    parser.add_argument("--workers", type=int, default=2, help="Processes per server")
+    parser.add_argument("--notifications", type=int, default=200)
+    parser.add_argument("--migrate", action="store_true", help="Migrate the database first")
+    args = parser.parse_args()
+
+    setup_django()
+    if args.migrate:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+    token = create_benchmark_user(args.notifications)
+
+    servers = []
+    for kind, module in SERVERS.items():
+        if importlib.util.find_spec(module) is None:
+            print(f"{module} is not installed, skipping {kind}")
+        else:
+            servers.append(kind)
+
+    print(f"{args.workers} workers per server, {args.duration:.0f}s per run")
+    for kind in servers:
+        port = free_port()
+        server = start_server(kind, port, args.workers)
+        try:
+            for endpoint, path in ENDPOINTS.items():
+                for clients in args.clients:
+                    latencies, errors = asyncio.run(load(port, path, token, clients, args.duration))
+                    latencies.sort()
+                    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+                    print(
+                        f"{kind:<5} {endpoint:<6} clients={clients:<5}"
+                        f"{len(latencies) / args.duration:10.0f} req/s"
+                        f"  p50={statistics.median(latencies or [0]) * 1000:7.1f}ms"
+                        f"  p99={p99 * 1000:7.1f}ms  errors={errors}"
+                    )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
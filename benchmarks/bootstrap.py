@@ -0,0 +1,27 @@
+"""Helpers shared by the benchmark scripts, they run against the test settings.
+Run any benchmark from the project root, e.g: `python benchmarks/expo_bulk_send.py`"""
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django() -> None:
+    sys.path.insert(0, str(ROOT_DIR / "src"))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings.conf")
+    os.environ.setdefault("IS_TESTING", "1")
+    os.environ.setdefault("DJANGO_LOGGING_LEVEL", "WARNING")
+
+    import django
+
+    django.setup()
+
+
+def setup_test_database() -> None:
+    """Creates a throw-away database, just like the test runner does"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
@@ -0,0 +1,94 @@
+"""Measures how many pushes per second `ExpoPushNotificationExternalService.bulk_send` delivers
+to a local fake Expo server at different concurrency levels.
+
+Usage: python benchmarks/expo_bulk_send.py [--pushes 5000] [--latency 0.05] [--concurrency 1 4 8]
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bootstrap import setup_django
+
+
+class FakeExpoHandler(BaseHTTPRequestHandler):
+    latency: float = 0.0
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        messages = json.loads(self.rfile.read(length))
+        time.sleep(self.latency)
+        body = json.dumps(
+            {"data": [{"status": "ok", "id": str(uuid.uuid4())} for _ in messages]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pushes", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.utils import timezone
+    from requests.adapters import HTTPAdapter
+
+    from app.ext.push_notifications.backends.expo import (
+        ExpoPushNotificationExternalService,
+    )
+    from push_notifications.models import Device, PushNotification
+    from users.models import User
+
+    FakeExpoHandler.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeExpoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    send_url = f"http://127.0.0.1:{server.server_port}/--/api/v2/push/send"
+
+    def user(i: int) -> User:
+        user = User(id=i)
+        # As if the devices were prefetched, like the sendable notifications are
+        user._prefetched_objects_cache = {"devices": [Device(token=f"ExponentPushToken[{i}]")]}
+        return user
+
+    now = timezone.now()
+    pushes = [
+        PushNotification(
+            id=i,
+            user=user(i),
+            kind="int_comm",
+            title="Hey you, yes you!",
+            description="We have a new vaccine available",
+            data={"foo": "bar"},
+            created_at=now,
+        )
+        for i in range(1, args.pushes + 1)
+    ]
+
+    print(f"{args.pushes} pushes, {args.latency * 1000:.0f}ms per request")
+    for concurrency in args.concurrency:
+        service = ExpoPushNotificationExternalService(max_concurrent_requests=concurrency)
+        service._SEND_URL = send_url
+        service.s.mount("http://", HTTPAdapter(pool_maxsize=concurrency))
+
+        start = time.perf_counter()
+        tickets = service.bulk_send(pushes)
+        elapsed = time.perf_counter() - start
+
+        assert list(tickets) == [str(push.id) for push in pushes], "Tickets out of order"
+        print(f"concurrency={concurrency:<3} {len(pushes) / elapsed:>10.0f} pushes/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
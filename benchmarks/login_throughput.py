@@ -0,0 +1,83 @@
+"""Measures the logins per second of a web worker while many threads log in at once, hashing
+the passwords on the request threads (0 workers) and on pools of processes, together with the
+latency of a cheap request served by the same worker meanwhile.
+The logins that wait for longer than `PASSWORD_HASHING_TIMEOUT_SECONDS` are counted as
+rejected, they're 503s.
+
+Usage: python benchmarks/login_throughput.py [--threads 16] [--duration 5] [--workers 0 1 2 4]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from bootstrap import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent logins")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import hashers
+    from django.test import override_settings
+
+    from app.security import password_hashing
+
+    encoded = hashers.make_password("password")
+    payload = [{"id": i, "title": "Hey you, yes you!", "data": {"i": i}} for i in range(50)]
+
+    def run(workers: int):
+        logins, rejected, latencies = [0], [0], []
+        until = time.monotonic() + args.duration
+
+        def login():
+            while time.monotonic() < until:
+                try:
+                    password_hashing.check_password(password="password", encoded=encoded)
+                    logins[0] += 1
+                except password_hashing.PasswordHashingUnavailable:
+                    rejected[0] += 1
+
+        def cheap_request():
+            while time.monotonic() < until:
+                start = time.perf_counter()
+                json.dumps(payload)
+                latencies.append(time.perf_counter() - start)
+                time.sleep(0.005)
+
+        threads = [threading.Thread(target=login) for _i in range(args.threads)]
+        threads.append(threading.Thread(target=cheap_request))
+        with override_settings(
+            PASSWORD_HASHING_WORKERS=workers,
+            PASSWORD_HASHING_MAX_CONCURRENCY=args.max_concurrency,
+        ):
+            password_hashing.shutdown()
+            # Starts the pool before measuring
+            password_hashing.check_password(password="password", encoded=encoded)
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            password_hashing.shutdown()
+
+        latencies.sort()
+        print(
+            f"workers={workers:<3}{logins[0] / args.duration:10.1f} logins/s"
+            f"  rejected={rejected[0]:<6}"
+            f"  cheap p50={statistics.median(latencies) * 1000:6.2f}ms"
+            f"  p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:6.2f}ms"
+        )
+
+    print(f"{args.threads} threads logging in, at most {args.max_concurrency} hashing at once")
+    for workers in args.workers:
+        run(workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compares the ways of encoding the body of an Expo send request: handing the whole list to
+`requests` (`json=`), and encoding each payload up front then joining them, with the stdlib
+encoder and with orjson.
+
+Usage: python benchmarks/payload_encoders.py [--pushes 100] [--repeat 200]
+"""
+import argparse
+import json
+import time
+
+from bootstrap import setup_django
+
+
+def measure(label: str, fn, repeat: int, pushes: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<24} {elapsed / repeat * 1000:>8.3f}ms/request {pushes * repeat / elapsed:>12.0f} pushes/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pushes", type=int, default=100, help="Pushes per request")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.utils import timezone
+
+    from app.ext import encoders
+    from app.ext.push_notifications.backends.expo import (
+        ExpoPushNotificationExternalService,
+    )
+    from push_notifications.models import PushNotification
+    from users.models import User
+
+    now = timezone.now()
+    pushes = [
+        PushNotification(
+            id=i,
+            user=User(id=i),
+            kind="int_comm",
+            title="Olá, temos novidades!",
+            description="We have a new vaccine available at the clinic next to you",
+            data={"foo": "bar", "clinic_id": i, "tags": ["vaccine", "news"]},
+            created_at=now,
+        )
+        for i in range(1, args.pushes + 1)
+    ]
+    service = ExpoPushNotificationExternalService()
+    payloads = [
+        {"to": f"ExponentPushToken[{push.id}]", **service._push_json_data(push)} for push in pushes
+    ]
+
+    stdlib = encoders.StdlibJSONEncoder()
+    print(f"{args.pushes} pushes per request, {args.repeat} requests")
+    # What requests does with `json=`
+    measure("requests json=", lambda: json.dumps(payloads).encode(), args.repeat, args.pushes)
+    measure(
+        "stdlib per item",
+        lambda: encoders.encode_json_array(stdlib.encode(p) for p in payloads),
+        args.repeat,
+        args.pushes,
+    )
+    if encoders.orjson is None:
+        print("orjson is not installed, install it with `pip install .[speedups]`")
+        return
+    fast = encoders.OrjsonJSONEncoder()
+    measure(
+        "orjson per item",
+        lambda: encoders.encode_json_array(fast.encode(p) for p in payloads),
+        args.repeat,
+        args.pushes,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measures how long an user with many unread notifications takes to read all of them,
+through the notifications list queryset with a single UPDATE (as it used to) and through
+`push_notification_read_many`, that updates them in batches.
+
+Usage: python benchmarks/push_notification_read_many.py [--rows 100000] [--batch-size 1000]
+"""
+import argparse
+import time
+
+from bootstrap import setup_django, setup_test_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000, help="Unread notifications")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+
+    setup_django()
+    setup_test_database()
+    from django.conf import settings
+    from django.utils import timezone
+
+    from app import consts
+    from push_notifications import models, selectors, services
+    from users.models import User
+
+    user = User.objects.create(email="john@doe.com", full_name="John Doe")
+    now = timezone.now()
+    models.PushNotification.objects.bulk_create(
+        (
+            models.PushNotification(
+                user=user,
+                kind="int_comm",
+                title="Hey you, yes you!",
+                description="We have a new vaccine available",
+                data={},
+                status=consts.push_notification.Status.SENT,
+                created_at=now,
+            )
+            for _i in range(args.rows)
+        ),
+        batch_size=5000,
+    )
+    all_qs = models.PushNotification.objects.filter(user=user)
+
+    def read_through_the_list_qs():
+        qs = selectors.push_notification_get_viewable_qs(user=user).filter(read_at__isnull=True)
+        return qs.update(read_at=timezone.now(), status=consts.push_notification.Status.READ)
+
+    def measure(label, read):
+        all_qs.update(read_at=None, status=consts.push_notification.Status.SENT)
+        services.push_notification_get_unread_count(user=user)
+        start = time.perf_counter()
+        read_count = read()
+        elapsed = time.perf_counter() - start
+        assert read_count == args.rows, read_count
+        print(f"{label:<28}{elapsed * 1000:10.0f}ms {args.rows / elapsed:12.0f} rows/s")
+
+    print(f"{args.rows} unread notifications, on {settings.DATABASES['default']['ENGINE']}")
+    measure("list queryset", read_through_the_list_qs)
+    for batch_size in args.batch_size:
+        settings.PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE = batch_size
+        measure(
+            f"read_many batch={batch_size}",
+            lambda: services.push_notification_read_many(reader=user, ids=[]),
+        )
+
+
+if __name__ == "__main__":
+    main()
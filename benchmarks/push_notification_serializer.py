@@ -0,0 +1,52 @@
+"""Measures how many rows per second `PushNotificationOutputSchema` serializes, as on a
+page of the notifications list.
+
+Usage: python benchmarks/push_notification_serializer.py [--rows 100] [--repeat 200]
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from bootstrap import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=200, help="How many pages to serialize")
+    parser.add_argument("--days", type=int, default=14, help="How old the notifications are")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.utils import timezone
+
+    from api.v1.push_notifications.schemas import PushNotificationOutputSchema
+    from push_notifications.models import PushNotification
+
+    random.seed(0)
+    now = timezone.now()
+    page = [
+        PushNotification(
+            id=i,
+            user_id=1,
+            kind="int_comm",
+            title="Hey you, yes you!",
+            description="We have a new vaccine available",
+            data={"foo": "bar"},
+            status="s",
+            created_at=now - timedelta(seconds=random.randint(0, args.days * 24 * 60 * 60)),
+        )
+        for i in range(1, args.rows + 1)
+    ]
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        PushNotificationOutputSchema(page, many=True).data
+    elapsed = time.perf_counter() - start
+    print(f"{args.rows} rows per page, {args.repeat} pages, up to {args.days} days old")
+    print(f"{args.rows * args.repeat / elapsed:>10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
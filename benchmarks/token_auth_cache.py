@@ -0,0 +1,59 @@
+"""Measures the queries and the time per request of an endpoint authenticated with a `Token`,
+with the token cache disabled, cold (only the shared cache) and warm (the per-process LRU).
+
+Usage: python benchmarks/token_auth_cache.py [--requests 2000]
+"""
+import argparse
+import time
+
+from bootstrap import setup_django, setup_test_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    setup_test_database()
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework.authtoken.models import Token
+
+    from users import token_cache
+    from users.models import User
+
+    user = User.objects.create(
+        email="john@doe.com", full_name="John Doe", last_login=timezone.now()
+    )
+    token = Token.objects.create(user=user)
+    client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+    url = reverse("api:v1:users:me-list")
+
+    def measure(label, before_each_request=lambda: None):
+        client.get(url)
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as queries:
+            for _i in range(args.requests):
+                before_each_request()
+                start = time.perf_counter()
+                response = client.get(url)
+                elapsed += time.perf_counter() - start
+                assert response.status_code == 200, response.content
+        print(
+            f"{label:<12}{len(queries) / args.requests:6.2f} queries/req"
+            f"{elapsed / args.requests * 1_000_000:10.0f}us/req"
+        )
+
+    print(f"{args.requests} requests to {url}")
+    with override_settings(AUTH_TOKEN_CACHE_TIMEOUT=0):
+        measure("disabled")
+    measure("cold", before_each_request=token_cache.local_cache.clear)
+    measure("warm")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from api.v1.push_notifications import consumers
+
+websocket_urlpatterns = [
+    path("ws/v1/notifications", consumers.PushNotificationConsumer.as_asgi()),
+]
@@ -1,7 +1,10 @@
+from drf_spectacular.utils import extend_schema_serializer
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_schemas
 
 from app.consts.i18n import Language, TimeZoneName
 from app.drf.fields import create_choice_human_field
+from users import tokens
 from users.models import User
 
 
@@ -10,6 +13,11 @@ class AuthenticationInputSchema(serializers.Serializer):
     password = serializers.CharField()
 
 
+@extend_schema_serializer(component_name="TokenRefresh")
+class JwtRefreshSchema(jwt_schemas.TokenRefreshSerializer):
+    token_class = tokens.RefreshToken
+
+
 class StaticTokenSchema(serializers.Serializer):
     type = serializers.CharField(default="Token")
     access = serializers.CharField()
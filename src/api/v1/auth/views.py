@@ -5,11 +5,12 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework_simplejwt import serializers as jwt_schemas
 
 from app.consts.http import HttpStatusCode
 from app.drf.openapi import openapi_schema
 from app.drf.viewsets import AppViewSet
+from app.security.password_hashing import PasswordHashingUnavailable
+from users import tokens
 from users.services import auth
 
 from . import schemas
@@ -35,7 +36,12 @@ class AuthenticationViewSet(AppViewSet):
         operation_id="authentication:token",
         add_bad_request_response=True,
         add_unauthorized_response=True,
-        raises=[auth.InactiveOrInexistentAccount, auth.InvalidCredentials],
+        add_service_unavailable_response=True,
+        raises=[
+            auth.InactiveOrInexistentAccount,
+            auth.InvalidCredentials,
+            PasswordHashingUnavailable,
+        ],
     )
     @action(methods=["POST"], detail=False, url_path="token")
     def token(self, request: Request):
@@ -55,14 +61,19 @@ class AuthenticationViewSet(AppViewSet):
         operation_id="authentication:jwt-token",
         add_bad_request_response=True,
         add_unauthorized_response=True,
-        raises=[auth.InactiveOrInexistentAccount, auth.InvalidCredentials],
+        add_service_unavailable_response=True,
+        raises=[
+            auth.InactiveOrInexistentAccount,
+            auth.InvalidCredentials,
+            PasswordHashingUnavailable,
+        ],
     )
     @action(methods=["POST"], detail=False, url_path="jwt")
     def jwt_token(self, request: Request):
         data = self.get_valid_data(srlzr_class=schemas.AuthenticationInputSchema)
         user = auth.authenticate(**data)
 
-        refresh = jwt_schemas.TokenObtainPairSerializer().get_token(user)
+        refresh = tokens.RefreshToken.for_user(user)
         token = TokenDTO(
             type="Bearer",
             access=str(refresh.access_token),  # type: ignore
@@ -75,8 +86,8 @@ class AuthenticationViewSet(AppViewSet):
     @openapi_schema(
         summary="JWT Refresh",
         description="Refreshes the given access token",
-        request=jwt_schemas.TokenRefreshSerializer,
-        responses={HttpStatusCode.HTTP_200_OK: jwt_schemas.TokenRefreshSerializer},
+        request=schemas.JwtRefreshSchema,
+        responses={HttpStatusCode.HTTP_200_OK: schemas.JwtRefreshSchema},
         tags=["auth"],
         operation_id="authentication:jwt-refresh",
         add_bad_request_response=True,
@@ -84,6 +95,6 @@ class AuthenticationViewSet(AppViewSet):
     @action(methods=["POST"], detail=False, url_path="jwt/refresh")
     def jwt_refresh(self, request: Request):
         return Response(
-            data=self.get_valid_data(srlzr_class=jwt_schemas.TokenRefreshSerializer),
+            data=self.get_valid_data(srlzr_class=schemas.JwtRefreshSchema),
             status=200,
         )
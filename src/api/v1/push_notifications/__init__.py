@@ -1 +1 @@
-from . import urls
+from . import async_urls, urls
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import async_views
+
+urlpatterns = [
+    path("", async_views.PushNotificationAsyncListView.as_view(), name="list"),
+    path(
+        "unread-count",
+        async_views.PushNotificationAsyncUnreadCountView.as_view(),
+        name="unread-count",
+    ),
+    path("read", async_views.PushNotificationAsyncReadManyView.as_view(), name="read-many"),
+    path("<int:pk>/read", async_views.PushNotificationAsyncReadView.as_view(), name="read"),
+    path("token", async_views.PushNotificationAsyncTokenView.as_view(), name="token"),
+]
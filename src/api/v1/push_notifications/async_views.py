@@ -0,0 +1,136 @@
+from django.http import Http404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from app.consts.http import HttpStatusCode
+from app.drf.async_views import AsyncAPIView
+from app.drf.openapi import cursor_openapi_schema, openapi_schema
+from app.drf.pagination import CursorPagination
+from push_notifications import exc, models, selectors, services
+
+from . import schemas
+
+# The same endpoints of `views.PushNotificationViewSet` that the apps poll the most, served
+# with the async ORM. Under ASGI they don't take a thread per request while waiting for the
+# database, under WSGI they work as well, each request running its own event loop
+
+
+class PushNotificationAsyncListView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @cursor_openapi_schema(
+        wrapped_schema=schemas.PushNotificationOutputSchema,
+        operation_id="push-notification-list-async",
+        summary="Notifications list (async)",
+        description="Returns a list of notifications",
+        request=None,
+        tags=["push notifications"],
+        add_unauthorized_response=True,
+        parameter_serializer=schemas.PushNotificationInputSchema,
+    )
+    async def get(self, request: Request) -> Response:
+        params = self.get_valid_query_params(srlzr_class=schemas.PushNotificationInputSchema)
+        qs = selectors.push_notification_get_viewable_qs(user=request.user, filters=params)
+        return await self.aget_paginated_response(
+            queryset=qs,
+            srlzr_class=schemas.PushNotificationOutputSchema,
+            pagination_class=CursorPagination,
+        )
+
+
+class PushNotificationAsyncUnreadCountView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @openapi_schema(
+        summary="Unread notifications count (async)",
+        description="Returns how many notifications the current user hasn't read yet",
+        request=None,
+        responses={HttpStatusCode.HTTP_200_OK: schemas.PushNotificationUnreadCountOutputSchema},
+        tags=["push notifications"],
+        operation_id="push-notification-unread-count-async",
+        add_unauthorized_response=True,
+    )
+    async def get(self, request: Request) -> Response:
+        count = await services.push_notification_aget_unread_count(user=request.user)
+        return Response(data={"count": count})
+
+
+class PushNotificationAsyncReadManyView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @openapi_schema(
+        summary="Read many notifications (async)",
+        description="Reads a list of notifications",
+        request=schemas.PushNotificationReadManyInputSchema,
+        responses={HttpStatusCode.HTTP_200_OK: schemas.PushNotificationReadManyOutputSchema},
+        tags=["push notifications"],
+        operation_id="push-notifications-read-async",
+        add_bad_request_response=True,
+        add_unauthorized_response=True,
+    )
+    async def patch(self, request: Request) -> Response:
+        data = self.get_valid_data(srlzr_class=schemas.PushNotificationReadManyInputSchema)
+        updated = await services.push_notification_aread_many(
+            reader=request.user, ids=data.get("ids")
+        )
+        return Response(data={"read": updated})
+
+
+class PushNotificationAsyncReadView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @openapi_schema(
+        summary="Read notification (async)",
+        description="Reads a single notification",
+        request=None,
+        responses={HttpStatusCode.HTTP_200_OK: schemas.PushNotificationOutputSchema},
+        tags=["push notifications"],
+        operation_id="push-notification-read-async",
+        add_not_found_response=True,
+        add_bad_request_response=True,
+        add_unauthorized_response=True,
+    )
+    async def patch(self, request: Request, pk: int) -> Response:
+        try:
+            notification = await selectors.push_notification_get_viewable_qs(
+                user=request.user
+            ).aget(pk=pk)
+        except models.PushNotification.DoesNotExist:
+            raise Http404()
+        notification = await services.push_notification_aread(push_notification=notification)
+        out_srlzr = schemas.PushNotificationOutputSchema(instance=notification)
+        return Response(data=out_srlzr.data)
+
+
+class PushNotificationAsyncTokenView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @openapi_schema(
+        summary="Set Notification token (async)",
+        description="Defines the notification for the current user",
+        request=schemas.PushNotificationSetTokenInputSchema,
+        responses={HttpStatusCode.HTTP_200_OK: None},
+        tags=["push notifications"],
+        operation_id="push-notification-set-token-async",
+        add_unauthorized_response=True,
+        add_bad_request_response=True,
+        raises=[exc.InvalidNotificationToken],
+    )
+    async def put(self, request: Request) -> Response:
+        data = self.get_valid_data(schemas.PushNotificationSetTokenInputSchema)
+        await services.push_notification_aset_token(user=request.user, **data)
+        return Response(status=HttpStatusCode.HTTP_200_OK)
+
+    @openapi_schema(
+        summary="Delete Notification token (async)",
+        description="Removes the notification token from the current user (Opt-out)",
+        request=None,
+        responses={HttpStatusCode.HTTP_200_OK: None},
+        tags=["push notifications"],
+        operation_id="push-notification-delete-token-async",
+        add_unauthorized_response=True,
+    )
+    async def delete(self, request: Request) -> Response:
+        await services.push_notification_aset_token(user=request.user, notification_token=None)
+        return Response(status=HttpStatusCode.HTTP_200_OK)
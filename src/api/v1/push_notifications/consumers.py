@@ -0,0 +1,92 @@
+import json
+from types import SimpleNamespace
+from typing import Any
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import translation
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions
+
+from app.drf.authentication import AsyncJwtAuthentication, AsyncTokenAuthentication
+from push_notifications import models, realtime, services
+from users.models import User
+
+from . import schemas
+
+# Closed with this code when the credentials are missing or invalid, the apps shouldn't
+# reconnect before authenticating again
+UNAUTHORIZED_CLOSE_CODE = 4401
+
+
+class PushNotificationConsumer(AsyncJsonWebsocketConsumer):
+    """Sends the new notifications of the user, rendered just like on the notifications list,
+    and the unread count whenever it changes, starting with the current one:
+    `{"type": "notification", "notification": {...}}` and `{"type": "unread_count", "count": 1}`
+
+    Authenticates with the same credentials of the API, given on the `Authorization` header,
+    or on the `authorization` query param for clients that can't set headers, e.g:
+    `ws/v1/notifications?authorization=Bearer <access token>`"""
+
+    authentication_classes = [AsyncJwtAuthentication, AsyncTokenAuthentication]
+
+    user: User | None = None
+
+    async def connect(self):
+        self.user = await self.authenticate()
+        if self.user is None:
+            # Accepted first, otherwise the clients can't tell why they were closed
+            await self.accept()
+            await self.close(code=UNAUTHORIZED_CLOSE_CODE)
+            return
+        self.group_name = realtime.group_name(self.user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        count = await services.push_notification_aget_unread_count(user=self.user)
+        await self.send_json({"type": "unread_count", "count": count})
+
+    async def disconnect(self, code):
+        if self.user is not None:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def authenticate(self) -> User | None:
+        headers = dict(self.scope["headers"])
+        authorization = headers.get(b"authorization")
+        if authorization is None:
+            query = parse_qs(self.scope["query_string"].decode())
+            authorization = query.get("authorization", [""])[0].encode()
+        # The authenticators only look at the `Authorization` header of the request
+        request = SimpleNamespace(META={"HTTP_AUTHORIZATION": authorization})
+        for authentication_class in self.authentication_classes:
+            try:
+                auth_result = await authentication_class().aauthenticate(request)  # type: ignore
+            except exceptions.APIException:
+                return None
+            if auth_result is not None:
+                return auth_result[0]
+        return None
+
+    async def push_notification_created(self, event: dict[str, Any]):
+        fields = {
+            **event["notification"],
+            "created_at": parse_datetime(event["notification"]["created_at"]),
+            "read_at": event["notification"]["read_at"]
+            and parse_datetime(event["notification"]["read_at"]),
+        }
+        notification = models.PushNotification(user_id=self.user.pk, **fields)
+        with translation.override(self.user.language_code):
+            data = schemas.PushNotificationOutputSchema(instance=notification).data
+            await self.send_json({"type": "notification", "notification": data})
+
+    async def push_notification_unread_count(self, event: dict[str, Any]):
+        await self.send_json({"type": "unread_count", "count": event["count"]})
+
+    async def receive_json(self, content, **kwargs):
+        # Nothing is expected from the clients
+        pass
+
+    @classmethod
+    async def encode_json(cls, content) -> str:
+        # The rendered notifications have lazy translations
+        return json.dumps(content, cls=DjangoJSONEncoder)
@@ -1,3 +1,5 @@
+from django.utils.timesince import timesince
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from app.consts import push_notification as push_notification_consts
@@ -16,10 +18,8 @@ PushNotificationStatusField = create_choice_human_field(
 )
 
 
-class PushNotificationOutputSchema(serializers.ModelSerializer):
-    kind = PushNotificationKindField()
-    status = PushNotificationStatusField()
-    data = inline_serializer(
+@extend_schema_field(
+    inline_serializer(
         name="PushNotificationEnrichedDataOutputSchema",
         fields={
             "id": serializers.CharField(),
@@ -27,13 +27,43 @@ class PushNotificationOutputSchema(serializers.ModelSerializer):
             "readAt": serializers.DateTimeField(),
             "timeSinceCreated": serializers.CharField(),
             "kind": serializers.CharField(),
+            "collapseKey": serializers.CharField(allow_null=True),
             "meta": serializers.JSONField(),
         },
-        source="enriched_data",
     )
+)
+class PushNotificationEnrichedDataField(serializers.Field):
+    """Renders `PushNotification.get_enriched_data` as is, instead of passing each key
+    through a nested serializer field"""
+
+    def __init__(self, **kwargs):
+        super().__init__(source="*", read_only=True, **kwargs)
+
+    def to_representation(self, value: models.PushNotification):
+        time_since = getattr(self.root, "time_since", None) or timesince
+        data = value.get_enriched_data(time_since=time_since)
+        data["id"] = str(data["id"])
+        return data
+
+
+class PushNotificationListOutputSchema(serializers.ListSerializer):
+    """Shares a single `TimeSince` between all the notifications of the page"""
+
+    time_since: models.TimeSince | None = None
+
+    def to_representation(self, data):
+        self.time_since = models.TimeSince()
+        return super().to_representation(data)
+
+
+class PushNotificationOutputSchema(serializers.ModelSerializer):
+    kind = PushNotificationKindField()
+    status = PushNotificationStatusField()
+    data = PushNotificationEnrichedDataField()
 
     class Meta:
         model = models.PushNotification
+        list_serializer_class = PushNotificationListOutputSchema
         fields = (
             "id",
             "title",
@@ -53,5 +83,9 @@ class PushNotificationReadManyOutputSchema(serializers.Serializer):
     read = serializers.IntegerField()
 
 
+class PushNotificationUnreadCountOutputSchema(serializers.Serializer):
+    count = serializers.IntegerField()
+
+
 class PushNotificationSetTokenInputSchema(serializers.Serializer):
     notification_token = serializers.CharField()
@@ -5,7 +5,8 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 
 from app.consts.http import HttpStatusCode
-from app.drf.openapi import limit_offset_openapi_schema, openapi_schema
+from app.drf.openapi import cursor_openapi_schema, openapi_schema
+from app.drf.pagination import CursorPagination
 from app.drf.viewsets import AppViewSet
 from push_notifications import exc, selectors, services
 
@@ -14,8 +15,9 @@ from . import schemas
 
 class PushNotificationViewSet(AppViewSet):
     permission_classes = [IsAuthenticated]
+    default_pagination_class = CursorPagination
 
-    @limit_offset_openapi_schema(
+    @cursor_openapi_schema(
         wrapped_schema=schemas.PushNotificationOutputSchema,
         operation_id="push-notification-list",
         summary="Notifications list",
@@ -32,6 +34,20 @@ class PushNotificationViewSet(AppViewSet):
             queryset=qs, srlzr_class=schemas.PushNotificationOutputSchema
         )
 
+    @openapi_schema(
+        summary="Unread notifications count",
+        description="Returns how many notifications the current user hasn't read yet",
+        request=None,
+        responses={HttpStatusCode.HTTP_200_OK: schemas.PushNotificationUnreadCountOutputSchema},
+        tags=["push notifications"],
+        operation_id="push-notification-unread-count",
+        add_unauthorized_response=True,
+    )
+    @action(methods=["GET"], detail=False, url_path="unread-count")
+    def unread_count(self, request: Request) -> Response:
+        count = services.push_notification_get_unread_count(user=request.user)
+        return Response(data={"count": count})
+
     @openapi_schema(
         summary="Read many notifications",
         description="Reads a list of notifications",
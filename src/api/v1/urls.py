@@ -9,4 +9,11 @@ urlpatterns = [
         include((push_notifications.urls, "push_notifications"), namespace="push_notifications"),
     ),
     path("users/", include((users.urls, "users"), namespace="users")),
+    path(
+        "async/notifications/",
+        include(
+            (push_notifications.async_urls, "push_notifications_async"),
+            namespace="push_notifications_async",
+        ),
+    ),
 ]
@@ -1,9 +1,18 @@
 import os
 
-from channels.routing import ProtocolTypeRouter
+from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings.conf")
 
 django_asgi_app = get_asgi_application()
-application = ProtocolTypeRouter({"http": django_asgi_app})
+
+# Imported once the apps are loaded by `get_asgi_application`
+from api.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter(
+    {
+        "http": django_asgi_app,
+        "websocket": URLRouter(websocket_urlpatterns),
+    }
+)
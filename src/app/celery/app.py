@@ -2,6 +2,7 @@ import os
 from datetime import timedelta
 
 from celery import Celery, signals
+from celery.schedules import crontab
 from django.conf import settings
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings.conf")
@@ -29,12 +30,30 @@ CELERY_CONFIG = {
             "args": (),
             "options": {"expires": timedelta(minutes=10).total_seconds()},
         },
+        "push_notification_flush_scheduled_notifications": {
+            "task": "push_notifications.tasks.push_notification_flush_scheduled_periodically",
+            "schedule": timedelta(seconds=settings.PUSH_NOTIFICATION_SCHEDULE_BUCKET_SECONDS),
+            "args": (),
+            "options": {"expires": settings.PUSH_NOTIFICATION_SCHEDULE_BUCKET_SECONDS},
+        },
+        "push_notification_purge_old_notifications_daily": {
+            "task": "push_notifications.tasks.push_notification_purge_old_periodically",
+            "schedule": crontab(hour=4, minute=0),
+            "args": (),
+            "options": {"expires": timedelta(hours=1).total_seconds()},
+        },
+        "user_flush_buffered_last_logins": {
+            "task": "users.tasks.user_flush_buffered_last_logins_periodically",
+            "schedule": timedelta(seconds=settings.USER_LAST_LOGIN_FLUSH_SECONDS),
+            "args": (),
+            "options": {"expires": settings.USER_LAST_LOGIN_FLUSH_SECONDS},
+        },
     },
     "broker_url": settings.BROKER_URL,
     "broker_connection_retry_on_startup": True,
 }
 
-app.autodiscover_tasks(["push_notifications"])
+app.autodiscover_tasks(["push_notifications", "users"])
 app.conf.update(**CELERY_CONFIG)
 
 
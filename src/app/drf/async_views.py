@@ -0,0 +1,104 @@
+from typing import Any
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.decorators import classonlymethod
+from rest_framework import exceptions, serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import authentication, utils
+
+
+class AsyncAPIView(APIView):
+    """An `APIView` whose handlers are coroutines, served without leaving the event loop when
+    running under ASGI. The request is authenticated with the async ORM, by the `aauthenticate`
+    of each of the `authentication_classes`, while the permissions, content negotiation and
+    error handling are the same as any other view.
+    The rendered response is returned as a plain `HttpResponse`, otherwise Django would render
+    it on a thread after the view"""
+
+    authentication_classes = [
+        authentication.AsyncJwtAuthentication,
+        authentication.AsyncTokenAuthentication,
+    ]
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        if not cls.view_is_async:
+            raise TypeError(f"{cls.__name__} handlers must be `async def`")
+        return view
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs):
+        return self.adispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial_negotiation(request, *args, **kwargs)
+            await self.aperform_authentication(request)
+            self.check_permissions(request)
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                raise exceptions.MethodNotAllowed(request.method)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        self.response = HttpResponse(
+            response.rendered_content,
+            status=response.status_code,
+            headers=dict(response.items()),
+        )
+        return self.response
+
+    def initial_negotiation(self, request: Request, *args, **kwargs) -> None:
+        """The part of `APIView.initial` that runs before the authentication"""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+    async def aperform_authentication(self, request: Request) -> None:
+        """Sets the `request.user` with the first authenticator that succeeds"""
+        for authenticator in request.authenticators:
+            try:
+                auth_result = await authenticator.aauthenticate(request._request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+            if auth_result is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = auth_result
+                return
+        request._not_authenticated()
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+    def get_valid_query_params(self, srlzr_class: type[serializers.Serializer]) -> dict[str, Any]:
+        return utils.get_valid_request_query_params(request=self.request, srlzr_class=srlzr_class)
+
+    def get_valid_data(self, srlzr_class: type[serializers.Serializer]) -> dict[str, Any]:
+        return utils.get_valid_request_data(request=self.request, srlzr_class=srlzr_class)
+
+    async def aget_paginated_response(
+        self,
+        queryset,
+        srlzr_class: type[serializers.Serializer],
+        pagination_class,
+    ) -> Response:
+        """Same as `AppViewSet.get_paginated_response`, for paginations that support
+        `apaginate_queryset`"""
+        paginator = pagination_class()
+        page = await paginator.apaginate_queryset(queryset, self.request, view=self)
+        serializer = srlzr_class(page, many=True, context={"request": self.request})
+        return paginator.get_paginated_response(serializer.data)
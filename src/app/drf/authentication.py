@@ -1,13 +1,24 @@
 from typing import Any
 
+from django.http import HttpRequest
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication as DrfTokenAuthentication
+from rest_framework.authentication import get_authorization_header
 from rest_framework.authtoken.models import Token
 from rest_framework_simplejwt.authentication import (
     JWTAuthentication as DrfJwtAuthentication,
 )
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 
+from users import token_cache, tokens
 from users.models import User
-from users.services.auth import user_update_last_login_on_succesfull_api_authentication
+from users.services.auth import (
+    user_aupdate_last_login_on_succesfull_api_authentication,
+    user_update_last_login_on_succesfull_api_authentication,
+)
 
 AuthResult = tuple[User, Any] | None
 
@@ -20,20 +31,137 @@ def after_authenticate(auth_result: AuthResult) -> AuthResult:
     return auth_result
 
 
+async def aafter_authenticate(auth_result: AuthResult) -> AuthResult:
+    if auth_result is None:
+        return None
+    user, token = auth_result
+    await user_aupdate_last_login_on_succesfull_api_authentication(user=user)
+    return auth_result
+
+
 class LastLoginAwareTokenAuthentication(DrfTokenAuthentication):
     """Normally the `TokenAuthentication` from rest framework does not updates
     the `last_login` field, this class does not changes any behavior of the rest
     framework.
 
     Only after the authentication is succesful check if the `last_login`
-    was never updated/was not updated on the current date."""
+    was never updated/was not updated on the current date.
+
+    The tokens are looked up on the `users.token_cache` first, so the warm requests don't
+    query the database."""
 
     def authenticate(self, request):
         auth_result: tuple[User, Token] | None = super().authenticate(request)
         return after_authenticate(auth_result)
 
+    def authenticate_credentials(self, key: str) -> tuple[User, Token]:
+        token = token_cache.get(key=key)
+        if token is not None:
+            return token.user, token
+        user, token = super().authenticate_credentials(key)
+        token_cache.store(token=token)
+        return user, token
+
 
 class LastLoginAwareJwtAuthentication(DrfJwtAuthentication):
+    """When the access token has the claims of the user (see `users.tokens`), the user is
+    built from them instead of being queried, and its other fields are only loaded if
+    they're used"""
+
     def authenticate(self, request):
         auth_result: tuple[User, str] | None = super().authenticate(request)  # type: ignore
         return after_authenticate(auth_result)
+
+    def get_user(self, validated_token) -> User:
+        return self.get_user_from_claims(validated_token) or super().get_user(validated_token)
+
+    def get_user_from_claims(self, validated_token) -> User | None:
+        claims = validated_token.get(tokens.USER_CLAIM)
+        if claims is None or not tokens.is_enabled():
+            return None
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user = tokens.get_user_from_claims(user_id=user_id, claims=claims)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+class AsyncTokenAuthentication(LastLoginAwareTokenAuthentication):
+    """Same as `LastLoginAwareTokenAuthentication`, but the token is looked up with the async
+    ORM. Used by the `app.drf.async_views.AsyncAPIView`, that calls `aauthenticate`"""
+
+    async def aauthenticate(self, request: HttpRequest) -> AuthResult:
+        key = self.get_key(request)
+        if key is None:
+            return None
+        token = await token_cache.aget(key=key)
+        if token is None:
+            try:
+                token = await Token.objects.select_related("user").aget(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+            await token_cache.astore(token=token)
+        return await aafter_authenticate((token.user, token))
+
+    def get_key(self, request: HttpRequest) -> str | None:
+        """The key of the `Authorization: Token <key>` header, checked just like `authenticate`"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. No credentials provided.")
+            )
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain spaces.")
+            )
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain invalid characters.")
+            )
+
+
+class AsyncJwtAuthentication(LastLoginAwareJwtAuthentication):
+    """Same as `LastLoginAwareJwtAuthentication`, but the user is looked up with the async ORM.
+    The token itself is validated synchronously, since it doesn't do any I/O"""
+
+    async def aauthenticate(self, request: HttpRequest) -> AuthResult:
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await aafter_authenticate((await self.aget_user(validated_token), validated_token))
+
+    async def aget_user(self, validated_token) -> User:
+        """Same checks as `get_user`"""
+        user = self.get_user_from_claims(validated_token)
+        if user is not None:
+            return user
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        try:
+            user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            jwt_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise exceptions.AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
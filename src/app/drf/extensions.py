@@ -5,11 +5,13 @@ from drf_spectacular.openapi import AutoSchema
 
 class LoginAwareSimpleJWTScheme(SimpleJWTScheme):
     target_class = "app.drf.authentication.LastLoginAwareJwtAuthentication"
+    match_subclasses = True
     name = "JWT Authentication"
 
 
 class LoginAwareTokenScheme(OpenApiAuthenticationExtension):
     target_class = "app.drf.authentication.LastLoginAwareTokenAuthentication"
+    match_subclasses = True
     name = "Token Authentication"
 
     def get_security_definition(self, auto_schema: AutoSchema):
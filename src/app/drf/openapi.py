@@ -1,4 +1,5 @@
 import decimal
+import functools
 import uuid
 from typing import Sequence, Type
 
@@ -91,6 +92,7 @@ def openapi_schema(
     add_unauthorized_response: bool = False,
     add_forbidden_response: bool = False,
     add_not_found_response: bool = False,
+    add_service_unavailable_response: bool = False,
     parameter_serializer: type[serializers.Serializer] | None = None,
     raises: Sequence[type[ApplicationError]] | None = None,
     **kwargs,
@@ -101,6 +103,7 @@ def openapi_schema(
     - 400: If the responses does not yet has one 400 response defined and the parameter `add_bad_request_response` is set to True;
     - 401: If the parameter `add_unathorized_response` is set to True;
     - 403: If the parameter `add_forbidden_response` is set to True;
+    - 503: If the parameter `add_service_unavailable_response` is set to True;
 
     `parameter_serializer`: A serializer class that is used for generating the parameters directly
     from a serializer.
@@ -133,6 +136,10 @@ def openapi_schema(
     responses[status.HTTP_502_BAD_GATEWAY] = OpenApiResponse(
         response=None, description="Temporary unavailability"
     )
+    if add_service_unavailable_response:
+        responses[status.HTTP_503_SERVICE_UNAVAILABLE] = OpenApiResponse(
+            response=ApplicationErrorSchema, description="Too busy, try again later"
+        )
     if parameter_serializer is not None:
         parameters = kwargs.get("parameters", [])
         parameters.extend(_openapi_parameters_from_serializer(parameter_serializer))
@@ -223,9 +230,72 @@ def limit_offset_openapi_schema(
     )
 
 
+def cursor_openapi_schema(
+    *,
+    wrapped_schema: Type[serializers.Serializer],
+    description: str,
+    summary: str,
+    tags: list[str],
+    operation_id: str | None = None,
+    request: serializers.Serializer | None = None,
+    responses: dict[int, type[serializers.Serializer] | serializers.Serializer] | None = None,
+    parameter_serializer: type[serializers.Serializer] | None = None,
+    **openapi_schema_kwargs,
+):
+    """Same as `limit_offset_openapi_schema`, but for views that use the `CursorPagination`"""
+    responses = responses or {}
+    responses[200] = _cursor_paginated_schema(wrapped_schema)
+    parameters = openapi_schema_kwargs.get("parameters", [])
+    parameters.extend(
+        [
+            OpenApiParameter(
+                name="limit",
+                description=f"How many results per page, max: {settings.API_PAGINATION_MAX_LIMIT}",
+                type=int,
+                required=False,
+                default=settings.API_PAGINATION_DEFAULT_LIMIT,
+            ),
+            OpenApiParameter(
+                name="cursor",
+                description="The page to lookup, taken from the `next`/`previous` links",
+                type=str,
+                required=False,
+            ),
+        ]
+    )
+    openapi_schema_kwargs["parameters"] = parameters
+    return openapi_schema(
+        operation_id=operation_id,
+        description=description,
+        summary=summary,
+        request=request,
+        responses=responses,
+        tags=tags,
+        parameter_serializer=parameter_serializer,
+        **openapi_schema_kwargs,
+    )
+
+
 FILE_UPLOAD_REQUEST = {
     "multipart/form-data": {
         "type": "object",
         "properties": {"file": {"type": "string", "format": "binary"}},
     }
 }
+
+
+@functools.cache
+def _cursor_paginated_schema(wrapped_schema: Type[serializers.Serializer]):
+    """The same schema is shared by all the views that paginate `wrapped_schema`, otherwise
+    they'd be different components with the same name"""
+    from .serializers import inline_serializer
+
+    return inline_serializer(
+        name=f"CursorPaginated{wrapped_schema.__name__}",
+        fields={
+            "limit": serializers.IntegerField(),
+            "next": serializers.URLField(required=False, default=None),
+            "previous": serializers.URLField(required=False, default=None),
+            "results": wrapped_schema(many=True),
+        },
+    )
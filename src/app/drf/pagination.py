@@ -1,12 +1,19 @@
+import base64
+import binascii
+import json
 from collections import OrderedDict
 from typing import Any, Type
 
 from django.conf import settings
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import BasePagination
 from rest_framework.pagination import LimitOffsetPagination as DrfLimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
 
@@ -45,6 +52,110 @@ class LimitOffsetPagination(DrfLimitOffsetPagination):
         )
 
 
+class CursorPagination(BasePagination):
+    """Keyset pagination over `(created_at, id)`, newest first. Unlike `LimitOffsetPagination`
+    there's no COUNT query and the cost of a page doesn't grow with how deep it is.
+    The `cursor` given on the `next`/`previous` links is opaque to the clients"""
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = settings.API_PAGINATION_DEFAULT_LIMIT
+    max_limit = settings.API_PAGINATION_MAX_LIMIT
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_qs, has_cursor = self.get_page_queryset(queryset, request)
+        return self.set_page(list(page_qs), has_cursor=has_cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Same as `paginate_queryset`, fetching the page with the async ORM"""
+        page_qs, has_cursor = self.get_page_queryset(queryset, request)
+        return self.set_page([item async for item in page_qs.aiterator()], has_cursor=has_cursor)
+
+    def get_page_queryset(self, queryset, request) -> tuple[QuerySet, bool]:
+        """The queryset of the requested page, plus one item. Tells if a cursor was given"""
+        self.request = request
+        self.limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+        self.reverse = cursor is not None and cursor[2]
+
+        if self.reverse:
+            queryset = queryset.order_by("created_at", "id")
+        else:
+            queryset = queryset.order_by("-created_at", "-id")
+        if cursor is not None:
+            created_at, pk, reverse = cursor
+            if reverse:
+                keyset = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            else:
+                keyset = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            queryset = queryset.filter(keyset)
+
+        # Fetching one extra item tells if there's more to come without counting
+        return queryset[: self.limit + 1], cursor is not None
+
+    def set_page(self, results: list, *, has_cursor: bool) -> list:
+        has_more = len(results) > self.limit
+        self.page = results[: self.limit]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, has_cursor
+        return self.page
+
+    def get_limit(self, request) -> int:
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def decode_cursor(self, request) -> tuple[Any, int, bool] | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError(created_at)
+            return created_at, int(pk), bool(reverse)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse: bool) -> str:
+        position = [instance.created_at.isoformat(), instance.pk, reverse]
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        return OrderedDict(
+            [
+                ("limit", self.limit),
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+                ("results", data),
+            ]
+        )
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
 def get_paginated_response(
     *,
     view: APIView,
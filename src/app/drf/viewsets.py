@@ -8,6 +8,9 @@ from . import pagination, utils
 
 
 class AppViewSet(viewsets.ViewSet):
+    # Views can opt in other pagination styles, like `pagination.CursorPagination`
+    default_pagination_class: type[BasePagination] = pagination.LimitOffsetPagination
+
     def get_valid_query_params(self, srlzr_class: type[serializers.Serializer]):
         return utils.get_valid_request_query_params(request=self.request, srlzr_class=srlzr_class)
 
@@ -26,5 +29,5 @@ class AppViewSet(viewsets.ViewSet):
             queryset=queryset,
             serializer_class=srlzr_class,
             extra_context=srlzr_context,
-            pagination_class=pagination_class or pagination.LimitOffsetPagination,
+            pagination_class=pagination_class or self.default_pagination_class,
         )
@@ -43,6 +43,17 @@ def _expect_all_service_classes_annotated(
             )
 
 
+def load_service(service_class: InternalOrExternalService) -> InternalService | ExternalService:
+    """Loads the configured backend of the `service_class`, for the services that can't be
+    injected (e.g: the ones kept for the whole process). Raises `ImproperlyConfigured` if
+    we are on production and that backend is not suitable for production"""
+    _require_service_loader_attr(service_class)
+    service = service_class.service_loader()
+    if settings.ON_PRODUCTION and not service.suitable_for_production:
+        raise ImproperlyConfigured(f"{service=} is not suitable for production")
+    return service
+
+
 def inject_service_at_runtime(*service_classes: InternalOrExternalService):
     """Decorator that wraps a keyword-only function that may receive only keyword arguments.
     This function must type-annotate the given `service_classes` as a parameter and expect to
@@ -73,10 +84,7 @@ def inject_service_at_runtime(*service_classes: InternalOrExternalService):
         @functools.wraps(f)
         def injected_wrapper(**kwargs):
             for service_class in service_classes:
-                service = service_class.service_loader()
-                if settings.ON_PRODUCTION and not service.suitable_for_production:
-                    raise ImproperlyConfigured(f"{service=} is not suitable for production")
-
+                service = load_service(service_class)
                 injection_kwarg_name = type_annotations_names[service_class]
                 if injection_kwarg_name in kwargs:
                     logger.warning(
@@ -0,0 +1,71 @@
+"""Encoders for the request bodies sent to the external services. The backends build the bytes
+of their requests up front with these, instead of handing python objects to `requests`.
+When `orjson` is installed (`pip install .[speedups]`) it's used to encode JSON,
+otherwise the stdlib `json` is used"""
+import functools
+import json
+from typing import Any, Iterable, Mapping
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class PayloadEncoder:
+    content_type: str
+
+    def encode(self, obj: Any) -> bytes:
+        raise NotImplementedError("Missing implementation for method 'encode'")
+
+
+class StdlibJSONEncoder(PayloadEncoder):
+    content_type = "application/json"
+
+    def __init__(self):
+        self._encoder = DjangoJSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def encode(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode()
+
+
+class OrjsonJSONEncoder(PayloadEncoder):
+    content_type = "application/json"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed, install it with `pip install .[speedups]`")
+        # Falls back to django's encoder for what orjson doesn't know, e.g. lazy translations
+        self._default = DjangoJSONEncoder().default
+
+    def encode(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self._default)
+
+
+class FormEncoder(PayloadEncoder):
+    content_type = "application/x-www-form-urlencoded"
+
+    def encode(self, obj: Mapping[str, Any]) -> bytes:
+        return urlencode(obj).encode()
+
+
+def encode_json_array(encoded_items: Iterable[bytes]) -> bytes:
+    """Joins items that were already encoded into a JSON array, so each item can be
+    encoded as soon as it's built"""
+    return b"[" + b",".join(encoded_items) + b"]"
+
+
+@functools.cache
+def get_json_encoder() -> PayloadEncoder:
+    encoders: dict[str, type[PayloadEncoder]] = {
+        "orjson": OrjsonJSONEncoder,
+        "stdlib": StdlibJSONEncoder,
+    }
+    name = settings.EXTERNAL_SERVICES_JSON_ENCODER
+    if name == "auto":
+        name = "orjson" if orjson is not None else "stdlib"
+    return encoders[name]()
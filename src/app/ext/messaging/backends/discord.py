@@ -1,10 +1,10 @@
-import json
 from io import StringIO
 from typing import Any, Sequence
 
 import requests
 from django.conf import settings
 
+from app.ext.encoders import get_json_encoder
 from app.ext.messaging.abc import (
     EmbedFile,
     Message,
@@ -32,6 +32,7 @@ class DiscordMessagingExternalService(MessagingExternalService):
 
     def __init__(self):
         self.oauth_token = settings.MESSAGING_EXTERNAL_SERVICE_DISCORD_OAUTH_TOKEN
+        self.encoder = get_json_encoder()
 
     def send(self, *, to: str, message: Message, files: Sequence[EmbedFile]):
         formatted_message = str(message)
@@ -57,13 +58,24 @@ class DiscordMessagingExternalService(MessagingExternalService):
         if attachments:
             json_payload["attachments"] = attachments
 
+        headers = {"Authorization": f"Bot {self.oauth_token}"}
+        body = self.encoder.encode(json_payload)
+        if embed_files:
+            # The files are sent as multipart, along with the payload as one of its fields
+            request_kwargs: dict[str, Any] = {
+                "data": {"payload_json": body.decode()},
+                "files": embed_files,
+            }
+        else:
+            headers["Content-Type"] = self.encoder.content_type
+            request_kwargs = {"data": body}
+
         try:
             response = requests.post(
                 url=f"https://discord.com/api/channels/{to}/messages",
-                headers={"Authorization": f"Bot {self.oauth_token}"},
-                data={"payload_json": json.dumps(json_payload)},
-                files=embed_files or None,
+                headers=headers,
                 timeout=5,
+                **request_kwargs,
             )
             response.raise_for_status()
         except (requests.Timeout, requests.HTTPError) as e:
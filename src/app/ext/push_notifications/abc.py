@@ -1,4 +1,4 @@
-from typing import Literal, Sequence, TypedDict
+from typing import Literal, NotRequired, Sequence, TypedDict
 
 from django.conf import settings
 
@@ -14,6 +14,8 @@ class ErrorDetail(TypedDict):
         "MismatchSenderId",
         "InvalidCredentials",
     ]
+    # The token of the device that failed, always present for DeviceNotRegistered
+    expoPushToken: NotRequired[str]
 
 
 class PushTicket(TypedDict, total=False):
@@ -45,10 +47,14 @@ def push_notification_external_service_loader() -> "PushNotificationExternalServ
 class PushNotificationExternalService(ExternalService):
     service_loader = push_notification_external_service_loader
 
-    def send(self, push: PushNotification) -> PushTicket:
+    def send(self, push: PushNotification) -> list[PushTicket]:
+        """Sends the push to every device of its user, see `bulk_send`"""
         raise NotImplementedError("Missing implementation for method 'send'")
 
-    def bulk_send(self, pushes: Sequence[PushNotification]) -> dict[str, PushTicket]:
+    def bulk_send(self, pushes: Sequence[PushNotification]) -> dict[str, list[PushTicket]]:
+        """Sends each push to every device of its user, returning the tickets of each push
+        by its id, one for each device, in the order of `User.get_notification_tokens`.
+        Pushes without tickets were not sent, the caller is expected to send them again"""
         raise NotImplementedError("Missing implementation for method 'bulk_send'")
 
     def get_receipts(self, ticket_ids: Sequence[str]) -> dict[str, PushReceipt]:
@@ -1,20 +1,32 @@
+import functools
 import logging
-from typing import Any, Iterable, Sequence, TypedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Iterable, Sequence, TypedDict
 
 import requests
+from django.conf import settings
+from django.utils.timesince import timesince
+from requests.adapters import HTTPAdapter
 
+from app.consts.http import HttpStatusCode
+from app.ext import di
+from app.ext.encoders import encode_json_array, get_json_encoder
 from app.ext.push_notifications.abc import (
     PushNotificationExternalService,
     PushReceipt,
     PushTicket,
 )
-from push_notifications.models import PushNotification
+from app.ext.rate_limit.abc import RateLimiterInternalService
+from push_notifications.models import PushNotification, TimeSince
 
 logger = logging.getLogger("expo_notifications")
 
 
-class ExpoSinglePushResponse(TypedDict):
-    data: PushTicket
+@functools.cache
+def _rate_limiter() -> RateLimiterInternalService:
+    """One rate limiter for all the Expo services of this process"""
+    return di.load_service(RateLimiterInternalService)  # type: ignore
 
 
 class ExpoMultiplePushesResponse(TypedDict):
@@ -33,44 +45,147 @@ class ExpoPushNotificationExternalService(PushNotificationExternalService):
     _RECEIPT_URL = "https://exp.host/--/api/v2/push/getReceipts"
     _READ_TIMEOUT = 10
     _MAX_ITEMS_PER_REQUEST = 100
-
-    def __init__(self):
+    _RATE_LIMIT_BUCKET = "expo:push"
+
+    def __init__(
+        self,
+        max_concurrent_requests: int | None = None,
+        rate_limiter: RateLimiterInternalService | None = None,
+    ):
+        self.max_concurrent_requests = max(
+            max_concurrent_requests or settings.PUSH_NOTIFICATION_EXPO_MAX_CONCURRENT_REQUESTS,
+            1,
+        )
+        self.rate_limiter = rate_limiter or _rate_limiter()
+        self.encoder = get_json_encoder()
+        self._headers = {"Content-Type": self.encoder.content_type}
         self.s = requests.Session()
+        # Keep one connection per in-flight request, so concurrent chunks don't wait on the pool
+        self.s.mount("https://", HTTPAdapter(pool_maxsize=self.max_concurrent_requests))
 
-    def _push_json_data(self, push: PushNotification) -> dict[str, Any]:
+    def _push_json_data(
+        self, push: PushNotification, time_since: Callable[[datetime], str] = timesince
+    ) -> dict[str, Any]:
+        """The message without its recipient, see `_messages`"""
         return {
-            "to": push.user.notification_token,
             "title": push.title,
             "body": push.description,
-            "data": push.enriched_data,
+            "data": push.get_enriched_data(time_since=time_since),
         }
 
-    def send(self, push: PushNotification) -> PushTicket:
-        logger.info(f"Sending Expo Push {push=}")
-        response: requests.Response = self.s.post(
-            url=self._SEND_URL,
-            json=self._push_json_data(push),
-            timeout=self._READ_TIMEOUT,
+    def _messages(
+        self, push: PushNotification, time_since: Callable[[datetime], str] = timesince
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """One message for each device of the user, with its token"""
+        tokens = push.user.get_notification_tokens()
+        if not tokens:
+            return []
+        data = self._push_json_data(push, time_since)
+        return [(token, {"to": token, **data}) for token in tokens]
+
+    def _ticket_of(self, token: str, ticket: PushTicket) -> PushTicket:
+        details = ticket.get("details")
+        if details and details.get("error") == "DeviceNotRegistered":
+            # The unregistered devices are pruned by their token, make sure it's there
+            details.setdefault("expoPushToken", token)
+        return ticket
+
+    def _throttle(self, pushes_count: int) -> None:
+        """Waits until `pushes_count` pushes can be sent without going over the rate limit,
+        that is shared with all the other workers"""
+        waited = self.rate_limiter.wait(
+            bucket=self._RATE_LIMIT_BUCKET,
+            tokens=pushes_count,
+            rate=settings.PUSH_NOTIFICATION_EXPO_RATE_LIMIT,
+            capacity=settings.PUSH_NOTIFICATION_EXPO_RATE_LIMIT_BURST,
         )
-        logger.info(f"Expo Push {response.status_code=} {response.text=}")
-        data: ExpoSinglePushResponse = response.json()
-        return data["data"]
-
-    def bulk_send(self, pushes: Sequence[PushNotification]) -> dict[str, PushTicket]:
-        logger.info(f"Sending expo bulk push to {len(pushes)} devices")
-        tickets: dict[str, PushTicket] = {}
-        for step in range(0, len(pushes), self._MAX_ITEMS_PER_REQUEST):
-            next_step = step + self._MAX_ITEMS_PER_REQUEST
-            step_pushes: list[PushNotification] = [push for push in pushes[step:next_step]]
+        if waited:
+            logger.info(f"Throttled Expo pushes for {waited=:.2f}s")
+
+    def _penalize_if_rate_limited(self, tickets: Iterable[PushTicket]) -> None:
+        if any(
+            ticket.get("details", {}).get("error") == "MessageRateExceeded" for ticket in tickets
+        ):
+            logger.warning("Expo says we're sending too fast, slowing down")
+            self.rate_limiter.penalize(bucket=self._RATE_LIMIT_BUCKET)
+
+    def send(self, push: PushNotification) -> list[PushTicket]:
+        logger.info(f"Sending Expo Push {push=}")
+        return self.bulk_send([push]).get(str(push.id), [])
+
+    def _send_chunk(
+        self, step_recipients: Sequence[tuple[str, str]], body: bytes
+    ) -> list[tuple[str, PushTicket]]:
+        """Sends a chunk of messages, `step_recipients` holds the push id and the token of each
+        one of them. Returns the ticket of each message with its push id"""
+        step_ids = [push_id for push_id, _token in step_recipients]
+        self._throttle(len(step_recipients))
+        try:
             response: requests.Response = self.s.post(
                 url=self._SEND_URL,
-                json=[self._push_json_data(push) for push in step_pushes],
+                data=body,
+                headers=self._headers,
                 timeout=self._READ_TIMEOUT,
             )
             logger.info(f"Expo Push {response.status_code=} {response.text=}")
+            if response.status_code == HttpStatusCode.HTTP_429_TOO_MANY_REQUESTS:
+                # Left without tickets as well, so they're sent again with a backoff
+                self.rate_limiter.penalize(bucket=self._RATE_LIMIT_BUCKET)
+                logger.warning(f"Expo rate limited the pushes {step_ids=}")
+                return []
             data: ExpoMultiplePushesResponse = response.json()
-            for i, ticket in enumerate(data["data"]):
-                tickets[str(step_pushes[i].id)] = ticket
+        except (requests.RequestException, ValueError):
+            # The pushes of this chunk are left without a ticket, `push_notification_send`
+            # schedules them to be sent again. We don't raise so the tickets of the other
+            # chunks are still handled
+            logger.exception(f"Failed to send Expo pushes {step_ids=}")
+            return []
+        tickets = [
+            (push_id, self._ticket_of(token, ticket))
+            for (push_id, token), ticket in zip(step_recipients, data["data"])
+        ]
+        self._penalize_if_rate_limited(ticket for _push_id, ticket in tickets)
+        return tickets
+
+    def bulk_send(self, pushes: Sequence[PushNotification]) -> dict[str, list[PushTicket]]:
+        logger.info(f"Sending expo bulk push of {len(pushes)} notifications")
+        # Bodies are built here, on the caller thread, since the payloads may touch the
+        # database. Each message is encoded right away and the chunk body is just joined
+        time_since = TimeSince()
+        encode = self.encoder.encode
+        recipients: list[tuple[str, str]] = []
+        encoded_messages: list[bytes] = []
+        for push in pushes:
+            for token, message in self._messages(push, time_since):
+                recipients.append((str(push.id), token))
+                encoded_messages.append(encode(message))
+        # The messages of the devices of an user go on the same chunks as everyone else's
+        chunks = [
+            (
+                recipients[step : step + self._MAX_ITEMS_PER_REQUEST],
+                encode_json_array(encoded_messages[step : step + self._MAX_ITEMS_PER_REQUEST]),
+            )
+            for step in range(0, len(recipients), self._MAX_ITEMS_PER_REQUEST)
+        ]
+
+        max_workers = min(self.max_concurrent_requests, len(chunks))
+        tickets: dict[str, list[PushTicket]] = {}
+
+        def collect(chunk_tickets: list[tuple[str, PushTicket]]) -> None:
+            for push_id, ticket in chunk_tickets:
+                tickets.setdefault(push_id, []).append(ticket)
+
+        if max_workers <= 1:
+            for chunk in chunks:
+                collect(self._send_chunk(*chunk))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # map yields the results in the order of the chunks, whatever order they finish
+                for chunk_tickets in executor.map(lambda chunk: self._send_chunk(*chunk), chunks):
+                    collect(chunk_tickets)
+
+        metrics = self.rate_limiter.get_metrics(bucket=self._RATE_LIMIT_BUCKET)
+        logger.info(f"Expo pushes rate limit {metrics=}")
         return tickets
 
     def get_receipts(self, ticket_ids: Sequence[str]) -> dict[str, PushReceipt]:
@@ -80,7 +195,11 @@ class ExpoPushNotificationExternalService(PushNotificationExternalService):
         for step in range(0, len(ticket_ids), self._MAX_ITEMS_PER_REQUEST):
             next_step = step + self._MAX_ITEMS_PER_REQUEST
             step_ids = ticket_ids[step:next_step]
-            response: requests.Response = self.s.post(url=self._RECEIPT_URL, json={"ids": step_ids})
+            response: requests.Response = self.s.post(
+                url=self._RECEIPT_URL,
+                data=self.encoder.encode({"ids": list(step_ids)}),
+                headers=self._headers,
+            )
             data: ExpoGetReceiptResponse = response.json()
             receipts.update(data["data"])
         return receipts
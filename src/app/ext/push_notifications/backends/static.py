@@ -17,11 +17,11 @@ class StaticPushNotificationExternalService(PushNotificationExternalService):
     def _ok_push_ticket(self) -> PushTicket:
         return {"status": "ok", "id": str(uuid.uuid4())}
 
-    def send(self, push: PushNotification) -> PushTicket:
-        return self._ok_push_ticket()
+    def send(self, push: PushNotification) -> list[PushTicket]:
+        return [self._ok_push_ticket() for _token in push.user.get_notification_tokens()]
 
-    def bulk_send(self, pushes: Sequence[PushNotification]) -> dict[str, PushTicket]:
-        return {str(push.id): self._ok_push_ticket() for push in pushes}
+    def bulk_send(self, pushes: Sequence[PushNotification]) -> dict[str, list[PushTicket]]:
+        return {str(push.id): self.send(push) for push in pushes}
 
     def get_receipts(self, ticket_ids: Sequence[str]) -> dict[str, PushReceipt]:
         return {ticket_id: self._ok_push_ticket() for ticket_id in ticket_ids}
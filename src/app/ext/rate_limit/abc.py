@@ -0,0 +1,65 @@
+import time
+from typing import TypedDict
+
+from django.conf import settings
+
+from app.ext.abc import InternalService
+
+
+class RateLimiterMetrics(TypedDict):
+    rate: float
+    """The tokens per second currently allowed, lower than the configured while penalized"""
+    throughput: float
+    """The tokens per second acquired on the current window"""
+    acquired: int
+    """How many tokens were acquired"""
+    throttled: int
+    """How many times an acquire had to wait"""
+    penalties: int
+    """How many times the bucket was penalized"""
+
+
+def rate_limiter_internal_service_loader() -> "RateLimiterInternalService":
+    from .backends.memory import MemoryRateLimiterInternalService
+    from .backends.redis import RedisRateLimiterInternalService
+
+    backends = {
+        "redis": RedisRateLimiterInternalService,
+        "dev.memory": MemoryRateLimiterInternalService,
+    }
+    return backends[settings.RATE_LIMITER_BACKEND]()
+
+
+class RateLimiterInternalService(InternalService):
+    """Token buckets shared by everyone that uses the same backend. A bucket refills at `rate`
+    tokens per second up to `capacity`. When penalized, e.g. when the provider tells that we're
+    sending too fast, the rate is cut by `penalty_factor` and recovers back linearly"""
+
+    service_loader = rate_limiter_internal_service_loader
+
+    penalty_factor = 0.5
+    min_rate_factor = 0.05
+    recovery_per_second = 0.01
+    metrics_window_seconds = 60
+
+    def acquire(self, *, bucket: str, tokens: int, rate: float, capacity: int) -> float:
+        """Tries to take `tokens` from the `bucket`. Returns 0 if they were taken,
+        otherwise how many seconds to wait before they're available"""
+        raise NotImplementedError("Missing implementation for method 'acquire'")
+
+    def penalize(self, *, bucket: str) -> None:
+        """Slows the `bucket` down and drains its tokens"""
+        raise NotImplementedError("Missing implementation for method 'penalize'")
+
+    def get_metrics(self, *, bucket: str) -> RateLimiterMetrics:
+        raise NotImplementedError("Missing implementation for method 'get_metrics'")
+
+    def wait(self, *, bucket: str, tokens: int, rate: float, capacity: int) -> float:
+        """Blocks until `tokens` are taken from the `bucket`. Returns the seconds waited"""
+        # More than the capacity would never be available
+        tokens = min(tokens, capacity)
+        waited = 0.0
+        while delay := self.acquire(bucket=bucket, tokens=tokens, rate=rate, capacity=capacity):
+            time.sleep(delay)
+            waited += delay
+        return waited
@@ -0,0 +1,97 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from app.ext.rate_limit.abc import RateLimiterInternalService, RateLimiterMetrics
+
+
+@dataclass
+class _Bucket:
+    tokens: float
+    capacity: int
+    max_rate: float
+    updated_at: float
+    window_start: float
+    rate_factor: float = 1.0
+    window_acquired: int = 0
+    acquired: int = 0
+    throttled: int = 0
+    penalties: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.max_rate * self.rate_factor
+
+
+class MemoryRateLimiterInternalService(RateLimiterInternalService):
+    """Keeps the buckets in this process memory, so they're not shared between workers.
+    Meant for development and tests, use the redis backend otherwise"""
+
+    suitable_for_production = False
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._buckets: dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _refill(self, bucket: _Bucket, now: float) -> None:
+        elapsed = max(now - bucket.updated_at, 0)
+        bucket.rate_factor = min(bucket.rate_factor + self.recovery_per_second * elapsed, 1.0)
+        bucket.tokens = min(bucket.tokens + elapsed * bucket.rate, bucket.capacity)
+        bucket.updated_at = now
+        if now - bucket.window_start >= self.metrics_window_seconds:
+            bucket.window_start = now
+            bucket.window_acquired = 0
+
+    def acquire(self, *, bucket: str, tokens: int, rate: float, capacity: int) -> float:
+        now = self.clock()
+        with self._lock:
+            state = self._buckets.get(bucket)
+            if state is None:
+                state = self._buckets[bucket] = _Bucket(
+                    tokens=capacity,
+                    capacity=capacity,
+                    max_rate=rate,
+                    updated_at=now,
+                    window_start=now,
+                )
+            state.max_rate, state.capacity = rate, capacity
+            self._refill(state, now)
+            if state.tokens >= tokens:
+                state.tokens -= tokens
+                state.acquired += tokens
+                state.window_acquired += tokens
+                return 0.0
+            state.throttled += 1
+            return (tokens - state.tokens) / state.rate
+
+    def penalize(self, *, bucket: str) -> None:
+        with self._lock:
+            state = self._buckets.get(bucket)
+            if state is None:
+                return
+            self._refill(state, self.clock())
+            state.rate_factor = max(state.rate_factor * self.penalty_factor, self.min_rate_factor)
+            state.tokens = 0
+            state.penalties += 1
+
+    def get_metrics(self, *, bucket: str) -> RateLimiterMetrics:
+        now = self.clock()
+        with self._lock:
+            state = self._buckets.get(bucket)
+            if state is None:
+                return {
+                    "rate": 0.0,
+                    "throughput": 0.0,
+                    "acquired": 0,
+                    "throttled": 0,
+                    "penalties": 0,
+                }
+            self._refill(state, now)
+            return {
+                "rate": state.rate,
+                "throughput": state.window_acquired / max(now - state.window_start, 1),
+                "acquired": state.acquired,
+                "throttled": state.throttled,
+                "penalties": state.penalties,
+            }
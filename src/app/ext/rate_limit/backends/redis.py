@@ -0,0 +1,150 @@
+import redis
+from django.conf import settings
+
+from app.ext.rate_limit.abc import RateLimiterInternalService, RateLimiterMetrics
+
+# Every script refills the bucket before touching it, the time comes from the redis server
+# so all workers share the same clock. Floats are passed around as strings, since redis
+# truncates the numbers that are returned from a script
+_REFILL = """
+local key = KEYS[1]
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call(
+    "HMGET", key, "tokens", "capacity", "max_rate", "updated_at", "rate_factor",
+    "window_start", "window_acquired"
+)
+local capacity = tonumber(ARGV[2]) or tonumber(state[2])
+local max_rate = tonumber(ARGV[3]) or tonumber(state[3])
+if capacity == nil or max_rate == nil then
+    return nil
+end
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[4]) or now
+local rate_factor = tonumber(state[5]) or 1
+local window_start = tonumber(state[6]) or now
+local window_acquired = tonumber(state[7]) or 0
+local recovery_per_second = tonumber(ARGV[4])
+local window_seconds = tonumber(ARGV[5])
+
+local elapsed = math.max(now - updated_at, 0)
+rate_factor = math.min(rate_factor + recovery_per_second * elapsed, 1)
+local rate = max_rate * rate_factor
+tokens = math.min(tokens + elapsed * rate, capacity)
+if now - window_start >= window_seconds then
+    window_start = now
+    window_acquired = 0
+end
+"""
+
+_SAVE = """
+redis.call(
+    "HSET", key, "tokens", tostring(tokens), "capacity", tostring(capacity),
+    "max_rate", tostring(max_rate), "updated_at", tostring(now),
+    "rate_factor", tostring(rate_factor), "window_start", tostring(window_start),
+    "window_acquired", tostring(window_acquired)
+)
+redis.call("EXPIRE", key, 24 * 60 * 60)
+"""
+
+# ARGV: tokens, capacity, max_rate, recovery_per_second, window_seconds
+_ACQUIRE = (
+    _REFILL
+    + """
+local requested = tonumber(ARGV[1])
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+    window_acquired = window_acquired + requested
+    redis.call("HINCRBY", key, "acquired", requested)
+else
+    wait = (requested - tokens) / rate
+    redis.call("HINCRBY", key, "throttled", 1)
+end
+"""
+    + _SAVE
+    + """
+return tostring(wait)
+"""
+)
+
+# ARGV: _, _, _, recovery_per_second, window_seconds, penalty_factor, min_rate_factor
+_PENALIZE = (
+    _REFILL
+    + """
+rate_factor = math.max(rate_factor * tonumber(ARGV[6]), tonumber(ARGV[7]))
+tokens = 0
+redis.call("HINCRBY", key, "penalties", 1)
+"""
+    + _SAVE
+)
+
+# ARGV: _, _, _, recovery_per_second, window_seconds
+_METRICS = (
+    _REFILL
+    + _SAVE
+    + """
+local counters = redis.call("HMGET", key, "acquired", "throttled", "penalties")
+return {
+    tostring(max_rate * rate_factor),
+    tostring(window_acquired / math.max(now - window_start, 1)),
+    counters[1] or "0", counters[2] or "0", counters[3] or "0"
+}
+"""
+)
+
+
+class RedisRateLimiterInternalService(RateLimiterInternalService):
+    suitable_for_production = True
+
+    def __init__(self, client: redis.Redis | None = None):
+        self.client = client or redis.Redis.from_url(settings.REDIS_URL)
+        self._acquire = self.client.register_script(_ACQUIRE)
+        self._penalize = self.client.register_script(_PENALIZE)
+        self._metrics = self.client.register_script(_METRICS)
+
+    def _key(self, bucket: str) -> str:
+        return f"rate_limit:{bucket}"
+
+    def acquire(self, *, bucket: str, tokens: int, rate: float, capacity: int) -> float:
+        wait = self._acquire(
+            keys=[self._key(bucket)],
+            args=[
+                tokens,
+                capacity,
+                rate,
+                self.recovery_per_second,
+                self.metrics_window_seconds,
+            ],
+        )
+        return float(wait)
+
+    def penalize(self, *, bucket: str) -> None:
+        self._penalize(
+            keys=[self._key(bucket)],
+            args=[
+                "",
+                "",
+                "",
+                self.recovery_per_second,
+                self.metrics_window_seconds,
+                self.penalty_factor,
+                self.min_rate_factor,
+            ],
+        )
+
+    def get_metrics(self, *, bucket: str) -> RateLimiterMetrics:
+        metrics = self._metrics(
+            keys=[self._key(bucket)],
+            args=["", "", "", self.recovery_per_second, self.metrics_window_seconds],
+        )
+        if metrics is None:
+            return {"rate": 0.0, "throughput": 0.0, "acquired": 0, "throttled": 0, "penalties": 0}
+        rate, throughput, acquired, throttled, penalties = metrics
+        return {
+            "rate": float(rate),
+            "throughput": float(throughput),
+            "acquired": int(acquired),
+            "throttled": int(throttled),
+            "penalties": int(penalties),
+        }
@@ -4,6 +4,7 @@ import requests
 from django.conf import settings
 from requests.auth import HTTPBasicAuth
 
+from app.ext.encoders import FormEncoder
 from app.ext.sms.abc import SMSExternalService
 
 logger = logging.getLogger(__name__)
@@ -17,12 +18,14 @@ class TwilioSMSExternalService(SMSExternalService):
         self.URL = f"https://api.twilio.com/2010-04-01/Accounts/{self.SID}/Messages.json"
         self.TOKEN = settings.TWILIO_AUTH_TOKEN
         self.PHONE = settings.TWILIO_SERVICE_PHONE
+        self.encoder = FormEncoder()
 
     def send(self, *, receiver: str, body: str) -> None:
         logger.info(f"Starting new Twilio SMS request. {receiver=} {body=}")
         response = requests.post(
             url=self.URL,
-            data={"Body": body, "From": self.PHONE, "To": receiver},
+            data=self.encoder.encode({"Body": body, "From": self.PHONE, "To": receiver}),
+            headers={"Content-Type": self.encoder.content_type},
             auth=HTTPBasicAuth(self.SID, self.TOKEN),
             timeout=10,
         )
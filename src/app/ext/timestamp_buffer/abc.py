@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from app.ext.abc import InternalService
+
+
+def timestamp_buffer_internal_service_loader() -> "TimestampBufferInternalService":
+    from .backends.memory import MemoryTimestampBufferInternalService
+    from .backends.redis import RedisTimestampBufferInternalService
+
+    backends = {
+        "redis": RedisTimestampBufferInternalService,
+        "dev.memory": MemoryTimestampBufferInternalService,
+    }
+    return backends[settings.TIMESTAMP_BUFFER_BACKEND]()
+
+
+class TimestampBufferInternalService(InternalService):
+    """Buffers when something happened to each member (e.g: an user id), so it can be written
+    later, in bulk, instead of when it happens. A member keeps its first timestamp until it's
+    popped out of the buffer"""
+
+    service_loader = timestamp_buffer_internal_service_loader
+
+    def touch(self, *, buffer: str, member: int, at: datetime) -> None:
+        """Adds the `member` with the timestamp `at`, unless it's already buffered"""
+        raise NotImplementedError("Missing implementation for method 'touch'")
+
+    async def atouch(self, *, buffer: str, member: int, at: datetime) -> None:
+        await sync_to_async(self.touch)(buffer=buffer, member=member, at=at)
+
+    def pop(self, *, buffer: str, count: int) -> dict[int, datetime]:
+        """Removes up to `count` members, the ones that were touched first, with their
+        timestamps"""
+        raise NotImplementedError("Missing implementation for method 'pop'")
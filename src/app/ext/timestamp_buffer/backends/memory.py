@@ -0,0 +1,27 @@
+import threading
+from datetime import datetime
+
+from app.ext.timestamp_buffer.abc import TimestampBufferInternalService
+
+
+class MemoryTimestampBufferInternalService(TimestampBufferInternalService):
+    """Keeps the buffers in this process memory, so only this process can pop them.
+    Meant for tests, use the redis backend otherwise"""
+
+    suitable_for_production = False
+
+    def __init__(self):
+        self._buffers: dict[str, dict[int, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, *, buffer: str, member: int, at: datetime) -> None:
+        with self._lock:
+            self._buffers.setdefault(buffer, {}).setdefault(member, at)
+
+    def pop(self, *, buffer: str, count: int) -> dict[int, datetime]:
+        with self._lock:
+            members = self._buffers.get(buffer, {})
+            popped = sorted(members.items(), key=lambda item: item[1])[:count]
+            for member, _at in popped:
+                del members[member]
+        return dict(popped)
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+import redis
+from django.conf import settings
+
+from app.ext.timestamp_buffer.abc import TimestampBufferInternalService
+
+
+class RedisTimestampBufferInternalService(TimestampBufferInternalService):
+    """Each buffer is a sorted set, scored by the timestamps"""
+
+    suitable_for_production = True
+
+    def __init__(self, client: redis.Redis | None = None):
+        self.client = client or redis.Redis.from_url(settings.REDIS_URL)
+
+    def _key(self, buffer: str) -> str:
+        return f"timestamp_buffer:{buffer}"
+
+    def touch(self, *, buffer: str, member: int, at: datetime) -> None:
+        self.client.zadd(self._key(buffer), {str(member): at.timestamp()}, nx=True)
+
+    def pop(self, *, buffer: str, count: int) -> dict[int, datetime]:
+        popped = self.client.zpopmin(self._key(buffer), count)
+        return {
+            int(member): datetime.fromtimestamp(score, tz=timezone.utc) for member, score in popped
+        }
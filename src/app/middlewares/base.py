@@ -1,19 +1,55 @@
-from typing import Protocol
+from typing import Awaitable, Protocol
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
 
 
 class _GetResponse(Protocol):
-    def __call__(self, request: HttpRequest) -> HttpResponse:
+    def __call__(self, request: HttpRequest) -> HttpResponse | Awaitable[HttpResponse]:
         ...
 
 
 class BaseMiddleware:
+    """Runs on both sync (WSGI) and async (ASGI) stacks. On the async one it's called as a
+    coroutine, so Django doesn't hop to a thread to call it.
+    Subclasses override `process_request` and `process_response`, that must not do any I/O"""
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response: _GetResponse) -> None:
         self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.is_async:
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.process_response(request, self.get_response(request))  # type: ignore
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        await aresolve_user(request)
+        self.process_request(request)
+        return self.process_response(request, await self.get_response(request))  # type: ignore
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
-        return self.get_response(request)
+    def process_request(self, request: HttpRequest) -> None:
+        return None
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        return response
 
     def process_exception(self, request: HttpRequest, exception: Exception) -> HttpResponse | None:
         return None
+
+
+async def aresolve_user(request: HttpRequest) -> None:
+    """The `request.user` of the session is lazy, and it queries the database when it's first
+    used, what can't be done from a coroutine. It's resolved on a thread, only when there's a
+    session to look it up from"""
+    if not hasattr(request, "user") or hasattr(request, "_cached_user"):
+        return
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        await sync_to_async(getattr)(request.user, "is_authenticated")
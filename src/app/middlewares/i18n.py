@@ -8,28 +8,33 @@ from .base import BaseMiddleware
 class TimezoneMiddleware(BaseMiddleware):
     """Sets the timezone for the current request"""
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
-        tzname = settings.TIME_ZONE
-        if request.user.is_authenticated:
-            tzname = request.user.time_zone
-        timezone.activate(tzname)
-        response = self.get_response(request)
-        response.headers.setdefault("x-tz-name", tzname)
+    def process_request(self, request: HttpRequest) -> None:
+        request._tzname = self.get_tzname(request)  # type: ignore
+        timezone.activate(request._tzname)  # type: ignore
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        response.headers.setdefault("x-tz-name", request._tzname)  # type: ignore
         response.headers.setdefault("x-tz-utc-offset", timezone.localtime().strftime("%z"))
         return response
 
+    def get_tzname(self, request: HttpRequest) -> str:
+        if request.user.is_authenticated:
+            return request.user.time_zone
+        return settings.TIME_ZONE
+
 
-class LanguageMiddleware:
+class LanguageMiddleware(BaseMiddleware):
     """Sets the language of the translation for the current request"""
 
-    def __init__(self, get_response) -> None:
-        self.get_response = get_response
+    def process_request(self, request: HttpRequest) -> None:
+        request._language_code = self.get_language_code(request)  # type: ignore
+        translation.activate(request._language_code)  # type: ignore
 
-    def __call__(self, request: HttpRequest):
-        language_code = settings.LANGUAGE_CODE
-        if request.user.is_authenticated:
-            language_code = request.user.language_code
-        translation.activate(language_code)
-        response = self.get_response(request)
-        response.headers.setdefault("Content-Language", language_code)
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        response.headers.setdefault("Content-Language", request._language_code)  # type: ignore
         return response
+
+    def get_language_code(self, request: HttpRequest) -> str:
+        if request.user.is_authenticated:
+            return request.user.language_code
+        return settings.LANGUAGE_CODE
@@ -9,11 +9,10 @@ from .base import BaseMiddleware
 
 
 class LogContextMiddleware(BaseMiddleware):
-    def __call__(self, request: HttpRequest):
+    def process_request(self, request: HttpRequest) -> None:
         _log_events.set([])
         if request.user.is_authenticated:
             structlog.contextvars.bind_contextvars(user_id=request.user.id)
-        return self.get_response(request)
 
     def process_exception(self, request, exception):
         if settings.SEND_ERROR_REPORT_ON_FAILURES:
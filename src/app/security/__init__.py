@@ -1,6 +1,7 @@
-from . import obfuscate, verification_code
+from . import obfuscate, password_hashing, verification_code
 
 __all__ = (
     "obfuscate",
+    "password_hashing",
     "verification_code",
 )
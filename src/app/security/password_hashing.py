@@ -0,0 +1,97 @@
+"""Hashes the passwords of the logins on a pool of processes (`PASSWORD_HASHING_WORKERS`), so
+a burst of logins doesn't keep the threads of the web workers busy with the CPU-bound hashing.
+At most `PASSWORD_HASHING_MAX_CONCURRENCY` logins of each web worker hash at once, the others
+wait for up to `PASSWORD_HASHING_TIMEOUT_SECONDS` and then fail with a 503, so the logins can't
+pile up and starve the other endpoints"""
+import functools
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import connections
+from django.utils.translation import gettext_lazy as _
+
+from app.consts.http import HttpStatusCode
+from app.exceptions import ApplicationError
+from app.logging.utils import get_logger
+
+logger = get_logger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+class PasswordHashingUnavailable(ApplicationError):
+    http_status_code = HttpStatusCode.HTTP_503_SERVICE_UNAVAILABLE
+    error_message = _("There are too many logins right now, please try again in a few seconds")
+
+
+@functools.cache
+def _get_slots() -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(settings.PASSWORD_HASHING_MAX_CONCURRENCY)
+
+
+def _get_executor() -> ProcessPoolExecutor | None:
+    """The pool is started by the first login, after the web server forked its workers"""
+    global _executor
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS, initializer=django.setup
+            )
+        return _executor
+
+
+def shutdown() -> None:
+    """Stops the pool, the next login starts it again with the current settings"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = None
+    _get_slots.cache_clear()
+
+
+def _check_password(password: str, encoded: str) -> tuple[bool, bool]:
+    must_update = []
+    is_valid = hashers.check_password(password, encoded, setter=must_update.append)
+    return is_valid, bool(must_update)
+
+
+def check_password(*, password: str, encoded: str) -> tuple[bool, bool]:
+    """Same as `django.contrib.auth.hashers.check_password`. Returns if the password matches
+    the `encoded` one and if it must be hashed again, with the preferred hasher"""
+    slots = _get_slots()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING_TIMEOUT_SECONDS):
+        raise PasswordHashingUnavailable()
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return _check_password(password, encoded)
+        return executor.submit(_check_password, password, encoded).result()
+    finally:
+        slots.release()
+
+
+def make_password_in_background(*, password: str, callback: Callable[[str], None]) -> None:
+    """Hashes the `password` without waiting for it, then calls `callback` with the hash.
+    The `callback` runs on a thread of the pool, whose database connections are closed after"""
+    executor = _get_executor()
+    if executor is None:
+        callback(hashers.make_password(password))
+        return
+
+    def done(future: Future) -> None:
+        try:
+            callback(future.result())
+        except Exception:
+            logger.exception("Failed to hash the password in background")
+        finally:
+            connections.close_all()
+
+    executor.submit(hashers.make_password, password).add_done_callback(done)
@@ -200,14 +200,20 @@ if IS_TESTING:
         }
     }
 
+from .external_services.encoders import *
 from .external_services.geolocation import *
 from .external_services.messaging import *
 from .external_services.push_notification import *
+from .external_services.rate_limit import *
 from .external_services.sms import *
+from .external_services.timestamp_buffer import *
 from .external_services.zipcode import *
+from .infra.cache import *
 from .infra.log import *
+from .infra.password_hashing import *
 from .infra.reporting import *
 from .third_party.celery import *
+from .third_party.channels import *
 from .third_party.dj_cors_headers import *
 from .third_party.drf import *
 from .third_party.drf_simple_jwt import *
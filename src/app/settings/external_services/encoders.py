@@ -0,0 +1,5 @@
+from app.settings.env import env
+
+# How the JSON bodies sent to the external services are encoded: "orjson", "stdlib", or
+# "auto" that uses orjson when it's installed
+EXTERNAL_SERVICES_JSON_ENCODER = env("EXTERNAL_SERVICES_JSON_ENCODER", default="auto")
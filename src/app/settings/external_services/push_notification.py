@@ -4,3 +4,97 @@ PUSH_NOTIFICATION_EXTERNAL_SERVICE_BACKEND = env(
     "PUSH_NOTIFICATION_EXTERNAL_SERVICE_BACKEND",
     default="dev.static",
 )
+# How many notifications are written per INSERT when fanning-out a notification to many users
+PUSH_NOTIFICATION_BULK_CREATE_BATCH_SIZE = env.int(
+    "PUSH_NOTIFICATION_BULK_CREATE_BATCH_SIZE", default=1000
+)
+# How many notifications each `push_notification_send` task receives
+PUSH_NOTIFICATION_SEND_TASK_CHUNK_SIZE = env.int(
+    "PUSH_NOTIFICATION_SEND_TASK_CHUNK_SIZE", default=1000
+)
+# How many chunks of pushes are sent at the same time to Expo, 1 sends them sequentially
+PUSH_NOTIFICATION_EXPO_MAX_CONCURRENT_REQUESTS = env.int(
+    "PUSH_NOTIFICATION_EXPO_MAX_CONCURRENT_REQUESTS", default=4
+)
+# How many sent notifications have their receipts fetched and persisted at a time
+PUSH_NOTIFICATION_CONFIRM_DELIVERY_PAGE_SIZE = env.int(
+    "PUSH_NOTIFICATION_CONFIRM_DELIVERY_PAGE_SIZE", default=1000
+)
+# For how many seconds the unread notifications count of an user is cached, 0 disables it
+PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT = env.int(
+    "PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT", default=300
+)
+# How many notifications are read by each UPDATE when an user reads many of them at once
+PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE = env.int(
+    "PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE", default=1000
+)
+# How many pushes per second are sent to Expo across all workers, and how many can be
+# sent at once after being idle. Expo accepts up to 600 notifications per second per project
+PUSH_NOTIFICATION_EXPO_RATE_LIMIT = env.float("PUSH_NOTIFICATION_EXPO_RATE_LIMIT", default=600)
+PUSH_NOTIFICATION_EXPO_RATE_LIMIT_BURST = env.int(
+    "PUSH_NOTIFICATION_EXPO_RATE_LIMIT_BURST", default=600
+)
+# Notifications that failed because we were sending too fast are retried after
+# base * 2 ^ (attempts - 1) seconds, capped at the max, with a random jitter of up to half of it
+PUSH_NOTIFICATION_RETRY_BASE_DELAY_SECONDS = env.int(
+    "PUSH_NOTIFICATION_RETRY_BASE_DELAY_SECONDS", default=5
+)
+PUSH_NOTIFICATION_RETRY_MAX_DELAY_SECONDS = env.int(
+    "PUSH_NOTIFICATION_RETRY_MAX_DELAY_SECONDS", default=300
+)
+# Scheduled notifications are grouped in buckets of this many seconds, and each bucket is
+# flushed at once by the periodic `push_notification_flush_scheduled` task
+PUSH_NOTIFICATION_SCHEDULE_BUCKET_SECONDS = env.int(
+    "PUSH_NOTIFICATION_SCHEDULE_BUCKET_SECONDS", default=10
+)
+# How many scheduled notifications each `push_notification_send` task receives when flushed
+PUSH_NOTIFICATION_FLUSH_BATCH_SIZE = env.int("PUSH_NOTIFICATION_FLUSH_BATCH_SIZE", default=100)
+# How many scheduled notifications are flushed at most on each run
+PUSH_NOTIFICATION_FLUSH_MAX_SIZE = env.int("PUSH_NOTIFICATION_FLUSH_MAX_SIZE", default=10000)
+# For how many seconds a pending notification is replaced by a newer one with the same
+# collapse key, instead of creating another one. 0 disables collapsing
+PUSH_NOTIFICATION_COLLAPSE_WINDOW_SECONDS = env.int(
+    "PUSH_NOTIFICATION_COLLAPSE_WINDOW_SECONDS", default=60
+)
+# How many users are handled at a time by a broadcast
+PUSH_NOTIFICATION_BROADCAST_BATCH_SIZE = env.int(
+    "PUSH_NOTIFICATION_BROADCAST_BATCH_SIZE", default=1000
+)
+# How many notifications of a broadcast can wait to be sent, before it stops creating more,
+# and how often it checks if the send tasks have caught up
+PUSH_NOTIFICATION_BROADCAST_MAX_IN_FLIGHT = env.int(
+    "PUSH_NOTIFICATION_BROADCAST_MAX_IN_FLIGHT", default=10000
+)
+PUSH_NOTIFICATION_BROADCAST_POLL_SECONDS = env.float(
+    "PUSH_NOTIFICATION_BROADCAST_POLL_SECONDS", default=1
+)
+# How long a broadcast waits for the send tasks to catch up before it stops, it's resumed
+# by running it again
+PUSH_NOTIFICATION_BROADCAST_MAX_WAIT_SECONDS = env.float(
+    "PUSH_NOTIFICATION_BROADCAST_MAX_WAIT_SECONDS", default=60 * 10
+)
+# Notifications older than this many days are deleted by the daily retention task
+PUSH_NOTIFICATION_RETENTION_DAYS = env.int("PUSH_NOTIFICATION_RETENTION_DAYS", default=180)
+# How many old notifications are deleted at a time, and for how long the retention task
+# pauses between each batch, so the deletes don't pile up dead rows faster than vacuum
+PUSH_NOTIFICATION_RETENTION_BATCH_SIZE = env.int(
+    "PUSH_NOTIFICATION_RETENTION_BATCH_SIZE", default=1000
+)
+PUSH_NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS = env.float(
+    "PUSH_NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS", default=0.5
+)
+# Devices that didn't register their token in this many days are removed by the daily
+# retention task, apps register it again whenever they're opened
+PUSH_NOTIFICATION_DEVICE_STALE_DAYS = env.int("PUSH_NOTIFICATION_DEVICE_STALE_DAYS", default=270)
+# When the notifications table is partitioned (Postgres only), how many monthly partitions
+# are created ahead of time, and if the partitions past the retention are only detached,
+# to be archived, instead of dropped
+PUSH_NOTIFICATION_PARTITIONS_MONTHS_AHEAD = env.int(
+    "PUSH_NOTIFICATION_PARTITIONS_MONTHS_AHEAD", default=3
+)
+PUSH_NOTIFICATION_RETENTION_KEEP_DETACHED_PARTITIONS = env.bool(
+    "PUSH_NOTIFICATION_RETENTION_KEEP_DETACHED_PARTITIONS", default=False
+)
+# Whether new notifications and unread counts are sent to the websockets of their users,
+# through the channel layer, as soon as they're committed
+PUSH_NOTIFICATION_REALTIME_ENABLED = env.bool("PUSH_NOTIFICATION_REALTIME_ENABLED", default=True)
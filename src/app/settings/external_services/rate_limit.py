@@ -0,0 +1,6 @@
+from app.settings.env import env
+
+# Must be "redis", so the rate limits are shared by all the workers
+RATE_LIMITER_BACKEND = env("RATE_LIMITER_BACKEND", default="redis")
+if env.bool("IS_TESTING", default=False):
+    RATE_LIMITER_BACKEND = "dev.memory"
@@ -0,0 +1,10 @@
+from app.settings.env import env
+
+# Where the timestamps that are written later in bulk, like the `last_login` of the users, are
+# buffered. Must be "redis", so the workers that flush them see the ones of the web servers
+TIMESTAMP_BUFFER_BACKEND = env("TIMESTAMP_BUFFER_BACKEND", default="redis")
+if env.bool("IS_TESTING", default=False):
+    TIMESTAMP_BUFFER_BACKEND = "dev.memory"
+# How often the buffered `last_login` of the users are written, and how many at a time
+USER_LAST_LOGIN_FLUSH_SECONDS = env.int("USER_LAST_LOGIN_FLUSH_SECONDS", default=60)
+USER_LAST_LOGIN_FLUSH_BATCH_SIZE = env.int("USER_LAST_LOGIN_FLUSH_BATCH_SIZE", default=1000)
@@ -0,0 +1,20 @@
+from app.settings.env import env
+from app.settings.third_party.redis import REDIS_URL
+
+CACHE_BACKEND = env("CACHE_BACKEND", default="django.core.cache.backends.redis.RedisCache")
+if env.bool("IS_TESTING", default=False):
+    CACHE_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": REDIS_URL,
+    }
+}
+
+# For how many seconds the API tokens and their users are cached, so authenticating doesn't
+# query the database, 0 disables it. Each process also keeps up to LOCAL_MAX_SIZE of them
+# in memory for LOCAL_TIMEOUT seconds, a revoked token may be accepted for that long
+AUTH_TOKEN_CACHE_TIMEOUT = env.int("AUTH_TOKEN_CACHE_TIMEOUT", default=300)
+AUTH_TOKEN_CACHE_LOCAL_TIMEOUT = env.int("AUTH_TOKEN_CACHE_LOCAL_TIMEOUT", default=10)
+AUTH_TOKEN_CACHE_LOCAL_MAX_SIZE = env.int("AUTH_TOKEN_CACHE_LOCAL_MAX_SIZE", default=1000)
@@ -0,0 +1,23 @@
+from app.settings.env import env
+
+# The first hasher hashes the new passwords, the passwords hashed by the others are hashed
+# again when their users log in. e.g: put Argon2 first, after installing the `argon2` extra
+PASSWORD_HASHERS = env.list(
+    "PASSWORD_HASHERS",
+    default=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.Argon2PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    ],
+)
+# How many processes of each web worker hash the passwords of the logins, 0 hashes them on
+# the thread of the request instead
+PASSWORD_HASHING_WORKERS = env.int("PASSWORD_HASHING_WORKERS", default=2)
+if env.bool("IS_TESTING", default=False):
+    PASSWORD_HASHING_WORKERS = 0
+# How many logins of each web worker may be hashing at once, and for how many seconds the
+# others wait for their turn before failing with a 503
+PASSWORD_HASHING_MAX_CONCURRENCY = env.int("PASSWORD_HASHING_MAX_CONCURRENCY", default=4)
+PASSWORD_HASHING_TIMEOUT_SECONDS = env.float("PASSWORD_HASHING_TIMEOUT_SECONDS", default=2)
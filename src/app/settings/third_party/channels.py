@@ -0,0 +1,18 @@
+from app.settings.env import env
+from app.settings.third_party.redis import REDIS_URL
+
+CHANNEL_LAYER_BACKEND = env(
+    "CHANNEL_LAYER_BACKEND", default="channels_redis.core.RedisChannelLayer"
+)
+if env.bool("IS_TESTING", default=False):
+    CHANNEL_LAYER_BACKEND = "channels.layers.InMemoryChannelLayer"
+
+# The websocket consumers of all the ASGI workers are reached through the channel layer
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": CHANNEL_LAYER_BACKEND,
+        "CONFIG": (
+            {"hosts": [REDIS_URL]} if CHANNEL_LAYER_BACKEND.startswith("channels_redis") else {}
+        ),
+    }
+}
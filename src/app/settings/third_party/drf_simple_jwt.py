@@ -6,6 +6,10 @@ env = Env()
 
 ACCESS_TOKEN_LIFETIME_MINUTES = env.int("ACCESS_TOKEN_LIFETIME_MINUTES", default=15)
 REFRESH_TOKEN_LIFETIME_DAYS = env.int("REFRESH_TOKEN_LIFETIME_DAYS", default=7)
+# Whether the access tokens carry the preferences of the user, so the requests authenticated
+# with them don't query the user. Changes to the user, including its deactivation, are only
+# seen when the access token is refreshed
+JWT_STATELESS_USER = env.bool("JWT_STATELESS_USER", default=False)
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=ACCESS_TOKEN_LIFETIME_MINUTES),
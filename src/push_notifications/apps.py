@@ -7,3 +7,6 @@ class PushNotificationsConfig(AppConfig):
     name = "push_notifications"
     verbose_name = _("Push Notification")
     verbose_name_plural = _("Push Notifications")
+
+    def ready(self):
+        from push_notifications import signals  # noqa: F401
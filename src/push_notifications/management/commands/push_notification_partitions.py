@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from push_notifications import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the monthly partitions of the push notifications table ahead of time. "
+        "With --convert, converts the table into a partitioned one first. Postgres only"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Converts the table into a partitioned one, locking it while it's scanned",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=settings.PUSH_NOTIFICATION_PARTITIONS_MONTHS_AHEAD,
+            help="How many months after the current one must have a partition",
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported():
+            raise CommandError("Partitioning is only supported on Postgres")
+
+        now = timezone.now()
+        is_partitioned = partitions.is_partitioned()
+        if options["convert"]:
+            if is_partitioned:
+                raise CommandError(f"{partitions.TABLE} is already partitioned")
+            created = partitions.convert(now=now, months_ahead=options["months_ahead"])
+        elif not is_partitioned:
+            raise CommandError(f"{partitions.TABLE} is not partitioned, use --convert")
+        else:
+            created = partitions.create_partitions(now=now, months_ahead=options["months_ahead"])
+
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions created"))
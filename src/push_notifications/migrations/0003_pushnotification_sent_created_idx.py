@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("push_notifications", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pushnotification",
+            index=models.Index(
+                condition=models.Q(("push_ticket_id__isnull", False), ("status", "s")),
+                fields=["created_at", "id"],
+                name="push_notif_sent_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-18 18:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("push_notifications", "0003_pushnotification_sent_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PushNotificationUnreadCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="How many notifications the user hasn't read yet",
+                        verbose_name="count",
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="push_notification_unread_counter",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "push notification unread counter",
+                "verbose_name_plural": "push notification unread counters",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("push_notifications", "0004_pushnotificationunreadcounter"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pushnotification",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="push_notif_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("push_notifications", "0005_pushnotification_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pushnotification",
+            name="scheduled_for",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When this notification should be sent, it's sent as soon as possible if empty",
+                null=True,
+                verbose_name="scheduled for",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pushnotification",
+            index=models.Index(
+                condition=models.Q(("scheduled_for__isnull", False)),
+                fields=["scheduled_for"],
+                name="push_notif_scheduled_for_idx",
+            ),
+        ),
+    ]
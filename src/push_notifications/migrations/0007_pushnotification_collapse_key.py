@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("push_notifications", "0006_pushnotification_scheduled_for"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pushnotification",
+            name="collapse_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Notifications with the same collapse key replace each other while they're pending",
+                max_length=128,
+                null=True,
+                verbose_name="collapse key",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pushnotification",
+            index=models.Index(
+                condition=models.Q(("collapse_key__isnull", False)),
+                fields=["user", "collapse_key", "-created_at"],
+                name="push_notif_collapse_key_idx",
+            ),
+        ),
+    ]
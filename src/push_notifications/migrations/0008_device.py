@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-18 18:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("push_notifications", "0007_pushnotification_collapse_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Device",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="created at")),
+                ("last_updated_at", models.DateTimeField(auto_now=True, verbose_name="updated at")),
+                (
+                    "token",
+                    models.CharField(
+                        help_text="The token used to send push notifications to this device",
+                        max_length=128,
+                        unique=True,
+                        verbose_name="notification token",
+                    ),
+                ),
+                (
+                    "last_seen_at",
+                    models.DateTimeField(
+                        help_text="The last time that the device registered its token",
+                        verbose_name="last seen at",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="devices",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "device",
+                "verbose_name_plural": "devices",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="device",
+            index=models.Index(fields=["last_seen_at"], name="push_device_last_seen_idx"),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def copy_user_tokens_to_devices(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    Device = apps.get_model("push_notifications", "Device")
+
+    now = timezone.now()
+    users = (
+        User.objects.filter(notification_token__isnull=False)
+        .exclude(notification_token="")
+        .order_by("id")
+        .values_list("id", "notification_token")
+    )
+    batch = []
+    for user_id, token in users.iterator(chunk_size=BATCH_SIZE):
+        batch.append(Device(user_id=user_id, token=token, last_seen_at=now))
+        if len(batch) == BATCH_SIZE:
+            # The same token may be on many users, only the first one keeps it
+            Device.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    Device.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("push_notifications", "0008_device"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_user_tokens_to_devices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("push_notifications", "0009_copy_user_tokens_to_devices"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pushnotification",
+            index=models.Index(
+                condition=models.Q(("read_at__isnull", True)),
+                fields=["user", "id"],
+                name="push_notif_user_unread_idx",
+            ),
+        ),
+    ]
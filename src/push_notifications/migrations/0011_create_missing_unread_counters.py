@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import Count
+
+BATCH_SIZE = 1000
+
+
+def create_missing_unread_counters(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    PushNotification = apps.get_model("push_notifications", "PushNotification")
+    PushNotificationUnreadCounter = apps.get_model(
+        "push_notifications", "PushNotificationUnreadCounter"
+    )
+
+    user_ids = (
+        User.objects.filter(push_notification_unread_counter__isnull=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    batch = []
+    for user_id in user_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.append(user_id)
+        if len(batch) == BATCH_SIZE:
+            _create_unread_counters(PushNotification, PushNotificationUnreadCounter, batch)
+            batch = []
+    _create_unread_counters(PushNotification, PushNotificationUnreadCounter, batch)
+
+
+def _create_unread_counters(PushNotification, PushNotificationUnreadCounter, user_ids):
+    counts = dict(
+        PushNotification.objects.filter(user_id__in=user_ids, read_at__isnull=True)
+        .values("user_id")
+        .annotate(count=Count("id"))
+        .values_list("user_id", "count")
+    )
+    PushNotificationUnreadCounter.objects.bulk_create(
+        [
+            PushNotificationUnreadCounter(user_id=user_id, count=counts.get(user_id, 0))
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("push_notifications", "0010_pushnotification_user_unread_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_unread_counters, migrations.RunPython.noop),
+    ]
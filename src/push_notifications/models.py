@@ -1,11 +1,46 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.timesince import timesince
 from django.utils.translation import gettext_lazy as _
 
 from app import consts
-from app.models import AutoTimeStampModel
+from app.models import AutoTimeStampModel, BaseModel
+
+
+class TimeSince:
+    """Renders `timesince` for many datetimes against the same `now`, as when serializing a
+    page of notifications. Below 28 days no calendar month fits between the datetime and `now`,
+    and since only two adjacent units are shown (e.g. "2 weeks, 3 days" or "4 hours, 2 minutes")
+    the output depends only on the whole days, hours or minutes elapsed. So each distinct
+    value is rendered once and reused"""
+
+    _CALENDAR_AWARE_AFTER = timedelta(days=28)
+
+    def __init__(self, now: datetime | None = None):
+        self.now = now or timezone.now()
+        self._rendered: dict[tuple[str, int], str] = {}
+
+    def __call__(self, d: datetime) -> str:
+        delta = self.now - d
+        if delta >= self._CALENDAR_AWARE_AFTER or d.utcoffset() != self.now.utcoffset():
+            return timesince(d, now=self.now)
+        minutes = (delta.days * 24 * 60 * 60 + delta.seconds) // 60
+        if minutes >= 7 * 24 * 60:
+            key = ("days", minutes // (24 * 60))
+        elif minutes >= 24 * 60:
+            key = ("hours", minutes // 60)
+        else:
+            key = ("minutes", minutes)
+        rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self._rendered[key] = timesince(d, now=self.now)
+        return rendered
 
 
 class PushNotification(AutoTimeStampModel):
@@ -95,6 +130,23 @@ class PushNotification(AutoTimeStampModel):
         null=True,
         blank=True,
     )
+    scheduled_for = models.DateTimeField(
+        verbose_name=_("scheduled for"),
+        help_text=_(
+            "When this notification should be sent, it's sent as soon as possible if empty"
+        ),
+        null=True,
+        blank=True,
+    )
+    collapse_key = models.CharField(
+        verbose_name=_("collapse key"),
+        help_text=_(
+            "Notifications with the same collapse key replace each other while they're pending"
+        ),
+        null=True,
+        blank=True,
+        max_length=128,
+    )
     delivery_confirmation_received_at = models.DateTimeField(
         verbose_name=_("delivery confirmation received at"),
         help_text=_(
@@ -107,17 +159,122 @@ class PushNotification(AutoTimeStampModel):
     class Meta:
         verbose_name = _("push notification")
         verbose_name_plural = _("push notifications")
+        indexes = [
+            # Backs the periodic delivery confirmation scan, that only looks for
+            # recently sent notifications that have a ticket to be checked
+            models.Index(
+                fields=["created_at", "id"],
+                name="push_notif_sent_created_idx",
+                condition=models.Q(
+                    status=consts.push_notification.Status.SENT, push_ticket_id__isnull=False
+                ),
+            ),
+            # Backs the periodic flush of scheduled notifications, that are just a few
+            models.Index(
+                fields=["scheduled_for"],
+                name="push_notif_scheduled_for_idx",
+                condition=models.Q(scheduled_for__isnull=False),
+            ),
+            # Backs the lookup of the pending notification that a new one collapses into
+            models.Index(
+                fields=["user", "collapse_key", "-created_at"],
+                name="push_notif_collapse_key_idx",
+                condition=models.Q(collapse_key__isnull=False),
+            ),
+            # Backs the notifications list, paginated by (created_at, id)
+            models.Index(fields=["user", "-created_at", "-id"], name="push_notif_user_created_idx"),
+            # Backs reading many notifications at once and counting the unread ones
+            models.Index(
+                fields=["user", "id"],
+                name="push_notif_user_unread_idx",
+                condition=models.Q(read_at__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def enriched_data(self):
+    @cached_property
+    def _immutable_enriched_data(self) -> dict[str, Any]:
+        # These don't change after the notification is created, so they're rendered only once
         return {
             "id": self.id,
             "createdAt": self.created_at.isoformat(),
-            "readAt": self.read_at.isoformat() if self.read_at else None,
-            "timeSinceCreated": timesince(self.created_at),
             "kind": self.kind,
+            "collapseKey": self.collapse_key,
             "meta": self.data,
         }
+
+    def get_enriched_data(
+        self, *, time_since: Callable[[datetime], str] = timesince
+    ) -> dict[str, Any]:
+        """The data that is sent along with the notification. Pass a `TimeSince` as
+        `time_since` when rendering many notifications at once"""
+        return {
+            **self._immutable_enriched_data,
+            "readAt": self.read_at.isoformat() if self.read_at else None,
+            "timeSinceCreated": time_since(self.created_at),
+        }
+
+    @property
+    def enriched_data(self) -> dict[str, Any]:
+        return self.get_enriched_data()
+
+
+class PushNotificationUnreadCounter(BaseModel):
+    """Denormalized count of the unread notifications of an user, so clients can check
+    if there's something unread without counting the whole notifications history.
+    It's created with the user and kept up to date by the services, never write to it
+    directly"""
+
+    user = models.OneToOneField(
+        to="users.User",
+        on_delete=models.CASCADE,
+        verbose_name=_("user"),
+        related_name="push_notification_unread_counter",
+    )
+    count = models.PositiveIntegerField(
+        verbose_name=_("count"),
+        help_text=_("How many notifications the user hasn't read yet"),
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = _("push notification unread counter")
+        verbose_name_plural = _("push notification unread counters")
+
+    def __str__(self):
+        return str(self.count)
+
+
+class Device(AutoTimeStampModel):
+    """A device that receives the push notifications of an user. An user may have many of
+    them, and `User.notification_token` mirrors the token of the last seen one"""
+
+    user = models.ForeignKey(
+        to="users.User",
+        on_delete=models.CASCADE,
+        verbose_name=_("user"),
+        related_name="devices",
+    )
+    token = models.CharField(
+        verbose_name=_("notification token"),
+        help_text=_("The token used to send push notifications to this device"),
+        max_length=128,
+        unique=True,
+    )
+    last_seen_at = models.DateTimeField(
+        verbose_name=_("last seen at"),
+        help_text=_("The last time that the device registered its token"),
+    )
+
+    class Meta:
+        verbose_name = _("device")
+        verbose_name_plural = _("devices")
+        indexes = [
+            # Backs the pruning of the devices that weren't seen for a while
+            models.Index(fields=["last_seen_at"], name="push_device_last_seen_idx"),
+        ]
+
+    def __str__(self):
+        return self.token
@@ -0,0 +1,189 @@
+"""Monthly range partitioning of the notifications table on `created_at`, only on Postgres.
+The table is converted once with `manage.py push_notification_partitions --convert`, the
+existing rows are kept as they're on a `_legacy` partition that holds everything older than
+the first monthly partition. The following partitions are created ahead of time, by the same
+command or by the retention task, and the old ones are detached by the retention task"""
+import re
+from datetime import date, datetime, timezone
+
+from django.db import connection, transaction
+
+from app.logging.utils import get_logger
+
+from . import models
+
+TABLE = models.PushNotification._meta.db_table
+LEGACY_PARTITION = f"{TABLE}_legacy"
+
+logger = get_logger(__name__)
+
+_UPPER_BOUND_RE = re.compile(r"TO \('(?P<bound>[^']+)'\)")
+
+
+def is_supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned() -> bool:
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s)",
+            [TABLE],
+        )
+        return cursor.fetchone()[0]
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_start(dt: datetime) -> date:
+    return dt.astimezone(timezone.utc).date().replace(day=1)
+
+
+def _as_bound(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def get_partitions() -> list[tuple[str, datetime]]:
+    """The partitions of the table with their (exclusive) upper bound, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _UPPER_BOUND_RE.search(bound)
+        if match is None:
+            raise ValueError(f"Unexpected bound for partition {name}: {bound}")
+        partitions.append((name, datetime.fromisoformat(match["bound"])))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(*, now: datetime, months_ahead: int) -> list[str]:
+    """Creates the monthly partitions that are missing up to `months_ahead` months after
+    the month of `now`. Returns the names of the partitions that were created"""
+    partitions = get_partitions()
+    if not partitions:
+        raise ValueError(f"{TABLE} has no partitions, convert it first")
+    month = _month_start(partitions[-1][1])
+    last_month = _add_months(_month_start(now), months_ahead)
+
+    created = []
+    with connection.cursor() as cursor:
+        while month <= last_month:
+            name = partition_name(month)
+            next_month = _add_months(month, 1)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [_as_bound(month), _as_bound(next_month)],
+            )
+            created.append(name)
+            month = next_month
+    if created:
+        logger.info(f"Created the partitions {created}")
+    return created
+
+
+def detach_partition(*, name: str) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+
+
+def drop_partition(*, name: str) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {name}")
+
+
+def count_unread_by_user(*, name: str) -> dict[int, int]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT user_id, COUNT(*) FROM {name} WHERE read_at IS NULL GROUP BY user_id"
+        )
+        return dict(cursor.fetchall())
+
+
+def _legacy_name(name: str) -> str:
+    # Postgres identifiers are truncated to 63 characters
+    return f"{name[:56]}_legacy"
+
+
+@transaction.atomic
+def convert(*, now: datetime, months_ahead: int) -> list[str]:
+    """Converts the regular table into a partitioned one, without copying the rows.
+    The table becomes the legacy partition of a new partitioned table with the same name,
+    that holds everything up to the start of the next month. Its indexes and foreign keys
+    are attached to the matching ones of the new table, so they're not rebuilt, but it's
+    still scanned to validate its bounds while the table is locked.
+    The new table has no primary key, since it would have to include `created_at`; the ids
+    keep coming from an identity column that starts after the last legacy id"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0), MAX(created_at) FROM {TABLE}")
+        max_id, max_created_at = cursor.fetchone()
+        boundary = _add_months(_month_start(max(now, max_created_at or now)), 1)
+
+        cursor.execute(
+            "SELECT i.relname, pg_get_indexdef(i.oid), ix.indisprimary, ix.indisunique "
+            "FROM pg_index ix JOIN pg_class i ON i.oid = ix.indexrelid "
+            "WHERE ix.indrelid = %s::regclass",
+            [TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+
+        for index_name, _definition, _is_primary, _is_unique in indexes:
+            cursor.execute(f"ALTER INDEX {index_name} RENAME TO {_legacy_name(index_name)}")
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_PARTITION}")
+        cursor.execute(f"ALTER TABLE {LEGACY_PARTITION} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {LEGACY_PARTITION} INCLUDING DEFAULTS "
+            "INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY "
+            f"(START WITH {max_id + 1})"
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY_PARTITION} "
+            "FOR VALUES FROM (MINVALUE) TO (%s)",
+            [_as_bound(boundary)],
+        )
+
+        for index_name, definition, is_primary, is_unique in indexes:
+            if is_primary or is_unique:
+                # Unique indexes must include the partition key, the legacy ones are kept
+                # on the legacy partition only
+                continue
+            cursor.execute(
+                definition.replace(f"INDEX {index_name} ON ", f"INDEX {index_name} ON ONLY ", 1)
+            )
+            cursor.execute(f"ALTER INDEX {index_name} ATTACH PARTITION {_legacy_name(index_name)}")
+        # The primary key of the legacy partition isn't inherited, the new partitions
+        # get a plain index to look notifications up by id
+        cursor.execute(f"CREATE INDEX push_notif_id_idx ON ONLY {TABLE} (id)")
+        for constraint_name, definition in foreign_keys:
+            # The matching foreign key of the legacy partition is attached, not validated again
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {constraint_name} {definition}")
+
+    logger.info(f"Converted {TABLE} into a partitioned table, starting at {boundary}")
+    return [LEGACY_PARTITION, *create_partitions(now=now, months_ahead=months_ahead)]
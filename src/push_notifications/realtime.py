@@ -0,0 +1,63 @@
+"""Sends notifications and unread counts to the websockets of their users, as soon as they
+happen, so the apps don't need to poll the notifications list.
+Each user has its own group on the channel layer, that the websocket consumers join. Sending
+is best-effort: the notifications are already saved, and the apps still fetch the list when
+they (re)connect"""
+from typing import Any
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from app.logging.utils import get_logger
+
+from . import models
+
+logger = get_logger(__name__)
+
+NOTIFICATION_EVENT = "push_notification.created"
+UNREAD_COUNT_EVENT = "push_notification.unread_count"
+
+
+def is_enabled() -> bool:
+    return settings.PUSH_NOTIFICATION_REALTIME_ENABLED
+
+
+def group_name(user_id: int) -> str:
+    return f"push_notifications.user.{user_id}"
+
+
+def notification_event(notification: models.PushNotification) -> dict[str, Any]:
+    """The event carries the fields of the notification, it's rendered by the consumer"""
+    return {
+        "type": NOTIFICATION_EVENT,
+        "notification": {
+            "id": notification.pk,
+            "kind": notification.kind,
+            "title": notification.title,
+            "description": notification.description,
+            "data": notification.data,
+            "status": notification.status,
+            "collapse_key": notification.collapse_key,
+            "created_at": notification.created_at.isoformat(),
+            "read_at": notification.read_at.isoformat() if notification.read_at else None,
+        },
+    }
+
+
+def unread_count_event(count: int) -> dict[str, Any]:
+    return {"type": UNREAD_COUNT_EVENT, "count": count}
+
+
+def send(*, user_id: int, event: dict[str, Any]) -> None:
+    try:
+        async_to_sync(get_channel_layer().group_send)(group_name(user_id), event)
+    except Exception:
+        logger.exception(f"Failed to send the {event['type']} event to the user {user_id}")
+
+
+async def asend(*, user_id: int, event: dict[str, Any]) -> None:
+    try:
+        await get_channel_layer().group_send(group_name(user_id), event)
+    except Exception:
+        logger.exception(f"Failed to send the {event['type']} event to the user {user_id}")
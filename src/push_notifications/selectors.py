@@ -1,6 +1,10 @@
+from datetime import datetime
+from typing import Sequence
+
 import django_filters
-from django.db.models import QuerySet
+from django.db.models import Prefetch, QuerySet
 
+from app import consts
 from push_notifications import models
 from users.models import User
 
@@ -19,3 +23,97 @@ def push_notification_get_viewable_qs(
         queryset=models.PushNotification.objects.filter(user=user).order_by("-created_at"),
     )
     return filter_set.qs
+
+
+def push_notification_get_unread_qs(
+    *, user: User, ids: Sequence[int] | None = None
+) -> QuerySet[models.PushNotification]:
+    """The unread notifications of the user, optionally only the ones of `ids`.
+    Unlike `push_notification_get_viewable_qs`, it has no filters nor ordering, so it's cheap
+    to build and to update in bulk"""
+    qs = models.PushNotification.objects.filter(user=user, read_at__isnull=True)
+    if ids:
+        qs = qs.filter(pk__in=ids)
+    return qs
+
+
+def push_notification_get_pending_delivery_confirmation_qs(
+    *, since: datetime
+) -> QuerySet[models.PushNotification]:
+    """Sent notifications created at or after `since` that still wait for a receipt.
+    Filters with a plain range on `created_at`, so the partial index can be used"""
+    return models.PushNotification.objects.filter(
+        status=consts.push_notification.Status.SENT,
+        push_ticket_id__isnull=False,
+        created_at__gte=since,
+    )
+
+
+def push_notification_count_unread(*, user: User) -> int:
+    """Counts the unread notifications of the user straight from the notifications table.
+    Prefer `services.push_notification_get_unread_count` that uses the denormalized counter"""
+    return models.PushNotification.objects.filter(user=user, read_at__isnull=True).count()
+
+
+def push_notification_get_scheduled_qs(*, until: datetime) -> QuerySet[models.PushNotification]:
+    """Notifications waiting to be sent that are scheduled up to `until`"""
+    return models.PushNotification.objects.filter(
+        scheduled_for__lte=until,
+        status__in=[
+            consts.push_notification.Status.CREATED,
+            consts.push_notification.Status.ENQUEUED,
+        ],
+    )
+
+
+def push_notification_get_collapsible_qs(
+    *, user_ids: Sequence[int], collapse_key: str, since: datetime
+) -> QuerySet[models.PushNotification]:
+    """The unread notifications with the `collapse_key` that are still waiting to be sent,
+    created at or after `since`, from the oldest to the newest"""
+    return models.PushNotification.objects.filter(
+        user_id__in=user_ids,
+        collapse_key=collapse_key,
+        created_at__gte=since,
+        read_at__isnull=True,
+        status__in=[
+            consts.push_notification.Status.CREATED,
+            consts.push_notification.Status.ENQUEUED,
+        ],
+    ).order_by("created_at", "id")
+
+
+# The fields needed to send a notification and to handle its ticket afterwards
+_SEND_FIELDS = (
+    "id",
+    "status",
+    "kind",
+    "title",
+    "description",
+    "data",
+    "created_at",
+    "read_at",
+    "delivery_attempts",
+    "scheduled_for",
+    "collapse_key",
+    "user__notification_token",
+)
+
+
+def push_notification_get_sendable_qs(*, ids: Sequence[int]) -> QuerySet[models.PushNotification]:
+    """Notifications of `ids` that can be sent, together with their user and its devices,
+    loading only the fields that are needed to send them"""
+    return (
+        models.PushNotification.objects.filter(
+            id__in=ids,
+            status__in=[
+                consts.push_notification.Status.CREATED,
+                consts.push_notification.Status.ENQUEUED,
+            ],
+        )
+        .select_related("user")
+        .only(*_SEND_FIELDS)
+        .prefetch_related(
+            Prefetch("user__devices", queryset=models.Device.objects.only("user", "token"))
+        )
+    )
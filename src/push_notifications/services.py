@@ -1,7 +1,21 @@
-from datetime import datetime, timedelta
-from typing import Any, Sequence
+import collections
+import contextlib
+import itertools
+import math
+import random
+import uuid
+from datetime import datetime, time, timedelta
+from time import monotonic, sleep
+from typing import Any, Callable, Iterable, Iterator, Literal, Sequence, TypedDict
+from zoneinfo import ZoneInfo
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
@@ -12,11 +26,58 @@ from app.ext.push_notifications.abc import (
     PushReceipt,
     PushTicket,
 )
+from app.logging.types import StructLogger
 from app.logging.utils import get_logger
 from app.models import BaseModel
+from users import selectors as user_selectors
 from users.models import User
 
-from . import exc, models, selectors
+from . import exc, models, partitions, realtime, selectors
+
+
+def _push_notification_mark_as_not_opted_in(push_notification: models.PushNotification) -> None:
+    push_notification.status = consts.push_notification.Status.FAILED
+    push_notification.failure_kind = consts.push_notification.FailureKind.NOT_OPTED_IN
+    push_notification.failure_message = "The user has not opted-in to receive notifications"
+
+
+def _push_notification_local_delivery_at(
+    *, local_time: time, time_zone: str, now: datetime
+) -> datetime:
+    """The next time that the clock shows `local_time` on `time_zone`, rounded up to the
+    schedule bucket. Users on the same time zone get the same moment, so they're flushed
+    together by `push_notification_flush_scheduled`"""
+    tz = ZoneInfo(time_zone)
+    local_now = now.astimezone(tz)
+    delivery_at = datetime.combine(local_now.date(), local_time, tzinfo=tz)
+    if delivery_at <= local_now:
+        delivery_at = datetime.combine(local_now.date() + timedelta(days=1), local_time, tzinfo=tz)
+    return _push_notification_schedule_bucket(delivery_at)
+
+
+def _push_notification_collapse_key(
+    *, kind: str, source_content_type_id: int | None, source_object_id: int | None
+) -> str | None:
+    """The collapse key of the notifications of `kind` about the same source object"""
+    if source_content_type_id is None or source_object_id is None:
+        return None
+    return f"{kind}:{source_content_type_id}:{source_object_id}"
+
+
+# The fields that a newer notification replaces on the pending one it collapses into
+_COLLAPSE_FIELDS = ["kind", "title", "description", "data", "last_updated_at"]
+
+
+def _push_notification_collapse_into(
+    *, pending: models.PushNotification, newer: models.PushNotification, now: datetime
+) -> None:
+    """Replaces the content of the `pending` notification with the `newer` one.
+    The `pending` notification keeps its place on the queue, only what is sent changes"""
+    pending.kind = newer.kind
+    pending.title = newer.title
+    pending.description = newer.description
+    pending.data = newer.data
+    pending.last_updated_at = now
 
 
 def push_notification_create(
@@ -27,7 +88,15 @@ def push_notification_create(
     description: str,
     data: dict[str, Any] | None = None,
     source_object: BaseModel | None = None,
+    local_delivery_time: time | None = None,
+    collapse_key: str | None = None,
 ) -> models.PushNotification:
+    """Creates a notification for the `user`. When `local_delivery_time` is given, the
+    notification is scheduled to the next time it's that time on the user time zone,
+    and is sent by `push_notification_flush_scheduled` instead of right away.
+    Notifications about the same `source_object` (or with the same `collapse_key`) replace
+    the pending one of the user, that was created in the last
+    PUSH_NOTIFICATION_COLLAPSE_WINDOW_SECONDS, and that one is returned instead"""
     data = data or {}
 
     push_notification = models.PushNotification(
@@ -40,14 +109,412 @@ def push_notification_create(
         source_object=source_object,
     )
     if user.notification_token is None:
-        push_notification.status = consts.push_notification.Status.FAILED
-        push_notification.failure_kind = consts.push_notification.FailureKind.NOT_OPTED_IN
-        push_notification.failure_message = "The user has not opted-in to receive notifications"
+        _push_notification_mark_as_not_opted_in(push_notification)
+    elif local_delivery_time is not None:
+        push_notification.scheduled_for = _push_notification_local_delivery_at(
+            local_time=local_delivery_time, time_zone=user.time_zone, now=timezone.now()
+        )
+    push_notification.collapse_key = collapse_key or _push_notification_collapse_key(
+        kind=kind,
+        source_content_type_id=push_notification.source_content_type_id,
+        source_object_id=push_notification.source_object_id,
+    )
     push_notification.full_clean()
+
+    collapse_window = settings.PUSH_NOTIFICATION_COLLAPSE_WINDOW_SECONDS
+    if (
+        push_notification.collapse_key
+        and collapse_window
+        and push_notification.status == consts.push_notification.Status.CREATED
+    ):
+        now = timezone.now()
+        with transaction.atomic():
+            pending = (
+                selectors.push_notification_get_collapsible_qs(
+                    user_ids=[user.pk],
+                    collapse_key=push_notification.collapse_key,
+                    since=now - timedelta(seconds=collapse_window),
+                )
+                .select_for_update()
+                .last()
+            )
+            if pending is not None:
+                _push_notification_collapse_into(pending=pending, newer=push_notification, now=now)
+                pending.save(update_fields=_COLLAPSE_FIELDS)
+                _push_notification_publish(user=lambda: user, notification=pending)
+                return pending
+
     push_notification.save()
+    _push_notification_unread_counter_add(deltas={user.pk: 1})
+    _push_notification_publish(user=lambda: user, notification=push_notification)
     return push_notification
 
 
+def _batched(iterable: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def push_notification_bulk_create(
+    *,
+    users: Iterable[User],
+    kind: consts.push_notification.Kind.kind_enum,
+    title: str,
+    description: str,
+    data: dict[str, Any] | None = None,
+    source_object: BaseModel | None = None,
+    local_delivery_time: time | None = None,
+    collapse_key: str | None = None,
+    batch_size: int | None = None,
+) -> list[int]:
+    """Fans-out the same notification to many `users`. The shared payload is validated only
+    once and the rows are written using multi-row INSERTs of `batch_size` rows. Users that
+    have no notification token get a NOT_OPTED_IN notification, as on `push_notification_create`.
+    With a `local_delivery_time` the notifications are scheduled per user time zone, and
+    the pending notifications with the same collapse key are replaced, as on
+    `push_notification_create`.
+    Returns the ids of the new notifications that can be sent right away,
+    see `push_notification_enqueue_send`"""
+    batch_size = batch_size or settings.PUSH_NOTIFICATION_BULK_CREATE_BATCH_SIZE
+
+    template = models.PushNotification(
+        kind=kind,
+        title=title[: consts.push_notification.MaxSize.TITLE_MAX_SIZE_ANDROID],
+        description=description[: consts.push_notification.MaxSize.DESCRIPTION_MAX_SIZE_ANDROID],
+        data=data or {},
+        status=consts.push_notification.Status.CREATED,
+        source_object=source_object,
+    )
+    template.collapse_key = collapse_key or _push_notification_collapse_key(
+        kind=kind,
+        source_content_type_id=template.source_content_type_id,
+        source_object_id=template.source_object_id,
+    )
+    template.full_clean(exclude=["user"])
+    collapse_window = settings.PUSH_NOTIFICATION_COLLAPSE_WINDOW_SECONDS
+    collapsing = bool(template.collapse_key and collapse_window)
+
+    if isinstance(users, QuerySet):
+        # We only need these fields to build the rows, so don't load the whole user
+        users = users.only("id", "notification_token", "time_zone").iterator(chunk_size=batch_size)
+
+    now = timezone.now()
+    delivery_at_by_time_zone: dict[str, datetime] = {}
+    sendable_ids: list[int] = []
+    for users_batch in _batched(users, batch_size):
+        # The pending notifications are locked until the batch is written
+        with transaction.atomic() if collapsing else contextlib.nullcontext():
+            push_notifications = _push_notification_bulk_create_batch(
+                users=users_batch,
+                template=template,
+                local_delivery_time=local_delivery_time,
+                delivery_at_by_time_zone=delivery_at_by_time_zone,
+                collapse_window=collapse_window if collapsing else 0,
+                now=now,
+            )
+        sendable_ids.extend(
+            push_notification.id
+            for push_notification in push_notifications
+            if push_notification.status == consts.push_notification.Status.CREATED
+            and push_notification.scheduled_for is None
+        )
+    return sendable_ids
+
+
+def _push_notification_bulk_create_batch(
+    *,
+    users: list[User],
+    template: models.PushNotification,
+    local_delivery_time: time | None,
+    delivery_at_by_time_zone: dict[str, datetime],
+    collapse_window: int,
+    now: datetime,
+) -> list[models.PushNotification]:
+    """Writes the notifications of a batch of `push_notification_bulk_create`.
+    Returns the notifications that were created, leaving out the collapsed ones"""
+    pending_by_user_id: dict[int, models.PushNotification] = {}
+    if collapse_window:
+        pending_by_user_id = {
+            notification.user_id: notification
+            for notification in selectors.push_notification_get_collapsible_qs(
+                user_ids=[user.pk for user in users],
+                collapse_key=template.collapse_key,  # type: ignore
+                since=now - timedelta(seconds=collapse_window),
+            )
+            .select_for_update()
+            .only("id", "user_id")
+        }
+
+    push_notifications = []
+    collapsed = []
+    for user in users:
+        pending = pending_by_user_id.get(user.pk)
+        if pending is not None and user.notification_token is not None:
+            _push_notification_collapse_into(pending=pending, newer=template, now=now)
+            collapsed.append(pending)
+            continue
+
+        push_notification = models.PushNotification(
+            user_id=user.pk,
+            kind=template.kind,
+            title=template.title,
+            description=template.description,
+            data=template.data,
+            status=template.status,
+            source_content_type_id=template.source_content_type_id,
+            source_object_id=template.source_object_id,
+            collapse_key=template.collapse_key,
+        )
+        if user.notification_token is None:
+            _push_notification_mark_as_not_opted_in(push_notification)
+        elif local_delivery_time is not None:
+            if user.time_zone not in delivery_at_by_time_zone:
+                delivery_at_by_time_zone[user.time_zone] = _push_notification_local_delivery_at(
+                    local_time=local_delivery_time, time_zone=user.time_zone, now=now
+                )
+            push_notification.scheduled_for = delivery_at_by_time_zone[user.time_zone]
+        push_notifications.append(push_notification)
+
+    if collapsed:
+        models.PushNotification.objects.bulk_update(collapsed, fields=_COLLAPSE_FIELDS)
+    if push_notifications:
+        models.PushNotification.objects.bulk_create(push_notifications, batch_size=len(users))
+        _push_notification_unread_counter_add(
+            deltas=collections.Counter(n.user_id for n in push_notifications)
+        )
+    return push_notifications
+
+
+def push_notification_flush_scheduled(*, now: datetime | None = None) -> int:
+    """Sends the notifications that are scheduled up to `now`, in batches of
+    PUSH_NOTIFICATION_FLUSH_BATCH_SIZE. They're claimed by clearing their `scheduled_for`,
+    so concurrent flushes don't send them twice. Returns how many were flushed"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        notification_ids = list(
+            selectors.push_notification_get_scheduled_qs(until=now)
+            .select_for_update(skip_locked=True)
+            .order_by("scheduled_for", "id")
+            .values_list("id", flat=True)[: settings.PUSH_NOTIFICATION_FLUSH_MAX_SIZE]
+        )
+        models.PushNotification.objects.filter(id__in=notification_ids).update(scheduled_for=None)
+    push_notification_enqueue_send(
+        notification_ids=notification_ids, chunk_size=settings.PUSH_NOTIFICATION_FLUSH_BATCH_SIZE
+    )
+    return len(notification_ids)
+
+
+def push_notification_enqueue_send(
+    *, notification_ids: Sequence[int], chunk_size: int | None = None
+) -> None:
+    """Dispatches the `push_notification_send` task for the given ids, each task
+    receives at most `chunk_size` notifications"""
+    from . import tasks
+
+    chunk_size = chunk_size or settings.PUSH_NOTIFICATION_SEND_TASK_CHUNK_SIZE
+    for step in range(0, len(notification_ids), chunk_size):
+        tasks.push_notification_send.apply_async(
+            kwargs={"notification_ids": list(notification_ids[step : step + chunk_size])}
+        )
+
+
+class PushNotificationBroadcastProgress(TypedDict):
+    # "stalled" when it stopped waiting for the send tasks to catch up
+    status: Literal["running", "stalled", "finished"]
+    # The last user that had its notification created, the broadcast resumes after it
+    after_user_id: int | None
+    users: int
+    enqueued: int
+
+
+_BROADCAST_PROGRESS_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _push_notification_broadcast_progress_cache_key(broadcast_id: str) -> str:
+    return f"push_notifications:broadcast:{broadcast_id}"
+
+
+def push_notification_get_broadcast_progress(
+    *, broadcast_id: str
+) -> PushNotificationBroadcastProgress | None:
+    return cache.get(_push_notification_broadcast_progress_cache_key(broadcast_id))
+
+
+def _push_notification_broadcast_wait(*, in_flight: list[list[int]], max_in_flight: int) -> bool:
+    """Blocks until less than `max_in_flight` of the enqueued notifications are waiting to be
+    sent. The ids that were already handled by the send tasks are dropped from `in_flight`.
+    Returns False if they didn't catch up within PUSH_NOTIFICATION_BROADCAST_MAX_WAIT_SECONDS"""
+    deadline = monotonic() + settings.PUSH_NOTIFICATION_BROADCAST_MAX_WAIT_SECONDS
+    while sum(len(ids) for ids in in_flight) >= max_in_flight:
+        pending_ids = set(
+            models.PushNotification.objects.filter(
+                id__in=list(itertools.chain.from_iterable(in_flight)),
+                status=consts.push_notification.Status.CREATED,
+            ).values_list("id", flat=True)
+        )
+        still_in_flight = [[pk for pk in ids if pk in pending_ids] for ids in in_flight]
+        in_flight[:] = [ids for ids in still_in_flight if ids]
+        if len(pending_ids) >= max_in_flight:
+            if monotonic() >= deadline:
+                return False
+            sleep(settings.PUSH_NOTIFICATION_BROADCAST_POLL_SECONDS)
+    return True
+
+
+def push_notification_broadcast(
+    *,
+    broadcast_id: str,
+    filters: dict[str, Any],
+    kind: consts.push_notification.Kind.kind_enum,
+    title: str,
+    description: str,
+    data: dict[str, Any] | None = None,
+    local_delivery_time: time | None = None,
+    collapse_key: str | None = None,
+    after_user_id: int | None = None,
+    batch_size: int | None = None,
+    max_in_flight: int | None = None,
+) -> PushNotificationBroadcastProgress:
+    """Fans-out a notification to the users that match `filters`, see
+    `users.selectors.UserSegmentFilterSet`. The users are walked by id with a server-side
+    cursor, one batch at a time: the batch notifications are created and their sends are
+    enqueued before reading the next one, so only one batch is held in memory.
+    At most `max_in_flight` notifications wait to be sent, the next batches wait for the
+    send tasks to catch up, for up to PUSH_NOTIFICATION_BROADCAST_MAX_WAIT_SECONDS, then the
+    broadcast stops as "stalled". With a `local_delivery_time` the notifications are scheduled
+    per user time zone instead, see `push_notification_bulk_create`.
+    The progress is stored under `broadcast_id` after each batch, so running the broadcast
+    again resumes after the last handled user (or after `after_user_id`, when given)"""
+    batch_size = batch_size or settings.PUSH_NOTIFICATION_BROADCAST_BATCH_SIZE
+    max_in_flight = max_in_flight or settings.PUSH_NOTIFICATION_BROADCAST_MAX_IN_FLIGHT
+    logger = get_logger(__name__, broadcast_id=broadcast_id)
+    cache_key = _push_notification_broadcast_progress_cache_key(broadcast_id)
+
+    progress: PushNotificationBroadcastProgress | None = cache.get(cache_key)
+    if progress is None:
+        progress = {"status": "running", "after_user_id": None, "users": 0, "enqueued": 0}
+    elif progress["status"] == "finished" and after_user_id is None:
+        logger.info("The broadcast has already finished")
+        return progress
+    progress["status"] = "running"
+    if after_user_id is not None:
+        progress["after_user_id"] = after_user_id
+    if progress["after_user_id"] is not None:
+        logger.info(f"Resuming the broadcast after user_id={progress['after_user_id']}")
+
+    users = user_selectors.user_get_segment_qs(filters=filters)
+    if progress["after_user_id"] is not None:
+        users = users.filter(id__gt=progress["after_user_id"])
+    users_iterator = (
+        users.order_by("id")
+        .only("id", "notification_token", "time_zone")
+        .iterator(chunk_size=batch_size)
+    )
+
+    in_flight: list[list[int]] = []
+    for users_batch in _batched(users_iterator, batch_size):
+        if not _push_notification_broadcast_wait(in_flight=in_flight, max_in_flight=max_in_flight):
+            progress["status"] = "stalled"
+            cache.set(cache_key, progress, timeout=_BROADCAST_PROGRESS_TIMEOUT)
+            logger.error(
+                f"The send tasks didn't catch up, stopped the broadcast after {progress['users']}"
+                " users, run it again to resume"
+            )
+            return progress
+        sendable_ids = push_notification_bulk_create(
+            users=users_batch,
+            kind=kind,
+            title=title,
+            description=description,
+            data=data,
+            local_delivery_time=local_delivery_time,
+            collapse_key=collapse_key,
+            batch_size=batch_size,
+        )
+        push_notification_enqueue_send(notification_ids=sendable_ids)
+        in_flight.append(sendable_ids)
+
+        progress["after_user_id"] = users_batch[-1].pk
+        progress["users"] += len(users_batch)
+        progress["enqueued"] += len(sendable_ids)
+        cache.set(cache_key, progress, timeout=_BROADCAST_PROGRESS_TIMEOUT)
+        logger.debug(f"Broadcasted to {progress['users']} users")
+
+    progress["status"] = "finished"
+    cache.set(cache_key, progress, timeout=_BROADCAST_PROGRESS_TIMEOUT)
+    logger.info(f"Finished the broadcast to {progress['users']} users")
+    return progress
+
+
+def _push_notification_bulk_fail(
+    *,
+    failed: Sequence[tuple[models.PushNotification, PushTicket | PushReceipt]],
+    now: datetime,
+) -> None:
+    """Persists the failures of tickets/receipts and dispatches a single task to handle them"""
+    from . import tasks
+
+    if not failed:
+        return
+    push_notification_prune_devices(
+        tokens=_push_notification_unregistered_tokens(
+            ticket_or_receipt for _notification, ticket_or_receipt in failed
+        )
+    )
+    notifications = []
+    for notification, ticket_or_receipt in failed:
+        notification.failure_kind = ticket_or_receipt["details"]["error"]
+        notification.failure_message = ticket_or_receipt["message"]
+        notification.status = consts.push_notification.Status.FAILED
+        notification.last_updated_at = now
+        notifications.append(notification)
+    models.PushNotification.objects.bulk_update(
+        notifications, fields=["failure_kind", "failure_message", "status", "last_updated_at"]
+    )
+    tasks.push_notification_handle_delivery_failures.apply_async(
+        kwargs={"notification_ids": [notification.id for notification in notifications]}
+    )
+
+
+def _push_notification_unregistered_tokens(
+    tickets_or_receipts: Iterable[PushTicket | PushReceipt],
+) -> list[str]:
+    return [
+        ticket["details"]["expoPushToken"]
+        for ticket in tickets_or_receipts
+        if ticket.get("details", {}).get("error")
+        == consts.push_notification.FailureKind.DEVICE_NOT_REGISTERED
+        and "expoPushToken" in ticket["details"]
+    ]
+
+
+def push_notification_handle_push_tickets(
+    *, tickets: Sequence[tuple[models.PushNotification, PushTicket]]
+) -> None:
+    """Handles many PushTickets at once, see `push_notification_handle_push_ticket`.
+    The notifications are grouped by their resulting status and each group is written
+    with a single UPDATE that only touches the fields that changed"""
+    now = timezone.now()
+    sent: list[models.PushNotification] = []
+    failed: list[tuple[models.PushNotification, PushTicket]] = []
+    for notification, ticket in tickets:
+        status = ticket["status"]
+        if status == "ok":
+            notification.push_ticket_id = ticket["id"]
+            notification.status = consts.push_notification.Status.SENT
+            notification.last_updated_at = now
+            sent.append(notification)
+        elif status == "error":
+            failed.append((notification, ticket))
+
+    if sent:
+        models.PushNotification.objects.bulk_update(
+            sent, fields=["push_ticket_id", "status", "last_updated_at"]
+        )
+    _push_notification_bulk_fail(failed=failed, now=now)
+
+
 def push_notification_handle_push_ticket(
     *,
     notification: models.PushNotification,
@@ -56,25 +523,33 @@ def push_notification_handle_push_ticket(
     """Handles a PushTicket, if it's ok the notification has been received by the
     service responsible to delivering the notification to the end-user, but that
     doesn't mean that the message was delivered to the end-user"""
-    from . import tasks
+    push_notification_handle_push_tickets(tickets=[(notification, ticket)])
 
-    status = ticket["status"]
-    if status not in ("ok", "error"):
-        return
-    if status == "ok":
-        notification.push_ticket_id = ticket["id"]
-        notification.status = consts.push_notification.Status.SENT
-        notification.save()
-        return
 
-    notification.failure_kind = ticket["details"]["error"]
-    notification.failure_message = ticket["message"]
-    notification.status = consts.push_notification.Status.FAILED
-    notification.save()
+def push_notification_handle_push_receipts(
+    *, receipts: Sequence[tuple[models.PushNotification, PushReceipt]]
+) -> None:
+    """Handles many PushReceipts at once, see `push_notification_handle_push_receipt`.
+    The notifications are grouped by their resulting status and each group is written
+    with a single UPDATE that only touches the fields that changed"""
+    now = timezone.now()
+    delivered: list[models.PushNotification] = []
+    failed: list[tuple[models.PushNotification, PushReceipt]] = []
+    for notification, receipt in receipts:
+        status = receipt["status"]
+        if status == "ok":
+            notification.status = consts.push_notification.Status.DELIVERED
+            notification.delivery_confirmation_received_at = now
+            notification.last_updated_at = now
+            delivered.append(notification)
+        elif status == "error":
+            failed.append((notification, receipt))
 
-    tasks.push_notification_handle_delivery_failure.apply_async(
-        kwargs={"notification_id": notification.id}
-    )
+    if delivered:
+        models.PushNotification.objects.bulk_update(
+            delivered, fields=["status", "delivery_confirmation_received_at", "last_updated_at"]
+        )
+    _push_notification_bulk_fail(failed=failed, now=now)
 
 
 def push_notification_handle_push_receipt(
@@ -82,24 +557,7 @@ def push_notification_handle_push_receipt(
 ) -> None:
     """Handles a PushReceipt, if it's ok, the notification was delivered to the end-user
     Otherwise has failed and maybe can be retried"""
-    from . import tasks
-
-    status = receipt["status"]
-    if status not in ("ok", "error"):
-        return
-    if status == "ok":
-        notification.status = consts.push_notification.Status.DELIVERED
-        notification.delivery_confirmation_received_at = timezone.now()
-        notification.save()
-        return
-
-    notification.failure_kind = receipt["details"]["error"]
-    notification.failure_message = receipt["message"]
-    notification.status = consts.push_notification.Status.FAILED
-    notification.save()
-    tasks.push_notification_handle_delivery_failure.apply_async(
-        kwargs={"notification_id": notification.id}
-    )
+    push_notification_handle_push_receipts(receipts=[(notification, receipt)])
 
 
 @di.inject_service_at_runtime(PushNotificationExternalService)
@@ -108,28 +566,104 @@ def push_notification_send(
     notifications: Sequence[models.PushNotification],
     notification_service: PushNotificationExternalService = PushNotificationExternalService(),
 ) -> None:
-    """Expects a sequence of PushNotification that are on the CREATED/ENQUEUED status"""
+    """Expects a sequence of PushNotification that are on the CREATED/ENQUEUED status.
+    The ones scheduled for later are skipped, they're sent by `push_notification_flush_scheduled`"""
     sendable_statuses = (
         consts.push_notification.Status.CREATED,
         consts.push_notification.Status.ENQUEUED,
     )
-    sendable_notifications = [n for n in notifications if n.status in sendable_statuses]
+    now = timezone.now()
+    sendable_notifications = [
+        n
+        for n in notifications
+        if n.status in sendable_statuses and (n.scheduled_for is None or n.scheduled_for <= now)
+    ]
     if not sendable_notifications:
         return
 
     tickets = notification_service.bulk_send(pushes=sendable_notifications)
+    notification_tickets = []
+    unregistered_tokens = []
+    unsent = []
     for notification in sendable_notifications:
-        ticket = tickets.get(str(notification.id), None)
-        if ticket is None:
+        device_tickets = tickets.get(str(notification.id))
+        if not device_tickets:
+            if notification.user.get_notification_tokens():
+                # The provider didn't take its chunk (e.g: it timed out), it's sent again later
+                unsent.append(notification)
             continue
-        push_notification_handle_push_ticket(notification=notification, ticket=ticket)
+        ok_tickets = [ticket for ticket in device_tickets if ticket["status"] == "ok"]
+        if ok_tickets:
+            # Delivered to at least one device, the receipt is checked on the first of them.
+            # The devices that are no longer registered are still pruned
+            unregistered_tokens.extend(_push_notification_unregistered_tokens(device_tickets))
+            notification_tickets.append((notification, ok_tickets[0]))
+        else:
+            notification_tickets.append((notification, device_tickets[0]))
+            unregistered_tokens.extend(_push_notification_unregistered_tokens(device_tickets[1:]))
+    push_notification_prune_devices(tokens=unregistered_tokens)
+    push_notification_handle_push_tickets(tickets=notification_tickets)
+    _push_notification_reschedule_unsent(notifications=unsent, now=now)
+
+
+def _push_notification_reschedule_unsent(
+    *, notifications: Sequence[models.PushNotification], now: datetime
+) -> None:
+    """Schedules the notifications that weren't sent to be sent again, with the same backoff
+    of the rate limited ones, see `push_notification_delivery_failed`.
+    They're flushed by `push_notification_flush_scheduled`"""
+    if not notifications:
+        return
+    for notification in notifications:
+        if notification.delivery_attempts > notification.MAX_DELIVERY_ATTEMPTS:
+            notification.status = consts.push_notification.Status.FAILED
+            notification.failure_kind = (
+                consts.push_notification.FailureKind.TOO_MANY_DELIVERY_ATTEMPTS
+            )
+            notification.failure_message = "Too many attempts to deliver the notification failed"
+        else:
+            notification.status = consts.push_notification.Status.ENQUEUED
+            notification.scheduled_for = _push_notification_retry_at(
+                delivery_attempts=notification.delivery_attempts, now=now
+            )
+            notification.delivery_attempts += 1
+        notification.last_updated_at = now
+    models.PushNotification.objects.bulk_update(
+        notifications,
+        fields=[
+            "status",
+            "failure_kind",
+            "failure_message",
+            "scheduled_for",
+            "delivery_attempts",
+            "last_updated_at",
+        ],
+    )
+    get_logger(__name__).warning(f"Scheduled {len(notifications)} unsent notifications again")
+
+
+def _push_notification_schedule_bucket(dt: datetime) -> datetime:
+    """Rounds `dt` up to the next schedule bucket, so the notifications scheduled around
+    the same time are flushed together"""
+    bucket_seconds = settings.PUSH_NOTIFICATION_SCHEDULE_BUCKET_SECONDS
+    timestamp = math.ceil(dt.timestamp() / bucket_seconds) * bucket_seconds
+    return datetime.fromtimestamp(timestamp, tz=dt.tzinfo)
+
+
+def _push_notification_retry_at(*, delivery_attempts: int, now: datetime) -> datetime:
+    """Exponential backoff on the `delivery_attempts`, with a jitter so the notifications
+    that failed together don't all come back at the same time"""
+    delay = min(
+        settings.PUSH_NOTIFICATION_RETRY_BASE_DELAY_SECONDS * 2 ** (delivery_attempts - 1),
+        settings.PUSH_NOTIFICATION_RETRY_MAX_DELAY_SECONDS,
+    )
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    return _push_notification_schedule_bucket(now + timedelta(seconds=delay))
 
 
 def push_notification_delivery_failed(notification: models.PushNotification):
     """Handles a push notification that failed when we tried to sent it to the provider.
     It expects that failure_kind is populated, meaning that is on the failed status"""
-    from . import tasks
-
     logger = get_logger(
         __name__,
         notification_id=notification.id,
@@ -140,11 +674,9 @@ def push_notification_delivery_failed(notification: models.PushNotification):
     logger.debug("Push notification delivery failed")
 
     if notification.failure_kind == consts.push_notification.FailureKind.DEVICE_NOT_REGISTERED:
-        # we're recommended to not keep trying sending notifications to non-registered devices
-        logger.warning("User device is no longer registered, removing his token")
-        user: User = notification.user
-        user.notification_token = None
-        user.save()
+        # we're recommended to not keep trying sending notifications to non-registered devices,
+        # they were already pruned when the ticket (or receipt) was handled
+        logger.warning("User device is no longer registered")
         return
 
     if notification.failure_kind == consts.push_notification.FailureKind.MESSAGE_RATE_EXCEEDED:
@@ -159,57 +691,181 @@ def push_notification_delivery_failed(notification: models.PushNotification):
             notification.failure_message = "Too many attempts to deliver the notification failed"
             notification.save()
             return
-        logger.warning("Enqueueing message again")
+        notification.scheduled_for = _push_notification_retry_at(
+            delivery_attempts=notification.delivery_attempts, now=timezone.now()
+        )
+        logger.warning(f"Scheduling message again for {notification.scheduled_for}")
         notification.status = consts.push_notification.Status.ENQUEUED
         notification.delivery_attempts += 1
         notification.failure_kind = None
         notification.failure_message = None
         notification.save()
-        tasks.push_notification_handle_resend.apply_async(
-            kwargs={"notification_id": notification.id},
-            countdown=5,
-        )
         return
 
     logger.critical(f"Unable to handle the {notification.failure_kind=}")
 
 
+_CONFIRM_DELIVERY_CHECKPOINT_KEY = "push_notifications:confirm_delivery:cursor"
+_CONFIRM_DELIVERY_CHECKPOINT_TIMEOUT = 60 * 60
+_CONFIRM_DELIVERY_LOCK_KEY = "push_notifications:confirm_delivery:lock"
+# Renewed on every page, so it only expires when a run dies while holding it
+_CONFIRM_DELIVERY_LOCK_TIMEOUT = 60 * 10
+
+
 @di.inject_service_at_runtime(PushNotificationExternalService)
 def push_notification_confirm_delivery(
     *,
     dt: datetime,
+    page_size: int | None = None,
     notification_service: PushNotificationExternalService = PushNotificationExternalService(),
 ):
     """Tries to confirm the delivery of sent notifications that
-    were created after dt - 1 days. This is called periodically by celery"""
-    yesterday = dt - timedelta(days=1)
+    were created after dt - 1 days. This is called periodically by celery.
+    Notifications are walked in pages ordered by (created_at, id), matching the partial
+    index, and each page is persisted before fetching the next one. The position of the
+    last handled notification is checkpointed in the cache, so a run that is interrupted
+    is resumed by the next one instead of starting over.
+    Only one run goes at a time, the ones that overlap with it are skipped"""
     logger = get_logger(__name__, dt=dt, notification_service=notification_service)
+    lock_id = uuid.uuid4().hex
+    if not cache.add(_CONFIRM_DELIVERY_LOCK_KEY, lock_id, timeout=_CONFIRM_DELIVERY_LOCK_TIMEOUT):
+        logger.info("Another run is confirming the delivery of push notifications, skipping")
+        return
+    try:
+        _push_notification_confirm_delivery(
+            dt=dt, page_size=page_size, notification_service=notification_service, logger=logger
+        )
+    finally:
+        if cache.get(_CONFIRM_DELIVERY_LOCK_KEY) == lock_id:
+            cache.delete(_CONFIRM_DELIVERY_LOCK_KEY)
+
+
+def _push_notification_confirm_delivery(
+    *,
+    dt: datetime,
+    page_size: int | None,
+    notification_service: PushNotificationExternalService,
+    logger: StructLogger,
+) -> None:
+    yesterday = dt - timedelta(days=1)
+    page_size = page_size or settings.PUSH_NOTIFICATION_CONFIRM_DELIVERY_PAGE_SIZE
     logger.info("Starting to confirm the delivery of push notifications")
 
-    notifications = models.PushNotification.objects.filter(
-        status=consts.push_notification.Status.SENT,
-        created_at__date__gte=yesterday.date(),
-        push_ticket_id__isnull=False,
-    ).select_related("user")
-    if not notifications:
-        # No need to send no tickets to the notification service
-        logger.info("All good no notifications to confirm delivery")
-        return
-    logger.debug("Found some notifications to confirm delivery, getting receipts")
-    receipts = notification_service.get_receipts(
-        [notification.push_ticket_id for notification in notifications]  # type: ignore
+    cursor: tuple[datetime, int] | None = cache.get(_CONFIRM_DELIVERY_CHECKPOINT_KEY)
+    if cursor is not None:
+        logger.info(f"Resuming the delivery confirmation after {cursor=}")
+
+    start_of_yesterday = timezone.make_aware(
+        datetime.combine(timezone.localdate(yesterday), time.min)
     )
+    notifications = (
+        selectors.push_notification_get_pending_delivery_confirmation_qs(since=start_of_yesterday)
+        .only("id", "push_ticket_id", "created_at")
+        .order_by("created_at", "id")
+    )
+    while True:
+        page_qs = notifications
+        if cursor is not None:
+            last_created_at, last_id = cursor
+            page_qs = page_qs.filter(
+                Q(created_at__gt=last_created_at) | Q(created_at=last_created_at, id__gt=last_id)
+            )
+        page = list(page_qs[:page_size])
+        if not page:
+            break
+        logger.debug(f"Getting receipts for {len(page)} notifications after {cursor=}")
+        receipts = notification_service.get_receipts(
+            [notification.push_ticket_id for notification in page]  # type: ignore
+        )
 
-    for notification in notifications:
-        receipt = receipts.get(notification.push_ticket_id)  # type: ignore
-        if receipt is None:
-            logger.warning(f"Unable to find receipt for {notification=}")
-            continue
-        logger.debug(f"Handling push {receipt=}")
-        push_notification_handle_push_receipt(
-            notification=notification,
-            receipt=receipt,
+        notification_receipts = []
+        for notification in page:
+            receipt = receipts.get(notification.push_ticket_id)  # type: ignore
+            if receipt is None:
+                logger.warning(f"Unable to find receipt for notification_id={notification.id}")
+                continue
+            notification_receipts.append((notification, receipt))
+        push_notification_handle_push_receipts(receipts=notification_receipts)
+
+        cursor = (page[-1].created_at, page[-1].id)
+        cache.set(
+            _CONFIRM_DELIVERY_CHECKPOINT_KEY, cursor, timeout=_CONFIRM_DELIVERY_CHECKPOINT_TIMEOUT
+        )
+        cache.touch(_CONFIRM_DELIVERY_LOCK_KEY, timeout=_CONFIRM_DELIVERY_LOCK_TIMEOUT)
+        if len(page) < page_size:
+            break
+
+    cache.delete(_CONFIRM_DELIVERY_CHECKPOINT_KEY)
+    logger.info("Finished confirming the delivery of push notifications")
+
+
+def _push_notification_purge_partitions(*, cutoff: datetime) -> int:
+    """Detaches the partitions that only hold notifications older than `cutoff`, and drops
+    them unless PUSH_NOTIFICATION_RETENTION_KEEP_DETACHED_PARTITIONS is set.
+    Returns how many partitions were detached"""
+    detached = 0
+    for name, upper_bound in partitions.get_partitions():
+        if upper_bound > cutoff:
+            break
+        partitions.detach_partition(name=name)
+        # Once detached the notifications can't be read anymore, so the count is final
+        unread_by_user = partitions.count_unread_by_user(name=name)
+        _push_notification_unread_counter_add(
+            deltas={user_id: -count for user_id, count in unread_by_user.items()}
         )
+        if not settings.PUSH_NOTIFICATION_RETENTION_KEEP_DETACHED_PARTITIONS:
+            partitions.drop_partition(name=name)
+        detached += 1
+    return detached
+
+
+def push_notification_purge_old(
+    *,
+    now: datetime | None = None,
+    retention_days: int | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """Deletes the notifications created more than `retention_days` ago, keeping the unread
+    counters in sync. On a partitioned table the whole partitions that are past the retention
+    are detached first, see `partitions`. The remaining notifications are deleted by
+    ascending id in batches of `batch_size`, pausing between them so autovacuum keeps up
+    and the replicas don't lag. Since the ids grow with `created_at`, the walk stops at the
+    first batch that has nothing to delete. Returns how many notifications were deleted"""
+    now = now or timezone.now()
+    retention_days = retention_days or settings.PUSH_NOTIFICATION_RETENTION_DAYS
+    batch_size = batch_size or settings.PUSH_NOTIFICATION_RETENTION_BATCH_SIZE
+    cutoff = now - timedelta(days=retention_days)
+    logger = get_logger(__name__, cutoff=cutoff)
+
+    if partitions.is_partitioned():
+        detached = _push_notification_purge_partitions(cutoff=cutoff)
+        logger.info(f"Detached {detached} partitions")
+
+    deleted = 0
+    while True:
+        batch = list(
+            models.PushNotification.objects.order_by("id").values_list(
+                "id", "user_id", "read_at", "created_at"
+            )[:batch_size]
+        )
+        expired = [row for row in batch if row[3] < cutoff]
+        if not expired:
+            break
+        models.PushNotification.objects.filter(id__in=[row[0] for row in expired]).delete()
+        unread_by_user = collections.Counter(
+            user_id for _id, user_id, read_at, _created_at in expired if read_at is None
+        )
+        _push_notification_unread_counter_add(
+            deltas={user_id: -count for user_id, count in unread_by_user.items()}
+        )
+        deleted += len(expired)
+        logger.debug(f"Deleted {deleted} notifications")
+        if len(expired) < len(batch) or len(batch) < batch_size:
+            break
+        sleep(settings.PUSH_NOTIFICATION_RETENTION_BATCH_PAUSE_SECONDS)
+
+    logger.info(f"Deleted {deleted} notifications")
+    return deleted
 
 
 @di.inject_service_at_runtime(PushNotificationExternalService)
@@ -230,32 +886,344 @@ def push_notification_read(
     push_notification.read_at = timezone.now()
     push_notification.status = consts.push_notification.Status.READ
     push_notification.save()
+    _push_notification_unread_counter_add(deltas={push_notification.user_id: -1})
+    _push_notification_publish(user=lambda: push_notification.user)
+    return push_notification
+
+
+async def push_notification_aread(
+    *, push_notification: models.PushNotification
+) -> models.PushNotification:
+    """Same as `push_notification_read`, for async views"""
+    if push_notification.read_at is not None:
+        return push_notification
+    push_notification.read_at = timezone.now()
+    push_notification.status = consts.push_notification.Status.READ
+    updated = await models.PushNotification.objects.filter(
+        pk=push_notification.pk, read_at__isnull=True
+    ).aupdate(read_at=push_notification.read_at, status=push_notification.status)
+    await _push_notification_unread_counter_aadd(deltas={push_notification.user_id: -updated})
+    if updated and realtime.is_enabled():
+        user = await User.objects.aget(pk=push_notification.user_id)
+        await _push_notification_apublish(user=user)
     return push_notification
 
 
 def push_notification_read_many(*, reader: User, ids: Sequence[int]) -> int:
     """Reads a sequence of ids visible for the given `reader`. If `ids` is empty
     reads all unread notifications.
+    The notifications are read with one UPDATE per PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE
+    of them, so each transaction only locks a batch of rows, and the unread counter is
+    updated in the same transaction as its batch.
     Returns the updated notification count"""
-    qs = selectors.push_notification_get_viewable_qs(user=reader).filter(read_at__isnull=True)
-    if ids:
-        qs = qs.filter(pk__in=ids)
-    return qs.update(read_at=timezone.now(), status=consts.push_notification.Status.READ)
+    batch_size = settings.PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE
+    unread_qs = selectors.push_notification_get_unread_qs(user=reader, ids=ids)
+    now = timezone.now()
+    read = 0
+    while True:
+        with transaction.atomic():
+            # The rows that were read leave the unread ones, so no ordering is needed
+            updated = models.PushNotification.objects.filter(
+                pk__in=Subquery(unread_qs.values("pk")[:batch_size]), read_at__isnull=True
+            ).update(read_at=now, status=consts.push_notification.Status.READ)
+            _push_notification_unread_counter_add(deltas={reader.pk: -updated})
+        read += updated
+        if updated < batch_size:
+            if read:
+                _push_notification_publish(user=lambda: reader)
+            return read
 
 
-def push_notification_set_token(*, user: User, notification_token: str | None) -> None:
-    # We aren't calling full_clean here on User so we don't raise any other errors that
-    # aren't from this specific field
+async def push_notification_aread_many(*, reader: User, ids: Sequence[int]) -> int:
+    """Same as `push_notification_read_many`, for async views. Transactions aren't available
+    to the async ORM, so the unread counter is updated right after each batch instead"""
+    batch_size = settings.PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE
+    unread_qs = selectors.push_notification_get_unread_qs(user=reader, ids=ids)
+    now = timezone.now()
+    read = 0
+    while True:
+        updated = await models.PushNotification.objects.filter(
+            pk__in=Subquery(unread_qs.values("pk")[:batch_size]), read_at__isnull=True
+        ).aupdate(read_at=now, status=consts.push_notification.Status.READ)
+        await _push_notification_unread_counter_aadd(deltas={reader.pk: -updated})
+        read += updated
+        if updated < batch_size:
+            if read and realtime.is_enabled():
+                await _push_notification_apublish(user=reader)
+            return read
+
+
+def _push_notification_unread_count_cache_key(user_id: int) -> str:
+    return f"push_notifications:unread_count:{user_id}"
 
-    if notification_token is not None:
-        if not notification_token:
-            # Because we have blank=True, and we accept None values, raise if someone attempt
-            # to send a blank string ""
-            raise exc.InvalidNotificationToken(
-                message_format_kwargs={"reason": _("it may not be blank")}
+
+def _push_notification_unread_count_version_key(user_id: int) -> str:
+    return f"push_notifications:unread_count_version:{user_id}"
+
+
+def _push_notification_unread_count_versions(user_ids: Iterable[int]) -> dict[str, str]:
+    """New versions for the cached unread counts of `user_ids`, see
+    `push_notification_get_unread_count`"""
+    return {_push_notification_unread_count_version_key(pk): uuid.uuid4().hex for pk in user_ids}
+
+
+def _push_notification_unread_counter_add(*, deltas: dict[int, int]) -> None:
+    """Applies the `deltas` (user_id -> delta) to the unread counters, with one UPDATE per
+    distinct delta. Counters that don't exist yet are left alone, since they're counted
+    from the notifications themselves on the first read"""
+    user_ids_by_delta = _push_notification_user_ids_by_delta(deltas)
+    if not user_ids_by_delta:
+        return
+    for delta, user_ids in user_ids_by_delta.items():
+        models.PushNotificationUnreadCounter.objects.filter(user_id__in=user_ids).update(
+            count=Greatest(F("count") + delta, 0)
+        )
+    cache_timeout = settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT
+    if cache_timeout:
+        cache.set_many(_push_notification_unread_count_versions(deltas), timeout=cache_timeout)
+        # And again once the new counts can be read by everyone, since the old ones could be
+        # read and cached with the version above until then
+        transaction.on_commit(
+            lambda: cache.set_many(
+                _push_notification_unread_count_versions(deltas), timeout=cache_timeout
             )
-        max_length = User._meta.get_field("notification_token").max_length or 64
-        if len(notification_token) > max_length:
-            raise exc.InvalidNotificationToken(message_format_kwargs={"reason": _("value too big")})
+        )
+
+
+async def _push_notification_unread_counter_aadd(*, deltas: dict[int, int]) -> None:
+    """Same as `_push_notification_unread_counter_add`, for async views"""
+    user_ids_by_delta = _push_notification_user_ids_by_delta(deltas)
+    if not user_ids_by_delta:
+        return
+    for delta, user_ids in user_ids_by_delta.items():
+        await models.PushNotificationUnreadCounter.objects.filter(user_id__in=user_ids).aupdate(
+            count=Greatest(F("count") + delta, 0)
+        )
+    cache_timeout = settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT
+    if cache_timeout:
+        await cache.aset_many(
+            _push_notification_unread_count_versions(deltas), timeout=cache_timeout
+        )
+
+
+def _push_notification_publish(
+    *, user: Callable[[], User], notification: models.PushNotification | None = None
+) -> None:
+    """Once the transaction commits, sends the `notification`, if any, and the unread count
+    to the websockets of the user. The `user` is only loaded then, if realtime is enabled"""
+    if not realtime.is_enabled():
+        return
+
+    def publish():
+        user_id = user().pk
+        if notification is not None:
+            realtime.send(user_id=user_id, event=realtime.notification_event(notification))
+        count = push_notification_get_unread_count(user=user())
+        realtime.send(user_id=user_id, event=realtime.unread_count_event(count))
+
+    transaction.on_commit(publish)
+
+
+async def _push_notification_apublish(*, user: User) -> None:
+    """Same as `_push_notification_publish` for the unread count, for async views"""
+    count = await push_notification_aget_unread_count(user=user)
+    await realtime.asend(user_id=user.pk, event=realtime.unread_count_event(count))
+
+
+def _push_notification_user_ids_by_delta(deltas: dict[int, int]) -> dict[int, list[int]]:
+    user_ids_by_delta = collections.defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            user_ids_by_delta[delta].append(user_id)
+    return user_ids_by_delta
+
+
+def push_notification_get_unread_count(*, user: User) -> int:
+    """Returns how many notifications the user hasn't read yet, without counting them.
+    The counter is cached together with the version of the user's count at the time it was
+    read, every change to the counter bumps that version, so a value that was read before a
+    change and cached after it is never used"""
+    cache_timeout = settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT
+    if not cache_timeout:
+        return _push_notification_unread_counter_get(user=user)
+
+    cache_key = _push_notification_unread_count_cache_key(user.pk)
+    version_key = _push_notification_unread_count_version_key(user.pk)
+    cached = cache.get_many([cache_key, version_key])
+    version = cached.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(version_key, version, timeout=cache_timeout):
+            version = cache.get(version_key)
+    elif cache_key in cached and cached[cache_key][0] == version:
+        return cached[cache_key][1]
+
+    count = _push_notification_unread_counter_get(user=user)
+    cache.set(cache_key, (version, count), timeout=cache_timeout)
+    return count
+
+
+async def push_notification_aget_unread_count(*, user: User) -> int:
+    """Same as `push_notification_get_unread_count`, for async views"""
+    cache_timeout = settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT
+    if not cache_timeout:
+        return await _push_notification_unread_counter_aget(user=user)
+
+    cache_key = _push_notification_unread_count_cache_key(user.pk)
+    version_key = _push_notification_unread_count_version_key(user.pk)
+    cached = await cache.aget_many([cache_key, version_key])
+    version = cached.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not await cache.aadd(version_key, version, timeout=cache_timeout):
+            version = await cache.aget(version_key)
+    elif cache_key in cached and cached[cache_key][0] == version:
+        return cached[cache_key][1]
+
+    count = await _push_notification_unread_counter_aget(user=user)
+    await cache.aset(cache_key, (version, count), timeout=cache_timeout)
+    return count
+
+
+def _push_notification_unread_counter_get(*, user: User) -> int:
+    count = (
+        models.PushNotificationUnreadCounter.objects.filter(user=user)
+        .values_list("count", flat=True)
+        .first()
+    )
+    if count is None:
+        count = _push_notification_unread_counter_create(user=user)
+    return count
+
+
+async def _push_notification_unread_counter_aget(*, user: User) -> int:
+    count = await (
+        models.PushNotificationUnreadCounter.objects.filter(user=user)
+        .values_list("count", flat=True)
+        .afirst()
+    )
+    if count is None:
+        count = await sync_to_async(_push_notification_unread_counter_create)(user=user)
+    return count
+
+
+def _push_notification_unread_counter_create(*, user: User) -> int:
+    """The counters are created with their users, see `signals`, this is only for the users
+    that were created without one (e.g: with `bulk_create`). The row of the user is locked
+    while its notifications are counted, so concurrent reads don't count them again"""
+    with transaction.atomic():
+        list(User.objects.select_for_update().filter(pk=user.pk).values_list("pk"))
+        counter, _created = models.PushNotificationUnreadCounter.objects.get_or_create(
+            user=user, defaults={"count": selectors.push_notification_count_unread(user=user)}
+        )
+    return counter.count
+
+
+def _push_notification_refresh_user_tokens(*, user_ids: Iterable[int]) -> None:
+    """Mirrors the token of the last seen device of each user on `User.notification_token`,
+    or clears it when the user has no devices left"""
+    User.objects.filter(id__in=user_ids).update(
+        notification_token=_push_notification_latest_device_token()
+    )
+
+
+def _push_notification_latest_device_token() -> Subquery:
+    return Subquery(
+        models.Device.objects.filter(user=OuterRef("pk"))
+        .order_by("-last_seen_at", "-id")
+        .values("token")[:1]
+    )
+
+
+def push_notification_prune_devices(*, tokens: Sequence[str]) -> int:
+    """Removes the devices of `tokens` at once, e.g. the ones that are no longer registered.
+    Returns how many devices were removed"""
+    if not tokens:
+        return 0
+    devices = models.Device.objects.filter(token__in=tokens)
+    user_ids = set(devices.values_list("user_id", flat=True))
+    deleted, _by_model = devices.delete()
+    _push_notification_refresh_user_tokens(user_ids=user_ids)
+    get_logger(__name__).info(f"Pruned {deleted} devices")
+    return deleted
+
+
+def push_notification_prune_stale_devices(*, now: datetime | None = None) -> int:
+    """Removes the devices that weren't seen in the last PUSH_NOTIFICATION_DEVICE_STALE_DAYS,
+    in batches of PUSH_NOTIFICATION_RETENTION_BATCH_SIZE. Returns how many were removed"""
+    now = now or timezone.now()
+    stale_since = now - timedelta(days=settings.PUSH_NOTIFICATION_DEVICE_STALE_DAYS)
+    pruned = 0
+    while tokens := list(
+        models.Device.objects.filter(last_seen_at__lt=stale_since)
+        .order_by("last_seen_at")
+        .values_list("token", flat=True)[: settings.PUSH_NOTIFICATION_RETENTION_BATCH_SIZE]
+    ):
+        pruned += push_notification_prune_devices(tokens=tokens)
+    return pruned
+
+
+def push_notification_set_token(*, user: User, notification_token: str | None) -> None:
+    """Registers the device of `notification_token` for the `user`, or marks it as seen.
+    A token that belonged to another user moves to this one, since it's the same device.
+    Without a token, all the devices of the user are removed (Opt-out)"""
+    _push_notification_validate_token(notification_token)
+    if notification_token is None:
+        models.Device.objects.filter(user=user).delete()
+        user.notification_token = None
+        user.save()
+        return
+
+    previous_user_ids = list(
+        models.Device.objects.filter(token=notification_token)
+        .exclude(user=user)
+        .values_list("user_id", flat=True)
+    )
+    models.Device.objects.update_or_create(
+        token=notification_token, defaults={"user": user, "last_seen_at": timezone.now()}
+    )
+    _push_notification_refresh_user_tokens(user_ids=previous_user_ids)
     user.notification_token = notification_token
     user.save()
+
+
+async def push_notification_aset_token(*, user: User, notification_token: str | None) -> None:
+    """Same as `push_notification_set_token`, for async views"""
+    _push_notification_validate_token(notification_token)
+    if notification_token is None:
+        await models.Device.objects.filter(user=user).adelete()
+        user.notification_token = None
+        await User.objects.filter(pk=user.pk).aupdate(notification_token=None)
+        return
+
+    previous_user_ids = [
+        user_id
+        async for user_id in models.Device.objects.filter(token=notification_token)
+        .exclude(user=user)
+        .values_list("user_id", flat=True)
+    ]
+    await models.Device.objects.aupdate_or_create(
+        token=notification_token, defaults={"user": user, "last_seen_at": timezone.now()}
+    )
+    if previous_user_ids:
+        await User.objects.filter(id__in=previous_user_ids).aupdate(
+            notification_token=_push_notification_latest_device_token()
+        )
+    user.notification_token = notification_token
+    await User.objects.filter(pk=user.pk).aupdate(notification_token=notification_token)
+
+
+def _push_notification_validate_token(notification_token: str | None) -> None:
+    # We aren't calling full_clean here on User so we don't raise any other errors that
+    # aren't from this specific field
+    if notification_token is None:
+        return
+    if not notification_token:
+        # Because we have blank=True, and we accept None values, raise if someone attempt
+        # to send a blank string ""
+        raise exc.InvalidNotificationToken(
+            message_format_kwargs={"reason": _("it may not be blank")}
+        )
+    max_length = User._meta.get_field("notification_token").max_length or 64
+    if len(notification_token) > max_length:
+        raise exc.InvalidNotificationToken(message_format_kwargs={"reason": _("value too big")})
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from push_notifications import models
+from users.models import User
+
+
+@receiver(post_save, sender=User, dispatch_uid="push_notifications.create_unread_counter")
+def create_unread_counter_on_user_creation(sender, instance: User, created: bool, **kwargs):
+    """The counter exists before any notification of the user, so none of its increments
+    are missed"""
+    if created and not kwargs.get("raw"):
+        models.PushNotificationUnreadCounter.objects.get_or_create(user=instance)
@@ -1,26 +1,71 @@
+from datetime import time
+
+from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from app.celery.decorators import BaseTask, task
 
-from . import models, services
+from . import models, partitions, selectors, services
 
 
 @task()
 def push_notification_send(notification_ids: list[int]):
-    notifications = models.PushNotification.objects.filter(id__in=notification_ids)
-    services.push_notification_send(notifications=notifications)
+    notifications = selectors.push_notification_get_sendable_qs(ids=notification_ids)
+    services.push_notification_send(notifications=list(notifications))
+
+
+@task()
+def push_notification_broadcast(
+    broadcast_id: str,
+    filters: dict,
+    kind: str,
+    title: str,
+    description: str,
+    data: dict | None = None,
+    local_delivery_time: str | None = None,
+    collapse_key: str | None = None,
+    after_user_id: int | None = None,
+):
+    """`local_delivery_time` is given in the ISO format, e.g. `09:00`"""
+    services.push_notification_broadcast(
+        broadcast_id=broadcast_id,
+        filters=filters,
+        kind=kind,  # type: ignore
+        title=title,
+        description=description,
+        data=data,
+        local_delivery_time=time.fromisoformat(local_delivery_time)
+        if local_delivery_time
+        else None,
+        collapse_key=collapse_key,
+        after_user_id=after_user_id,
+    )
 
 
 @task()
 def push_notification_handle_delivery_failure(notification_id: int):
+    # Superseded by `push_notification_handle_delivery_failures`, kept so the tasks that
+    # were already enqueued can still be consumed
     notification = models.PushNotification.objects.get(pk=notification_id)
     services.push_notification_delivery_failed(notification=notification)
 
 
+@task()
+def push_notification_handle_delivery_failures(notification_ids: list[int]):
+    notifications = models.PushNotification.objects.filter(id__in=notification_ids).select_related(
+        "user"
+    )
+    for notification in notifications:
+        services.push_notification_delivery_failed(notification=notification)
+
+
 @task()
 def push_notification_handle_resend(notification_id: int):
-    notification = models.PushNotification.objects.get(pk=notification_id)
-    services.push_notification_send(notifications=[notification])
+    # Superseded by `push_notification_flush_scheduled_periodically`, kept so the tasks that
+    # were already enqueued can still be consumed
+    notifications = selectors.push_notification_get_sendable_qs(ids=[notification_id])
+    services.push_notification_send(notifications=list(notifications))
 
 
 @task(bind=True)
@@ -28,3 +73,18 @@ def push_notification_confirm_delivery_periodically(self: BaseTask):
     services.push_notification_confirm_delivery(
         dt=self.scheduled_at,
     )
+
+
+@task()
+def push_notification_flush_scheduled_periodically():
+    services.push_notification_flush_scheduled()
+
+
+@task()
+def push_notification_purge_old_periodically():
+    if partitions.is_partitioned():
+        partitions.create_partitions(
+            now=timezone.now(), months_ahead=settings.PUSH_NOTIFICATION_PARTITIONS_MONTHS_AHEAD
+        )
+    services.push_notification_purge_old()
+    services.push_notification_prune_stale_devices()
@@ -7,3 +7,6 @@ class UsersConfig(AppConfig):
     name = "users"
     verbose_name = _("User")
     verbose_name_plural = _("Users")
+
+    def ready(self):
+        from users import signals  # noqa: F401
@@ -187,12 +187,24 @@ class User(AbstractBaseUser, PermissionsMixin, BaseModel):
     # FK Typing
     auth_token: Token
 
+    def get_notification_tokens(self) -> list[str]:
+        """The tokens of all the devices of the user, see `push_notifications.models.Device`.
+        Prefetch `devices` when calling it for many users"""
+        return [device.token for device in self.devices.all()]  # type: ignore
+
     def __str__(self):
         return self.email
 
     def get_short_name(self):
         return self.full_name.split(" ")[0]
 
+    def refresh_from_db(self, using=None, fields=None):
+        if fields is not None and getattr(self, "_from_jwt_claims", False):
+            # Built from the claims of a JWT, see `users.tokens`, all the deferred fields
+            # are loaded at once
+            fields = {*fields, *self.get_deferred_fields()}
+        super().refresh_from_db(using=using, fields=fields)
+
     class Meta:
         verbose_name = _("user")
         verbose_name_plural = _("users")
@@ -0,0 +1,33 @@
+from typing import Any
+
+import django_filters
+from django.core.exceptions import ValidationError
+from django.db.models import QuerySet
+
+from users.models import User
+
+
+class UserSegmentFilterSet(django_filters.FilterSet):
+    date_joined_after = django_filters.IsoDateTimeFilter(
+        field_name="date_joined", lookup_expr="gte"
+    )
+    date_joined_before = django_filters.IsoDateTimeFilter(
+        field_name="date_joined", lookup_expr="lt"
+    )
+    has_notification_token = django_filters.BooleanFilter(
+        field_name="notification_token", lookup_expr="isnull", exclude=True
+    )
+
+    class Meta:
+        model = User
+        fields = ["language_code", "time_zone", "is_active"]
+
+
+def user_get_segment_qs(*, filters: dict[str, Any] | None = None) -> QuerySet[User]:
+    """The users that match the `filters`, see `UserSegmentFilterSet`.
+    Unlike the filters of the listings, invalid filters raise a `ValidationError`
+    instead of being ignored, since ignoring them would widen the segment"""
+    filter_set = UserSegmentFilterSet(data=filters or {}, queryset=User.objects.all())
+    if not filter_set.is_valid():
+        raise ValidationError(filter_set.errors)
+    return filter_set.qs
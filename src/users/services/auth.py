@@ -1,10 +1,25 @@
+import functools
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, DateTimeField, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework.authtoken.models import Token
 
 from app.exceptions import ApplicationError
+from app.ext.timestamp_buffer.abc import TimestampBufferInternalService
+from app.logging.utils import get_logger
+from app.security import password_hashing
+from users import token_cache, tokens
 from users.models import User
 
+logger = get_logger(__name__)
+
+_LAST_LOGIN_BUFFER = "users:last_login"
+
 
 class InactiveOrInexistentAccount(ApplicationError):
     http_status_code = 401
@@ -17,6 +32,12 @@ class InvalidCredentials(ApplicationError):
 
 
 def authenticate(*, username, password) -> User:
+    user = _user_check_credentials(username=username, password=password)
+    user_authenticated_succesfully(user=user)
+    return user
+
+
+def _user_check_credentials(*, username, password) -> User:
     user = User.objects.filter(**{User.USERNAME_FIELD: username}).first()
     if user is None:
         raise InactiveOrInexistentAccount(
@@ -24,15 +45,32 @@ def authenticate(*, username, password) -> User:
             field_errors={"username": _("Please pick another account")},
         )
     user_check_is_valid(user=user)
-    if not user.check_password(password):
+    # Hashed on another process, see `app.security.password_hashing`
+    is_valid, must_update = password_hashing.check_password(
+        password=password, encoded=user.password
+    )
+    if not is_valid:
         raise InvalidCredentials(
             message_format_kwargs={"username": username},
             field_errors={"username": _("Password mismatch, passwords are case-sensitive")},
         )
-    user_authenticated_succesfully(user=user)
+    if must_update:
+        _user_rehash_password_in_background(user=user, password=password)
     return user
 
 
+def _user_rehash_password_in_background(*, user: User, password: str):
+    """The password was hashed by a hasher that isn't the preferred one anymore, or with
+    other parameters. It's hashed again, without making the login wait for it"""
+    previous_hash = user.password
+
+    def save(new_hash: str):
+        # Unless the password was changed in the meantime
+        User.objects.filter(pk=user.pk, password=previous_hash).update(password=new_hash)
+
+    password_hashing.make_password_in_background(password=password, callback=save)
+
+
 def user_check_is_valid(*, user: User):
     if user.is_active is False:
         raise InactiveOrInexistentAccount(
@@ -47,15 +85,128 @@ def user_authenticated_succesfully(user: User):
 
 
 def token_authenticate(*, username, password) -> tuple[User, Token]:
-    user = authenticate(username=username, password=password)
-    token, created = Token.objects.get_or_create(user=user)
-    return user, token
+    user = _user_check_credentials(username=username, password=password)
+    return user, _user_login_with_token(user=user)
+
+
+def _user_login_with_token(*, user: User) -> Token:
+    """Saves the `last_login` of the user and gets its token, creating it if the user has
+    none. On Postgres both are done with a single statement, elsewhere with one each.
+    The token is upserted, so the concurrent logins of an user without a token get the
+    same one, instead of failing to create it"""
+    if connection.vendor not in ("postgresql", "sqlite"):
+        user_authenticated_succesfully(user=user)
+        token, _created = Token.objects.get_or_create(user=user)
+        return token
+
+    user.last_login = timezone.now()
+    quote = connection.ops.quote_name
+    token_table, user_table = quote(Token._meta.db_table), quote(User._meta.db_table)
+    key_column, user_column, created_column = (
+        quote(Token._meta.get_field(name).column) for name in ("key", "user", "created")
+    )
+    created_field = Token._meta.get_field("created")
+    login_sql = (
+        f"UPDATE {user_table} SET {quote(User._meta.get_field('last_login').column)} = %s "
+        f"WHERE {quote(User._meta.pk.column)} = %s"
+    )
+    login_params = [created_field.get_db_prep_value(user.last_login, connection), user.pk]
+    # The update on conflict doesn't change anything, it's there so the existing token
+    # is returned
+    upsert_sql = (
+        f"INSERT INTO {token_table} ({key_column}, {user_column}, {created_column}) "
+        f"VALUES (%s, %s, %s) ON CONFLICT ({user_column}) "
+        f"DO UPDATE SET {key_column} = {token_table}.{key_column} "
+        f"RETURNING {key_column}, {created_column}"
+    )
+    upsert_params = [Token.generate_key(), user.pk, login_params[0]]
 
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"WITH login AS ({login_sql}) {upsert_sql}", login_params + upsert_params
+            )
+        else:
+            cursor.execute(login_sql, login_params)
+            cursor.execute(upsert_sql, upsert_params)
+        key, created = cursor.fetchone()
 
-def user_update_last_login_on_succesfull_api_authentication(user: User):
+    # The update doesn't send `post_save`, see `users.signals`
+    token_cache.invalidate_user(user_id=user.pk)
+    col = created_field.get_col(Token._meta.db_table)
+    for converter in connection.ops.get_db_converters(col) + col.get_db_converters(connection):
+        created = converter(created, col, connection)
+    return Token(key=key, user=user, created=created)
+
+
+def user_update_last_login_on_succesfull_api_authentication(*, user: User):
     """After the user is logged-in, he probably won't be authenticating very often
     because of a static token or long-lived JWT tokens, in that case the last_login
     field would not reflect the last time that the user has accessed the application.
-    But we don't do this on every single interaction to not overhead the database"""
-    if user.last_login is None or user.last_login.date() < timezone.now().date():
-        user_authenticated_succesfully(user=user)
+    But we don't do this on every single interaction to not overhead the database.
+    It's not written during the request either, it's buffered and written in bulk by
+    `user_flush_buffered_last_logins`, otherwise all the users would write it at midnight"""
+    if not _user_last_login_is_outdated(user=user):
+        return
+    if tokens.is_user_from_claims(user=user) and not cache.add(**_user_last_login_marker(user)):
+        return
+    user.last_login = timezone.now()
+    _last_login_buffer().touch(buffer=_LAST_LOGIN_BUFFER, member=user.pk, at=user.last_login)
+
+
+async def user_aupdate_last_login_on_succesfull_api_authentication(*, user: User):
+    """Same as `user_update_last_login_on_succesfull_api_authentication`, for async views"""
+    if not _user_last_login_is_outdated(user=user):
+        return
+    if tokens.is_user_from_claims(user=user) and not await cache.aadd(
+        **_user_last_login_marker(user)
+    ):
+        return
+    user.last_login = timezone.now()
+    await _last_login_buffer().atouch(buffer=_LAST_LOGIN_BUFFER, member=user.pk, at=user.last_login)
+
+
+def user_flush_buffered_last_logins(*, batch_size: int | None = None) -> int:
+    """Writes the buffered `last_login` of the users, with one UPDATE per batch. A `last_login`
+    is never moved back, e.g: when the user logged in with its password in the meantime.
+    Returns how many were flushed"""
+    batch_size = batch_size or settings.USER_LAST_LOGIN_FLUSH_BATCH_SIZE
+    buffer = _last_login_buffer()
+    flushed = 0
+    while last_logins := buffer.pop(buffer=_LAST_LOGIN_BUFFER, count=batch_size):
+        buffered = Case(
+            *(When(pk=pk, then=Value(at)) for pk, at in last_logins.items()),
+            output_field=DateTimeField(),
+        )
+        # Greatest is null if any of its values is, on every database but Postgres
+        User.objects.filter(pk__in=last_logins).update(
+            last_login=Coalesce(Greatest("last_login", buffered), buffered)
+        )
+        # The update doesn't send `post_save`, see `users.signals`
+        token_cache.invalidate_users(user_ids=list(last_logins))
+        flushed += len(last_logins)
+        if len(last_logins) < batch_size:
+            break
+    if flushed:
+        logger.info(f"Flushed the last login of {flushed} users")
+    return flushed
+
+
+@functools.cache
+def _last_login_buffer() -> TimestampBufferInternalService:
+    return TimestampBufferInternalService.service_loader()
+
+
+def _user_last_login_is_outdated(*, user: User) -> bool:
+    return user.last_login is None or user.last_login.date() < timezone.now().date()
+
+
+def _user_last_login_marker(user: User) -> dict:
+    """The users built from the JWT claims keep the previous `last_login` until their access
+    token is refreshed, so only the first request of the day, that adds this marker to the
+    cache, updates it"""
+    return {
+        "key": f"users:last_login:{user.pk}:{timezone.now().date().isoformat()}",
+        "value": True,
+        "timeout": 60 * 60 * 24,
+    }
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from users import token_cache
+from users.models import User
+
+
+@receiver(post_save, sender=User, dispatch_uid="users.invalidate_cached_token")
+def invalidate_cached_token_on_user_save(sender, instance: User, **kwargs):
+    """Any change to the user (deactivation, account deletion, the daily `last_login`, ...)
+    must be seen by its next request, not only after the token cache expires"""
+    token_cache.invalidate_user(user_id=instance.pk)
+
+
+@receiver(post_delete, sender=Token, dispatch_uid="users.invalidate_deleted_token")
+def invalidate_cached_token_on_delete(sender, instance: Token, **kwargs):
+    token_cache.invalidate(key=instance.key)
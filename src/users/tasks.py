@@ -0,0 +1,7 @@
+from app.celery.decorators import task
+from users.services import auth
+
+
+@task()
+def user_flush_buffered_last_logins_periodically():
+    auth.user_flush_buffered_last_logins()
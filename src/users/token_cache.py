@@ -0,0 +1,153 @@
+"""Caches the API tokens with their users, so authenticating a request with a `Token` doesn't
+join the token and user tables every time.
+The tokens are kept in the shared cache (redis) for `AUTH_TOKEN_CACHE_TIMEOUT` seconds, and
+in front of it, in a small LRU of each process for `AUTH_TOKEN_CACHE_LOCAL_TIMEOUT` seconds.
+A token is removed from both when it's deleted or when its user is saved (e.g: deactivated or
+had the account deleted), see `users.signals`. The LRUs of the other processes aren't reached,
+so they may still accept a revoked token for up to `AUTH_TOKEN_CACHE_LOCAL_TIMEOUT` seconds"""
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Collection
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+
+
+class _LocalCache:
+    """A thread-safe LRU whose entries expire. The tokens are kept pickled, so each request
+    gets its own token and user instances"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, int, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Token | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _user_id, pickled = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key: str, token: Token) -> None:
+        timeout = settings.AUTH_TOKEN_CACHE_LOCAL_TIMEOUT
+        max_size = settings.AUTH_TOKEN_CACHE_LOCAL_MAX_SIZE
+        if timeout <= 0 or max_size <= 0:
+            return
+        entry = (self.clock() + timeout, token.user_id, pickle.dumps(token))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_users(self, user_ids: Collection[int]) -> None:
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[1] in user_ids]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = _LocalCache()
+
+
+def is_enabled() -> bool:
+    return settings.AUTH_TOKEN_CACHE_TIMEOUT > 0
+
+
+def _token_cache_key(key: str) -> str:
+    # The tokens are credentials, so they're not used as the cache keys as they are
+    return f"auth_token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def _user_cache_key(user_id: int) -> str:
+    return f"auth_token:user:{user_id}"
+
+
+def get(*, key: str) -> Token | None:
+    """The token with its `user` selected, if it's cached"""
+    if not is_enabled():
+        return None
+    token = local_cache.get(key)
+    if token is None:
+        token = cache.get(_token_cache_key(key))
+        if token is not None:
+            local_cache.set(key, token)
+    return token
+
+
+async def aget(*, key: str) -> Token | None:
+    if not is_enabled():
+        return None
+    token = local_cache.get(key)
+    if token is None:
+        token = await cache.aget(_token_cache_key(key))
+        if token is not None:
+            local_cache.set(key, token)
+    return token
+
+
+def store(*, token: Token) -> None:
+    """Caches a token, its `user` must be selected already"""
+    if not is_enabled():
+        return
+    cache.set_many(
+        {_token_cache_key(token.key): token, _user_cache_key(token.user_id): token.key},
+        timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT,
+    )
+    local_cache.set(token.key, token)
+
+
+async def astore(*, token: Token) -> None:
+    if not is_enabled():
+        return
+    await cache.aset_many(
+        {_token_cache_key(token.key): token, _user_cache_key(token.user_id): token.key},
+        timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT,
+    )
+    local_cache.set(token.key, token)
+
+
+def invalidate(*, key: str) -> None:
+    cache.delete(_token_cache_key(key))
+    local_cache.delete(key)
+
+
+def invalidate_user(*, user_id: int) -> None:
+    """Removes the token of the user, so its next request loads the user again"""
+    key = cache.get(_user_cache_key(user_id))
+    if key is not None:
+        cache.delete_many([_token_cache_key(key), _user_cache_key(user_id)])
+    local_cache.delete_users({user_id})
+
+
+def invalidate_users(*, user_ids: list[int]) -> None:
+    """Same as `invalidate_user`, for many users at once"""
+    user_keys = [_user_cache_key(user_id) for user_id in user_ids]
+    keys = cache.get_many(user_keys)
+    if keys:
+        cache.delete_many([*keys, *(_token_cache_key(key) for key in keys.values())])
+    local_cache.delete_users(set(user_ids))
+
+
+async def ainvalidate_user(*, user_id: int) -> None:
+    key = await cache.aget(_user_cache_key(user_id))
+    if key is not None:
+        await cache.adelete_many([_token_cache_key(key), _user_cache_key(user_id)])
+    local_cache.delete_users({user_id})
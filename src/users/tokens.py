@@ -0,0 +1,79 @@
+"""JWTs whose access tokens carry the preferences of the user (`USER_CLAIM`), so the requests
+authenticated with them can build the `request.user` without querying the database, see
+`app.drf.authentication.LastLoginAwareJwtAuthentication`. Enabled by `JWT_STATELESS_USER`.
+The claims are read again from the database whenever an access token is refreshed, so
+changes to the user take up to `ACCESS_TOKEN_LIFETIME_MINUTES` to be seen by its requests,
+including its deactivation"""
+from typing import Any
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from users.models import User
+
+USER_CLAIM = "usr"
+# Fields of the user that are embedded on the access tokens, the `last_login` is there so
+# the authentication knows when to update it
+USER_CLAIM_FIELDS = ("time_zone", "language_code", "is_active", "is_staff", "last_login")
+
+
+def is_enabled() -> bool:
+    return settings.JWT_STATELESS_USER and not jwt_settings.CHECK_REVOKE_TOKEN
+
+
+def get_user_claims(*, user: User) -> dict[str, Any]:
+    claims = {field: getattr(user, field) for field in USER_CLAIM_FIELDS}
+    claims["last_login"] = user.last_login and user.last_login.isoformat()
+    return claims
+
+
+def get_user_from_claims(*, user_id: int, claims: dict[str, Any]) -> User:
+    """An user with only the fields of the claims loaded, all the others are deferred and
+    are loaded together, with a single query, when any of them is first accessed"""
+    values = {**claims, "id": user_id}
+    if values.get("last_login"):
+        values["last_login"] = parse_datetime(values["last_login"])
+    # `from_db` expects the values in the same order of the fields of the model
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    user = User.from_db("default", field_names, [values[name] for name in field_names])
+    user._from_jwt_claims = True  # type: ignore
+    return user
+
+
+def is_user_from_claims(*, user: User) -> bool:
+    return getattr(user, "_from_jwt_claims", False)
+
+
+class RefreshToken(tokens.RefreshToken):
+    """Adds the `USER_CLAIM` to the access tokens, the refresh tokens don't have it"""
+
+    no_copy_claims = (*tokens.RefreshToken.no_copy_claims, USER_CLAIM)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user: User | None = None
+
+    @classmethod
+    def for_user(cls, user: User) -> "RefreshToken":
+        token = super().for_user(user)
+        token.user = user  # type: ignore
+        return token  # type: ignore
+
+    @property
+    def access_token(self) -> tokens.AccessToken:
+        access = super().access_token
+        if is_enabled():
+            access[USER_CLAIM] = get_user_claims(user=self.user or self.get_user())
+        return access
+
+    def get_user(self) -> User:
+        try:
+            return User.objects.get(
+                **{jwt_settings.USER_ID_FIELD: self[jwt_settings.USER_ID_CLAIM]}
+            )
+        except (KeyError, User.DoesNotExist):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
@@ -39,3 +39,17 @@ def set_log_events_context():
     from app.logging.utils import _log_events
 
     _log_events.set([])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    from app.ext.push_notifications.backends import expo
+    from users import token_cache
+    from users.services import auth
+
+    cache.clear()
+    token_cache.local_cache.clear()
+    auth._last_login_buffer.cache_clear()
+    expo._rate_limiter.cache_clear()
@@ -3,6 +3,7 @@ from django.test.client import Client
 from django.urls import reverse
 
 from app.consts.http import HttpStatusCode
+from app.security import password_hashing
 from users.models import User
 from users.services import auth
 
@@ -67,3 +68,19 @@ def test_auth_jwt_refresh_token(client: Client, visitor_user: User):
     refresh_data = response.json()
     assert "access" in refresh_data
     assert "refresh" in refresh_data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url_name", AUTHENTICATION_URL_NAMES)
+def test_auth_too_many_logins(client: Client, visitor_user: User, url_name, monkeypatch):
+    def check_password(**kwargs):
+        raise password_hashing.PasswordHashingUnavailable()
+
+    monkeypatch.setattr(password_hashing, "check_password", check_password)
+
+    url = reverse(url_name)
+    response = client.post(
+        url, data={"username": visitor_user.get_username(), "password": "password"}
+    )
+    assert response.status_code == HttpStatusCode.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["kind"] == password_hashing.PasswordHashingUnavailable.__name__
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test.client import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from app.consts.http import HttpStatusCode
+from users.models import User
+from users.services.auth import user_flush_buffered_last_logins
+
+UNREAD_COUNT_URL = "api:v1:push_notifications:notifications-unread-count"
+
+
+@pytest.fixture(autouse=True)
+def stateless_user(settings):
+    settings.JWT_STATELESS_USER = True
+
+
+def login(client: Client, user: User) -> dict[str, str]:
+    response = client.post(
+        reverse("api:v1:auth:auth-jwt-token"),
+        data={"username": user.get_username(), "password": "password"},
+    )
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    return response.json()["token"]
+
+
+def refresh(client: Client, token: dict[str, str]) -> dict[str, str]:
+    response = client.post(reverse("api:v1:auth:auth-jwt-refresh"), data=token)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    return response.json()
+
+
+def get(client: Client, url_name: str, token: dict[str, str]):
+    return client.get(reverse(url_name), HTTP_AUTHORIZATION=f"Bearer {token['access']}")
+
+
+@pytest.mark.django_db
+def test_jwt_stateless_user_doesnt_query_the_user(
+    client: Client, visitor_user: User, django_assert_num_queries
+):
+    token = login(client, visitor_user)
+    get(client, UNREAD_COUNT_URL, token)
+
+    # The unread count is cached after the first request
+    with django_assert_num_queries(0):
+        response = get(client, UNREAD_COUNT_URL, token)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+
+    # The fields that aren't on the claims are loaded together
+    with django_assert_num_queries(1):
+        response = get(client, "api:v1:users:me-list", token)
+    assert response.json()["email"] == visitor_user.email
+    assert response.json()["full_name"] == visitor_user.full_name
+
+
+@pytest.mark.django_db
+def test_jwt_stateless_user_async(
+    client: Client, async_client: AsyncClient, visitor_user: User, django_assert_num_queries
+):
+    token = login(client, visitor_user)
+    url = reverse("api:v1:push_notifications_async:unread-count")
+    headers = {"Authorization": f"Bearer {token['access']}"}
+    async_to_sync(async_client.get)(url, headers=headers)
+
+    with django_assert_num_queries(0):
+        response = async_to_sync(async_client.get)(url, headers=headers)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_jwt_stateless_user_changes_are_seen_after_refreshing(client: Client, visitor_user: User):
+    token = login(client, visitor_user)
+    visitor_user.language_code = "en-us"
+    visitor_user.save()
+    response = get(client, "api:v1:users:me-list", token)
+    assert response.json()["language_code"]["value"] == "pt-br"
+
+    token = refresh(client, token)
+    response = get(client, "api:v1:users:me-list", token)
+    assert response.json()["language_code"]["value"] == "en-us"
+
+    visitor_user.is_active = False
+    visitor_user.save()
+    assert get(client, UNREAD_COUNT_URL, token).status_code == HttpStatusCode.HTTP_200_OK
+    token = refresh(client, token)
+    assert get(client, UNREAD_COUNT_URL, token).status_code == (
+        HttpStatusCode.HTTP_401_UNAUTHORIZED
+    )
+
+
+@pytest.mark.django_db
+def test_jwt_stateless_user_updates_the_last_login_once_a_day(
+    client: Client, visitor_user: User, django_assert_num_queries
+):
+    token = login(client, visitor_user)
+    yesterday = timezone.now() - timedelta(days=1)
+    User.objects.filter(pk=visitor_user.pk).update(last_login=yesterday)
+    token = refresh(client, token)
+    get(client, UNREAD_COUNT_URL, token)
+    user_flush_buffered_last_logins()
+    visitor_user.refresh_from_db()
+    assert visitor_user.last_login.date() == timezone.now().date()
+
+    User.objects.filter(pk=visitor_user.pk).update(last_login=yesterday)
+    with django_assert_num_queries(0):
+        get(client, UNREAD_COUNT_URL, token)
+    user_flush_buffered_last_logins()
+    visitor_user.refresh_from_db()
+    assert visitor_user.last_login == yesterday
+
+
+@pytest.mark.django_db
+def test_jwt_without_user_claims_queries_the_user(
+    client: Client, visitor_user: User, settings, django_assert_num_queries
+):
+    settings.JWT_STATELESS_USER = False
+    token = login(client, visitor_user)
+    get(client, UNREAD_COUNT_URL, token)
+
+    with django_assert_num_queries(1):
+        response = get(client, UNREAD_COUNT_URL, token)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
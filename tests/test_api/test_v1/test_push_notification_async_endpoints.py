@@ -0,0 +1,203 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test.client import AsyncClient
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.consts.http import HttpStatusCode
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def notifications(visitor_user: User) -> list[models.PushNotification]:
+    return [
+        services.push_notification_create(
+            user=visitor_user, kind="int_comm", title=f"Hey {i}!", description="Hello world"
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def token_headers(visitor_user: User) -> dict[str, str]:
+    token = Token.objects.create(user=visitor_user)
+    return {"Authorization": f"Token {token.key}"}
+
+
+@pytest.fixture
+def jwt_headers(visitor_user: User) -> dict[str, str]:
+    access_token = RefreshToken.for_user(visitor_user).access_token
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def send(async_client: AsyncClient, method: str, url: str, **kwargs):
+    return async_to_sync(getattr(async_client, method.lower()))(url, **kwargs)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "method_name,url_name,reverse_args",
+    [
+        ("GET", "api:v1:push_notifications_async:list", ()),
+        ("GET", "api:v1:push_notifications_async:unread-count", ()),
+        ("PATCH", "api:v1:push_notifications_async:read", (1,)),
+        ("PATCH", "api:v1:push_notifications_async:read-many", ()),
+        ("PUT", "api:v1:push_notifications_async:token", ()),
+        ("DELETE", "api:v1:push_notifications_async:token", ()),
+    ],
+)
+def test_pn_async_endpoints_requires_authentication(
+    async_client: AsyncClient, method_name, url_name, reverse_args
+):
+    response = send(async_client, method_name, reverse(url_name, args=reverse_args))
+    assert response.status_code == HttpStatusCode.HTTP_401_UNAUTHORIZED
+    assert response.json()["kind"] == "NotAuthenticated"
+
+
+@pytest.mark.django_db
+def test_pn_async_endpoints_reject_invalid_credentials(async_client: AsyncClient):
+    url = reverse("api:v1:push_notifications_async:list")
+    response = send(async_client, "GET", url, headers={"Authorization": "Token foo"})
+    assert response.status_code == HttpStatusCode.HTTP_401_UNAUTHORIZED
+    response = send(async_client, "GET", url, headers={"Authorization": "Bearer foo"})
+    assert response.status_code == HttpStatusCode.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("headers_fixture", ["token_headers", "jwt_headers"])
+def test_pn_async_list_matches_the_sync_one(
+    notifications: list[models.PushNotification],
+    visitor_user: User,
+    async_client: AsyncClient,
+    client,
+    headers_fixture: str,
+    request: pytest.FixtureRequest,
+):
+    headers = request.getfixturevalue(headers_fixture)
+    url = reverse("api:v1:push_notifications_async:list")
+
+    response = send(async_client, "GET", url, data={"limit": 2}, headers=headers)
+
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    data = response.json()
+    client.force_login(user=visitor_user)
+    sync_data = client.get(
+        reverse("api:v1:push_notifications:notifications-list"), data={"limit": 2}
+    ).json()
+    assert data["results"] == sync_data["results"]
+    assert data["previous"] is None
+
+    last_page = send(async_client, "GET", data["next"], headers=headers).json()
+    assert [result["id"] for result in last_page["results"]] == [notifications[0].id]
+    assert last_page["next"] is None
+    visitor_user.refresh_from_db()
+    assert visitor_user.last_login is not None
+
+
+@pytest.mark.django_db
+def test_pn_async_list_invalid_params(
+    notifications: list[models.PushNotification],
+    async_client: AsyncClient,
+    token_headers: dict[str, str],
+):
+    url = reverse("api:v1:push_notifications_async:list")
+    response = send(async_client, "GET", url, data={"only_read": "foo"}, headers=token_headers)
+    assert response.status_code == HttpStatusCode.HTTP_400_BAD_REQUEST
+    response = send(async_client, "GET", url, data={"cursor": "foo"}, headers=token_headers)
+    assert response.status_code == HttpStatusCode.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_pn_async_read_and_unread_count(
+    notifications: list[models.PushNotification],
+    async_client: AsyncClient,
+    token_headers: dict[str, str],
+    settings,
+):
+    settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT = 0
+    unread_count_url = reverse("api:v1:push_notifications_async:unread-count")
+    assert send(async_client, "GET", unread_count_url, headers=token_headers).json() == {"count": 3}
+
+    read_url = reverse("api:v1:push_notifications_async:read", args=(notifications[0].id,))
+    response = send(async_client, "PATCH", read_url, headers=token_headers)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    assert response.json()["read_at"] is not None
+    # Reading twice doesn't decrement twice
+    send(async_client, "PATCH", read_url, headers=token_headers)
+    assert send(async_client, "GET", unread_count_url, headers=token_headers).json() == {"count": 2}
+
+    response = send(
+        async_client,
+        "PATCH",
+        reverse("api:v1:push_notifications_async:read-many"),
+        data={"ids": None},
+        content_type="application/json",
+        headers=token_headers,
+    )
+    assert response.json() == {"read": 2}
+    assert send(async_client, "GET", unread_count_url, headers=token_headers).json() == {"count": 0}
+
+
+@pytest.mark.django_db
+def test_pn_async_read_id_from_other_user_404(
+    notifications: list[models.PushNotification], async_client: AsyncClient
+):
+    other_user = User.objects.create(email="jane@doe.com", full_name="Jane Doe")
+    token = Token.objects.create(user=other_user)
+    url = reverse("api:v1:push_notifications_async:read", args=(notifications[0].id,))
+
+    response = send(async_client, "PATCH", url, headers={"Authorization": f"Token {token.key}"})
+
+    assert response.status_code == HttpStatusCode.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_pn_async_token_set_and_delete(
+    visitor_user: User, async_client: AsyncClient, jwt_headers: dict[str, str]
+):
+    url = reverse("api:v1:push_notifications_async:token")
+
+    response = send(
+        async_client,
+        "PUT",
+        url,
+        data={"notification_token": "ExponentPushToken[1]"},
+        content_type="application/json",
+        headers=jwt_headers,
+    )
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    assert visitor_user.get_notification_tokens() == ["ExponentPushToken[1]"]
+    visitor_user.refresh_from_db()
+    assert visitor_user.notification_token == "ExponentPushToken[1]"
+
+    response = send(
+        async_client,
+        "PUT",
+        url,
+        data={"notification_token": ""},
+        content_type="application/json",
+        headers=jwt_headers,
+    )
+    assert response.status_code == HttpStatusCode.HTTP_400_BAD_REQUEST
+
+    response = send(async_client, "DELETE", url, headers=jwt_headers)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    assert visitor_user.get_notification_tokens() == []
+    visitor_user.refresh_from_db()
+    assert visitor_user.notification_token is None
+
+
+@pytest.mark.django_db
+def test_pn_async_endpoints_go_through_the_middlewares(
+    visitor_user: User, async_client: AsyncClient, token_headers: dict[str, str]
+):
+    response = send(
+        async_client,
+        "GET",
+        reverse("api:v1:push_notifications_async:unread-count"),
+        headers=token_headers,
+    )
+    assert response.headers["x-tz-name"]
+    assert response.headers["Content-Language"]
@@ -0,0 +1,123 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.asgi import application
+from push_notifications import models, services
+from users.models import User
+
+URL = "/ws/v1/notifications"
+
+
+class WebsocketCommunicator(ApplicationCommunicator):
+    """Like the one of `channels.testing`, that can't be imported without daphne"""
+
+    def __init__(self, path: str, query_string: str = "", headers=()):
+        super().__init__(
+            application,
+            {
+                "type": "websocket",
+                "path": path,
+                "query_string": query_string.encode(),
+                "headers": list(headers),
+                "subprotocols": [],
+            },
+        )
+
+    async def connect(self) -> bool:
+        await self.send_input({"type": "websocket.connect"})
+        return (await self.receive_output())["type"] == "websocket.accept"
+
+    async def receive_json_from(self):
+        message = await self.receive_output()
+        assert message["type"] == "websocket.send", message
+        return json.loads(message["text"])
+
+    async def disconnect(self):
+        await self.send_input({"type": "websocket.disconnect", "code": 1000})
+        await self.wait()
+
+
+def create_notification(user: User) -> models.PushNotification:
+    return services.push_notification_create(
+        user=user, kind="int_comm", title="Hey!", description="Hello world", data={"foo": "bar"}
+    )
+
+
+@pytest.mark.django_db
+def test_pn_consumer_closes_without_credentials(visitor_user: User):
+    async def scenario():
+        communicator = WebsocketCommunicator(URL)
+        assert await communicator.connect()
+        assert await communicator.receive_output() == {"type": "websocket.close", "code": 4401}
+
+        communicator = WebsocketCommunicator(URL, "authorization=Token%20foo")
+        assert await communicator.connect()
+        assert await communicator.receive_output() == {"type": "websocket.close", "code": 4401}
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+def test_pn_consumer_sends_new_notifications_and_unread_counts(
+    visitor_user: User, django_capture_on_commit_callbacks, settings
+):
+    settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT = 0
+    create_notification(visitor_user)
+    token = Token.objects.create(user=visitor_user)
+
+    def create_and_read():
+        with django_capture_on_commit_callbacks(execute=True):
+            notification = create_notification(visitor_user)
+        with django_capture_on_commit_callbacks(execute=True):
+            services.push_notification_read_many(reader=visitor_user, ids=[])
+        return notification
+
+    async def scenario():
+        communicator = WebsocketCommunicator(
+            URL, headers=[(b"authorization", f"Token {token.key}".encode())]
+        )
+        assert await communicator.connect()
+        assert await communicator.receive_json_from() == {"type": "unread_count", "count": 1}
+
+        notification = await sync_to_async(create_and_read)()
+
+        event = await communicator.receive_json_from()
+        assert event["type"] == "notification"
+        assert event["notification"]["id"] == notification.id
+        assert event["notification"]["title"] == "Hey!"
+        assert event["notification"]["data"]["meta"] == {"foo": "bar"}
+        assert event["notification"]["kind"]["value"] == "int_comm"
+        assert await communicator.receive_json_from() == {"type": "unread_count", "count": 2}
+        assert await communicator.receive_json_from() == {"type": "unread_count", "count": 0}
+        await communicator.disconnect()
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+def test_pn_consumer_only_receives_the_events_of_its_user(
+    visitor_user: User, django_capture_on_commit_callbacks
+):
+    other_user = User.objects.create(email="jane@doe.com", full_name="Jane Doe")
+    access_token = RefreshToken.for_user(visitor_user).access_token
+
+    def create_for_other_user():
+        with django_capture_on_commit_callbacks(execute=True):
+            create_notification(other_user)
+
+    async def scenario():
+        communicator = WebsocketCommunicator(URL, f"authorization=Bearer%20{access_token}")
+        assert await communicator.connect()
+        assert await communicator.receive_json_from() == {"type": "unread_count", "count": 0}
+
+        await sync_to_async(create_for_other_user)()
+
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+
+    async_to_sync(scenario)()
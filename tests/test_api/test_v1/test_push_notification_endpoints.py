@@ -27,6 +27,7 @@ def visitor_notification(visitor_user: User):
     "method_name,url_name,reverse_args",
     [
         ("GET", "api:v1:push_notifications:notifications-list", ()),
+        ("GET", "api:v1:push_notifications:notifications-unread-count", ()),
         ("PATCH", "api:v1:push_notifications:notifications-read", (1,)),
         ("PATCH", "api:v1:push_notifications:notifications-read-many", ()),
         ("PUT", "api:v1:push_notifications:notifications-token", ()),
@@ -70,6 +71,7 @@ def test_pn_list_returns_expected_output(visitor_notification: PushNotification,
             "readAt": None,
             "timeSinceCreated": timesince(visitor_notification.created_at),
             "kind": visitor_notification.kind,
+            "collapseKey": None,
             "meta": visitor_notification.data,
         },
     }
@@ -103,6 +105,50 @@ def test_pn_list_query_params_valid(visitor_notification: PushNotification, clie
     assert len(response.json()["results"]) == 0
 
 
+@pytest.mark.django_db
+def test_pn_list_paginates_with_cursor(
+    visitor_user: User, client: Client, django_assert_max_num_queries
+):
+    notifications = [
+        services.push_notification_create(
+            user=visitor_user, kind="int_comm", title=f"Hey {i}!", description="Hello world"
+        )
+        for i in range(5)
+    ]
+    newest_first = [notification.id for notification in reversed(notifications)]
+    url = reverse("api:v1:push_notifications:notifications-list")
+    client.force_login(user=visitor_user)
+
+    response = client.get(url, data={"limit": 2})
+    data = response.json()
+    assert "count" not in data
+    assert [result["id"] for result in data["results"]] == newest_first[:2]
+    assert data["previous"] is None
+
+    with django_assert_max_num_queries(3) as ctx:
+        # The session, the user and the page itself, no COUNT
+        response = client.get(data["next"])
+    assert not any("COUNT(" in query["sql"] for query in ctx.captured_queries)
+    data = response.json()
+    assert [result["id"] for result in data["results"]] == newest_first[2:4]
+
+    last_page = client.get(data["next"]).json()
+    assert [result["id"] for result in last_page["results"]] == newest_first[4:]
+    assert last_page["next"] is None
+
+    previous_page = client.get(last_page["previous"]).json()
+    assert [result["id"] for result in previous_page["results"]] == newest_first[2:4]
+    assert previous_page["next"] is not None
+
+
+@pytest.mark.django_db
+def test_pn_list_invalid_cursor(visitor_notification: PushNotification, client: Client):
+    url = reverse("api:v1:push_notifications:notifications-list")
+    client.force_login(user=visitor_notification.user)
+    response = client.get(url, data={"cursor": "foo"})
+    assert response.status_code == HttpStatusCode.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.django_db
 def test_pn_read_many_all_valid_ids(visitor_notification: PushNotification, client: Client):
     url = reverse("api:v1:push_notifications:notifications-read-many")
@@ -229,3 +275,19 @@ def test_pn_delete_token(client: Client, visitor_user: User):
     with pytest.raises(TypeError):
         # We don't return any data, so trying to get the json should return an error
         response.json()
+
+
+@pytest.mark.django_db
+def test_pn_unread_count_returns_expected_output(
+    visitor_notification: PushNotification, client: Client
+):
+    url = reverse("api:v1:push_notifications:notifications-unread-count")
+    client.force_login(user=visitor_notification.user)
+
+    response = client.get(url)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    assert response.json() == {"count": 1}
+
+    services.push_notification_read(push_notification=visitor_notification)
+    response = client.get(url)
+    assert response.json() == {"count": 0}
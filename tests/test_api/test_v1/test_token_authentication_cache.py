@@ -0,0 +1,84 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test.client import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from app.consts.http import HttpStatusCode
+from users.models import User
+from users.services.account import user_delete_account
+
+
+@pytest.fixture
+def token(visitor_user: User) -> Token:
+    # Logged in today, so authenticating doesn't update it
+    visitor_user.last_login = timezone.now()
+    visitor_user.save(update_fields=["last_login"])
+    return Token.objects.create(user=visitor_user)
+
+
+def get_me(client: Client, token: Token):
+    return client.get(reverse("api:v1:users:me-list"), HTTP_AUTHORIZATION=f"Token {token.key}")
+
+
+@pytest.mark.django_db
+def test_token_authentication_warm_requests_dont_query(
+    client: Client, token: Token, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        assert get_me(client, token).status_code == HttpStatusCode.HTTP_200_OK
+
+    with django_assert_num_queries(0):
+        response = get_me(client, token)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
+    assert response.json()["id"] == token.user_id
+
+
+@pytest.mark.django_db
+def test_token_authentication_cache_is_invalidated(client: Client, token: Token):
+    assert get_me(client, token).status_code == HttpStatusCode.HTTP_200_OK
+
+    user = User.objects.get(pk=token.user_id)
+    user.full_name = "Jane Doe"
+    user.save()
+    assert get_me(client, token).json()["full_name"] == "Jane Doe"
+
+    user.is_active = False
+    user.save()
+    assert get_me(client, token).status_code == HttpStatusCode.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_token_authentication_cache_is_invalidated_on_account_deletion(
+    client: Client, token: Token
+):
+    assert get_me(client, token).status_code == HttpStatusCode.HTTP_200_OK
+
+    user_delete_account(User.objects.get(pk=token.user_id))
+
+    assert get_me(client, token).status_code == HttpStatusCode.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_token_authentication_cache_is_invalidated_on_token_deletion(client: Client, token: Token):
+    assert get_me(client, token).status_code == HttpStatusCode.HTTP_200_OK
+
+    token.delete()
+
+    assert get_me(client, token).status_code == HttpStatusCode.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_async_token_authentication_shares_the_cache(
+    client: Client, async_client: AsyncClient, token: Token, django_assert_num_queries
+):
+    assert get_me(client, token).status_code == HttpStatusCode.HTTP_200_OK
+
+    url = reverse("api:v1:push_notifications_async:unread-count")
+    headers = {"Authorization": f"Token {token.key}"}
+    async_to_sync(async_client.get)(url, headers=headers)
+    # Only the unread count is queried, and it's cached after the first request
+    with django_assert_num_queries(0):
+        response = async_to_sync(async_client.get)(url, headers=headers)
+    assert response.status_code == HttpStatusCode.HTTP_200_OK
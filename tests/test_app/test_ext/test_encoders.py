@@ -0,0 +1,68 @@
+import json
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy as _
+
+from app.ext import encoders
+
+requires_orjson = pytest.mark.skipif(encoders.orjson is None, reason="orjson is not installed")
+
+
+@pytest.fixture(autouse=True)
+def clear_json_encoder():
+    encoders.get_json_encoder.cache_clear()
+    yield
+    encoders.get_json_encoder.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "encoder_class",
+    [encoders.StdlibJSONEncoder, pytest.param(encoders.OrjsonJSONEncoder, marks=requires_orjson)],
+)
+def test_json_encoders_encode_django_types(encoder_class: type[encoders.PayloadEncoder]):
+    payload = {"title": _("Hey you, yes you!"), "price": Decimal("1.50"), "body": "Olá"}
+
+    encoded = encoder_class().encode(payload)
+
+    assert json.loads(encoded) == {"title": "Hey you, yes you!", "price": "1.50", "body": "Olá"}
+
+
+@requires_orjson
+def test_json_encoders_produce_the_same_bytes():
+    payload = {"to": "ExponentPushToken[1]", "data": {"foo": "bar", "n": 1}, "body": "Olá"}
+
+    assert encoders.StdlibJSONEncoder().encode(payload) == encoders.OrjsonJSONEncoder().encode(
+        payload
+    )
+
+
+def test_encode_json_array_joins_encoded_items():
+    encoder = encoders.StdlibJSONEncoder()
+    items = [{"id": 1}, {"id": 2}]
+
+    body = encoders.encode_json_array(encoder.encode(item) for item in items)
+
+    assert json.loads(body) == items
+    assert encoders.encode_json_array([]) == b"[]"
+
+
+@pytest.mark.parametrize(
+    "setting, expected_class",
+    [
+        pytest.param("auto", encoders.OrjsonJSONEncoder, marks=requires_orjson),
+        pytest.param("orjson", encoders.OrjsonJSONEncoder, marks=requires_orjson),
+        ("stdlib", encoders.StdlibJSONEncoder),
+    ],
+)
+def test_get_json_encoder_follows_the_setting(settings, setting, expected_class):
+    settings.EXTERNAL_SERVICES_JSON_ENCODER = setting
+
+    assert isinstance(encoders.get_json_encoder(), expected_class)
+
+
+def test_get_json_encoder_falls_back_to_stdlib(settings, mocker):
+    settings.EXTERNAL_SERVICES_JSON_ENCODER = "auto"
+    mocker.patch.object(encoders, "orjson", None)
+
+    assert isinstance(encoders.get_json_encoder(), encoders.StdlibJSONEncoder)
@@ -0,0 +1,181 @@
+import json
+import uuid
+
+import pytest
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from app.ext.push_notifications.backends.expo import ExpoPushNotificationExternalService
+from push_notifications.models import PushNotification
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def devices(mocker: MockerFixture):
+    """Every user has a single device, unless told otherwise, without touching the database"""
+    tokens: dict[int, list[str]] = {}
+    mocker.patch.object(
+        User,
+        "get_notification_tokens",
+        autospec=True,
+        side_effect=lambda user: tokens.get(user.id, [f"ExponentPushToken[{user.id}]"]),
+    )
+    return tokens
+
+
+@pytest.fixture
+def pushes() -> list[PushNotification]:
+    now = timezone.now()
+    return [
+        PushNotification(
+            id=i,
+            user=User(id=i),
+            kind="int_comm",
+            title="Hey you, yes you!",
+            description="We have a new vaccine available",
+            data={},
+            created_at=now,
+        )
+        for i in range(1, 251)
+    ]
+
+
+def fake_expo_response(mocker: MockerFixture, url, data, headers, timeout):
+    """Answers with a ticket that carries the token it was sent to"""
+    assert headers["Content-Type"] == "application/json"
+    response = mocker.Mock(status_code=200, text="")
+    response.json.return_value = {
+        "data": [{"status": "ok", "id": str(uuid.uuid4()), "to": m["to"]} for m in json.loads(data)]
+    }
+    return response
+
+
+@pytest.mark.parametrize("max_concurrent_requests", [1, 4])
+def test_expo_bulk_send_maps_tickets_to_their_notifications(
+    pushes: list[PushNotification], mocker: MockerFixture, max_concurrent_requests: int
+):
+    service = ExpoPushNotificationExternalService(max_concurrent_requests=max_concurrent_requests)
+    post = mocker.patch.object(
+        service.s, "post", side_effect=lambda **kw: fake_expo_response(mocker, **kw)
+    )
+
+    tickets = service.bulk_send(pushes)
+
+    assert post.call_count == 3
+    assert list(tickets) == [str(push.id) for push in pushes]
+    for push in pushes:
+        assert [ticket["to"] for ticket in tickets[str(push.id)]] == [  # type: ignore
+            f"ExponentPushToken[{push.user.id}]"
+        ]
+
+
+def test_expo_bulk_send_keeps_tickets_of_succeeded_chunks(
+    pushes: list[PushNotification], mocker: MockerFixture
+):
+    def post(**kwargs):
+        if json.loads(kwargs["data"])[0]["to"] == f"ExponentPushToken[{pushes[100].user.id}]":
+            raise requests.Timeout()
+        return fake_expo_response(mocker, **kwargs)
+
+    service = ExpoPushNotificationExternalService(max_concurrent_requests=4)
+    mocker.patch.object(service.s, "post", side_effect=post)
+
+    tickets = service.bulk_send(pushes)
+
+    assert len(tickets) == 150
+    assert str(pushes[100].id) not in tickets
+
+
+def test_expo_bulk_send_throttles_each_chunk(pushes: list[PushNotification], mocker: MockerFixture):
+    service = ExpoPushNotificationExternalService(max_concurrent_requests=1)
+    mocker.patch.object(
+        service.s, "post", side_effect=lambda **kw: fake_expo_response(mocker, **kw)
+    )
+    wait = mocker.spy(service.rate_limiter, "wait")
+
+    service.bulk_send(pushes)
+
+    assert [call.kwargs["tokens"] for call in wait.call_args_list] == [100, 100, 50]
+    assert service.rate_limiter.get_metrics(bucket=service._RATE_LIMIT_BUCKET)["acquired"] == 250
+
+
+def test_expo_bulk_send_slows_down_when_rate_limited(
+    pushes: list[PushNotification], mocker: MockerFixture
+):
+    def post(**kwargs):
+        response = fake_expo_response(mocker, **kwargs)
+        tickets = response.json.return_value["data"]
+        tickets[0] = {
+            "status": "error",
+            "message": "Too fast",
+            "details": {"error": "MessageRateExceeded"},
+        }
+        return response
+
+    service = ExpoPushNotificationExternalService(max_concurrent_requests=1)
+    mocker.patch.object(service.s, "post", side_effect=post)
+    mocker.patch("app.ext.rate_limit.abc.time.sleep")
+
+    service.bulk_send(pushes[:100])
+
+    metrics = service.rate_limiter.get_metrics(bucket=service._RATE_LIMIT_BUCKET)
+    assert metrics["penalties"] == 1
+    assert metrics["rate"] < settings.PUSH_NOTIFICATION_EXPO_RATE_LIMIT
+
+
+def test_expo_bulk_send_slows_down_on_too_many_requests(
+    pushes: list[PushNotification], mocker: MockerFixture
+):
+    service = ExpoPushNotificationExternalService(max_concurrent_requests=1)
+    mocker.patch.object(service.s, "post", return_value=mocker.Mock(status_code=429, text=""))
+
+    tickets = service.bulk_send(pushes[:100])
+
+    assert tickets == {}
+    metrics = service.rate_limiter.get_metrics(bucket=service._RATE_LIMIT_BUCKET)
+    assert metrics["penalties"] == 1
+
+
+def test_expo_bulk_send_sends_to_every_device_of_the_user(
+    pushes: list[PushNotification], devices: dict[int, list[str]], mocker: MockerFixture
+):
+    devices[1] = ["phone", "tablet"]
+    devices[2] = []
+
+    def post(**kwargs):
+        response = fake_expo_response(mocker, **kwargs)
+        for ticket in response.json.return_value["data"]:
+            if ticket["to"] == "tablet":
+                ticket.update(status="error", details={"error": "DeviceNotRegistered"})
+        return response
+
+    service = ExpoPushNotificationExternalService(max_concurrent_requests=1)
+    mocker.patch.object(service.s, "post", side_effect=post)
+
+    tickets = service.bulk_send(pushes[:100])
+
+    # The 100 messages still fill a single request
+    assert service.s.post.call_count == 1  # type: ignore
+    phone, tablet = tickets[str(pushes[0].id)]
+    assert phone["status"] == "ok"
+    assert tablet["details"] == {"error": "DeviceNotRegistered", "expoPushToken": "tablet"}
+    # Users without devices are not sent anything
+    assert str(pushes[1].id) not in tickets
+    assert len(tickets) == 99
+
+
+def test_expo_services_share_the_rate_limiter():
+    assert (
+        ExpoPushNotificationExternalService().rate_limiter
+        is ExpoPushNotificationExternalService().rate_limiter
+    )
+
+
+def test_expo_service_refuses_the_memory_rate_limiter_on_production(settings):
+    settings.ON_PRODUCTION = True
+
+    with pytest.raises(ImproperlyConfigured):
+        ExpoPushNotificationExternalService()
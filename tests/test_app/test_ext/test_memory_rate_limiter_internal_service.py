@@ -0,0 +1,87 @@
+import pytest
+
+from app.ext.rate_limit.backends.memory import MemoryRateLimiterInternalService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock: FakeClock) -> MemoryRateLimiterInternalService:
+    return MemoryRateLimiterInternalService(clock=clock)
+
+
+def test_rate_limiter_acquire_refills_at_rate(
+    limiter: MemoryRateLimiterInternalService, clock: FakeClock
+):
+    kwargs = {"bucket": "foo", "rate": 10, "capacity": 20}
+
+    assert limiter.acquire(tokens=20, **kwargs) == 0
+    # Empty, 5 tokens take half a second to refill
+    assert limiter.acquire(tokens=5, **kwargs) == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert limiter.acquire(tokens=5, **kwargs) == 0
+
+    # Never refills over the capacity
+    clock.now += 60
+    assert limiter.acquire(tokens=20, **kwargs) == 0
+    assert limiter.acquire(tokens=1, **kwargs) > 0
+
+    metrics = limiter.get_metrics(bucket="foo")
+    assert metrics["acquired"] == 45
+    assert metrics["throttled"] == 2
+    assert metrics["rate"] == 10
+
+
+def test_rate_limiter_penalize_slows_down_and_recovers(
+    limiter: MemoryRateLimiterInternalService, clock: FakeClock
+):
+    kwargs = {"bucket": "foo", "rate": 10, "capacity": 20}
+    limiter.acquire(tokens=1, **kwargs)
+
+    limiter.penalize(bucket="foo")
+
+    metrics = limiter.get_metrics(bucket="foo")
+    assert metrics["rate"] == 5
+    assert metrics["penalties"] == 1
+    # The bucket was drained, and it refills at the penalized rate
+    assert limiter.acquire(tokens=5, **kwargs) == pytest.approx(1)
+
+    # Recovers linearly back to the configured rate
+    clock.now += 1 / limiter.recovery_per_second
+    assert limiter.get_metrics(bucket="foo")["rate"] == 10
+
+
+def test_rate_limiter_penalize_has_a_floor(limiter: MemoryRateLimiterInternalService):
+    limiter.acquire(bucket="foo", tokens=1, rate=100, capacity=100)
+
+    for _ in range(20):
+        limiter.penalize(bucket="foo")
+
+    assert limiter.get_metrics(bucket="foo")["rate"] == pytest.approx(100 * limiter.min_rate_factor)
+
+
+def test_rate_limiter_wait_sleeps_until_acquired(
+    limiter: MemoryRateLimiterInternalService, clock: FakeClock, mocker
+):
+    def sleep(seconds: float):
+        clock.now += seconds
+
+    mocker.patch("app.ext.rate_limit.abc.time.sleep", side_effect=sleep)
+    kwargs = {"bucket": "foo", "rate": 10, "capacity": 10}
+
+    assert limiter.wait(tokens=10, **kwargs) == 0
+    assert limiter.wait(tokens=10, **kwargs) == pytest.approx(1)
+    # More than the capacity is capped at the capacity
+    assert limiter.wait(tokens=50, **kwargs) == pytest.approx(1)
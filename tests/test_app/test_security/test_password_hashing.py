@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+from django.contrib.auth import hashers
+
+from app.security import password_hashing
+
+
+@pytest.fixture
+def pool(settings):
+    settings.PASSWORD_HASHING_WORKERS = 1
+    password_hashing.shutdown()
+    yield
+    password_hashing.shutdown()
+
+
+def test_password_hashing_checks_the_password_on_the_pool(pool, settings):
+    encoded = hashers.make_password("password")
+
+    assert password_hashing.check_password(password="password", encoded=encoded) == (True, False)
+    assert password_hashing.check_password(password="foo", encoded=encoded) == (False, False)
+    assert password_hashing._executor is not None
+
+    settings.PASSWORD_HASHERS = [
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    ]
+    password_hashing.shutdown()
+    assert password_hashing.check_password(password="password", encoded=encoded) == (True, True)
+
+
+def test_password_hashing_makes_the_password_in_background(pool):
+    hashed = threading.Event()
+    hashes = []
+
+    def callback(encoded: str):
+        hashes.append(encoded)
+        hashed.set()
+
+    password_hashing.make_password_in_background(password="password", callback=callback)
+
+    assert hashed.wait(timeout=10)
+    assert hashers.check_password("password", hashes[0])
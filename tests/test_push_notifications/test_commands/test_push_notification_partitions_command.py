@@ -0,0 +1,13 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+def test_push_notification_partitions_command_requires_postgres(settings):
+    from django.db import connection
+
+    if connection.vendor == "postgresql":
+        pytest.skip("Only fails on other databases")
+
+    with pytest.raises(CommandError):
+        call_command("push_notification_partitions")
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.timesince import timesince
+
+from push_notifications.models import PushNotification, TimeSince
+
+
+@pytest.mark.parametrize(
+    "delta",
+    [
+        timedelta(seconds=-30),
+        timedelta(seconds=30),
+        timedelta(minutes=1, seconds=59),
+        timedelta(hours=1),
+        timedelta(hours=23, minutes=59, seconds=59),
+        timedelta(days=1, minutes=30),
+        timedelta(days=6, hours=23, minutes=59),
+        timedelta(days=7, hours=12),
+        timedelta(days=27, hours=23, minutes=59, seconds=59),
+        timedelta(days=28),
+        timedelta(days=400, hours=5),
+    ],
+)
+def test_time_since_renders_as_timesince(delta: timedelta):
+    now = timezone.now()
+    time_since = TimeSince(now=now)
+
+    # Rendered twice, so the second one comes from the already rendered values
+    for seconds in (0, 1):
+        d = now - delta - timedelta(seconds=seconds)
+        assert time_since(d) == timesince(d, now=now)
+
+
+def test_time_since_reuses_rendered_values(mocker):
+    now = timezone.now()
+    mocked_timesince = mocker.patch(
+        "push_notifications.models.timesince", side_effect=lambda d, now: "rendered"
+    )
+    time_since = TimeSince(now=now)
+
+    time_since(now - timedelta(days=10, hours=2))
+    time_since(now - timedelta(days=10, hours=5))
+    time_since(now - timedelta(hours=3, minutes=2, seconds=5))
+    time_since(now - timedelta(hours=3, minutes=2, seconds=50))
+
+    assert mocked_timesince.call_count == 2
+
+
+def test_push_notification_get_enriched_data():
+    now = timezone.now()
+    notification = PushNotification(
+        id=1, kind="int_comm", data={"foo": "bar"}, created_at=now - timedelta(hours=2)
+    )
+
+    assert notification.enriched_data == {
+        "id": 1,
+        "createdAt": notification.created_at.isoformat(),
+        "readAt": None,
+        "timeSinceCreated": timesince(notification.created_at),
+        "kind": "int_comm",
+        "collapseKey": None,
+        "meta": {"foo": "bar"},
+    }
+
+    notification.read_at = now
+    data = notification.get_enriched_data(time_since=TimeSince(now=now))
+    assert data["readAt"] == now.isoformat()
+    assert data["timeSinceCreated"] == timesince(notification.created_at, now=now)
@@ -0,0 +1,67 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from app import consts
+from push_notifications import models, selectors
+from users.models import User
+
+
+@pytest.mark.django_db
+def test_push_notification_get_pending_delivery_confirmation_qs_filters_by_created_at_range(
+    visitor_user: User,
+):
+    notifications = models.PushNotification.objects.bulk_create(
+        [
+            models.PushNotification(
+                user=visitor_user,
+                kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+                title="Hey you, yes you!",
+                description="We have a new vaccine available",
+                data={},
+                status=status,
+                push_ticket_id=push_ticket_id,
+            )
+            for status, push_ticket_id in [
+                (consts.push_notification.Status.SENT, str(uuid.uuid4())),
+                (consts.push_notification.Status.SENT, None),
+                (consts.push_notification.Status.DELIVERED, str(uuid.uuid4())),
+            ]
+        ]
+    )
+    since = timezone.now() - timedelta(days=1)
+
+    qs = selectors.push_notification_get_pending_delivery_confirmation_qs(since=since)
+
+    assert list(qs) == [notifications[0]]
+    assert not selectors.push_notification_get_pending_delivery_confirmation_qs(
+        since=timezone.now() + timedelta(minutes=1)
+    ).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("resuming", [False, True])
+def test_push_notification_get_pending_delivery_confirmation_qs_uses_partial_index(resuming: bool):
+    """The delivery confirmation pages must be served by the partial index,
+    both when starting a pass and when resuming from a checkpoint"""
+    since = timezone.now() - timedelta(days=1)
+    qs = selectors.push_notification_get_pending_delivery_confirmation_qs(since=since).order_by(
+        "created_at", "id"
+    )
+    if resuming:
+        qs = qs.filter(Q(created_at__gt=since) | Q(created_at=since, id__gt=1))
+
+    if connection.vendor == "postgresql":
+        # The test table is empty, so without this the planner would always seq scan
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = qs[:1000].explain()
+
+    assert "push_notif_sent_created_idx" in plan
+    if connection.vendor == "sqlite":
+        # The index order matches the page order, no extra sorting step is needed
+        assert "USE TEMP B-TREE" not in plan
@@ -0,0 +1,143 @@
+import pytest
+from django.core.exceptions import ValidationError
+from pytest_mock import MockerFixture
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def users() -> list[User]:
+    return User.objects.bulk_create(
+        [
+            User(
+                email=f"user{i}@doe.com",
+                full_name=f"User {i}",
+                language_code="en-us" if i % 2 else "pt-br",
+                notification_token=f"ExponentPushToken[{i}]",
+            )
+            for i in range(10)
+        ]
+    )
+
+
+def broadcast(**kwargs) -> services.PushNotificationBroadcastProgress:
+    return services.push_notification_broadcast(
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Hey you, yes you!",
+        description="We have a new vaccine available",
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_push_notification_broadcast_notifies_the_segment_in_batches(
+    users: list[User], mocker: MockerFixture
+):
+    enqueue_send = mocker.patch.object(services, "push_notification_enqueue_send")
+
+    progress = broadcast(broadcast_id="foo", filters={"language_code": "en-us"}, batch_size=2)
+
+    en_users = [user for user in users if user.language_code == "en-us"]
+    assert set(models.PushNotification.objects.values_list("user_id", flat=True)) == {
+        user.pk for user in en_users
+    }
+    assert [len(call.kwargs["notification_ids"]) for call in enqueue_send.call_args_list] == [
+        2,
+        2,
+        1,
+    ]
+    assert progress == {
+        "status": "finished",
+        "after_user_id": en_users[-1].pk,
+        "users": 5,
+        "enqueued": 5,
+    }
+    assert services.push_notification_get_broadcast_progress(broadcast_id="foo") == progress
+
+
+@pytest.mark.django_db
+def test_push_notification_broadcast_resumes_after_the_last_handled_user(
+    users: list[User], mocker: MockerFixture
+):
+    mocker.patch.object(services, "push_notification_enqueue_send")
+    bulk_create = mocker.patch.object(
+        services,
+        "push_notification_bulk_create",
+        side_effect=[[1, 2], RuntimeError("worker lost")],
+    )
+    with pytest.raises(RuntimeError):
+        broadcast(broadcast_id="foo", filters={}, batch_size=2)
+    assert services.push_notification_get_broadcast_progress(broadcast_id="foo") == {
+        "status": "running",
+        "after_user_id": users[1].pk,
+        "users": 2,
+        "enqueued": 2,
+    }
+
+    bulk_create.side_effect = lambda users, **kwargs: [user.pk for user in users]
+    progress = broadcast(broadcast_id="foo", filters={}, batch_size=2)
+
+    resumed_users = [
+        user.pk for call in bulk_create.call_args_list[2:] for user in call.kwargs["users"]
+    ]
+    assert resumed_users == [user.pk for user in users[2:]]
+    assert progress["users"] == 10
+    assert progress["status"] == "finished"
+
+    # Finished broadcasts are not sent again
+    broadcast(broadcast_id="foo", filters={}, batch_size=2)
+    assert bulk_create.call_count == 6
+
+
+@pytest.mark.django_db
+def test_push_notification_broadcast_waits_for_the_sends_to_catch_up(
+    users: list[User], mocker: MockerFixture
+):
+    mocker.patch.object(services, "push_notification_enqueue_send")
+
+    def send_everything(seconds):
+        models.PushNotification.objects.update(status=consts.push_notification.Status.SENT)
+
+    sleep = mocker.patch.object(services, "sleep", side_effect=send_everything)
+
+    progress = broadcast(broadcast_id="foo", filters={}, batch_size=2, max_in_flight=4)
+
+    assert progress["users"] == 10
+    # Every other batch finds 4 notifications waiting to be sent
+    assert sleep.call_count == 2
+
+
+@pytest.mark.django_db
+def test_push_notification_broadcast_stops_when_the_sends_dont_catch_up(
+    users: list[User], mocker: MockerFixture, settings
+):
+    settings.PUSH_NOTIFICATION_BROADCAST_MAX_WAIT_SECONDS = 5
+    mocker.patch.object(services, "push_notification_enqueue_send")
+    mocker.patch.object(services, "monotonic", side_effect=[0, 0, 0, 1, 10])
+    sleep = mocker.patch.object(services, "sleep")
+
+    progress = broadcast(broadcast_id="foo", filters={}, batch_size=2, max_in_flight=4)
+
+    assert sleep.call_count == 1
+    assert progress == {
+        "status": "stalled",
+        "after_user_id": users[3].pk,
+        "users": 4,
+        "enqueued": 4,
+    }
+
+    models.PushNotification.objects.update(status=consts.push_notification.Status.SENT)
+    mocker.patch.object(services, "monotonic", return_value=0)
+    progress = broadcast(broadcast_id="foo", filters={}, batch_size=2, max_in_flight=4)
+
+    assert progress["status"] == "finished"
+    assert progress["users"] == 10
+
+
+@pytest.mark.django_db
+def test_push_notification_broadcast_rejects_invalid_filters(users: list[User]):
+    with pytest.raises(ValidationError):
+        broadcast(broadcast_id="foo", filters={"language_code": "klingon"})
+    assert not models.PushNotification.objects.exists()
@@ -0,0 +1,158 @@
+from datetime import datetime, time, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.core.exceptions import ValidationError
+from pytest_mock import MockerFixture
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def users(visitor_user: User) -> list[User]:
+    visitor_user.notification_token = "foo"
+    visitor_user.save()
+
+    not_opted_in_user = User(email="john@doe.com", full_name="John Doe")
+    not_opted_in_user.set_password("password")
+    not_opted_in_user.save()
+    return [visitor_user, not_opted_in_user]
+
+
+@pytest.mark.django_db
+def test_push_notification_bulk_create_creates_one_notification_per_user(users: list[User]):
+    opted_in_user, not_opted_in_user = users
+
+    sendable_ids = services.push_notification_bulk_create(
+        users=User.objects.order_by("id"),
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Hey you, yes you!",
+        description="We have a new vaccine available",
+        data={"foo": "bar"},
+    )
+
+    assert models.PushNotification.objects.count() == 2
+    opted_in_notification = models.PushNotification.objects.get(user=opted_in_user)
+    assert opted_in_notification.status == consts.push_notification.Status.CREATED
+    assert opted_in_notification.data == {"foo": "bar"}
+    assert opted_in_notification.created_at is not None
+
+    not_opted_in_notification = models.PushNotification.objects.get(user=not_opted_in_user)
+    assert not_opted_in_notification.status == consts.push_notification.Status.FAILED
+    assert (
+        not_opted_in_notification.failure_kind == consts.push_notification.FailureKind.NOT_OPTED_IN
+    )
+
+    # Only the notifications that can be sent are returned
+    assert sendable_ids == [opted_in_notification.id]
+
+
+@pytest.mark.django_db
+def test_push_notification_bulk_create_writes_in_batches(
+    users: list[User], django_assert_num_queries
+):
+    """Each batch of users must be written with a single INSERT, followed by
+    a single UPDATE of their unread counters"""
+
+    with django_assert_num_queries(4):
+        services.push_notification_bulk_create(
+            users=users,
+            kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+            title="Hey you, yes you!",
+            description="We have a new vaccine available",
+            batch_size=1,
+        )
+    assert models.PushNotification.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_push_notification_bulk_create_schedules_on_the_users_local_time(users: list[User]):
+    opted_in_user, not_opted_in_user = users
+    utc_user = User.objects.create(
+        email="jane@doe.com", full_name="Jane Doe", notification_token="bar", time_zone="UTC"
+    )
+
+    sendable_ids = services.push_notification_bulk_create(
+        users=User.objects.order_by("id"),
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Hey you, yes you!",
+        description="We have a new vaccine available",
+        local_delivery_time=time(9),
+    )
+
+    # Scheduled notifications are sent when flushed, not right away
+    assert sendable_ids == []
+    for user in [opted_in_user, utc_user]:
+        notification = models.PushNotification.objects.get(user=user)
+        local_scheduled_for = notification.scheduled_for.astimezone(ZoneInfo(user.time_zone))
+        assert local_scheduled_for.time() == time(9)
+        assert notification.status == consts.push_notification.Status.CREATED
+    assert models.PushNotification.objects.get(user=not_opted_in_user).scheduled_for is None
+
+
+@pytest.mark.django_db
+def test_push_notification_bulk_create_collapses_into_pending_notifications(users: list[User]):
+    opted_in_user, _not_opted_in_user = users
+
+    def bulk_create(description: str) -> list[int]:
+        return services.push_notification_bulk_create(
+            users=User.objects.order_by("id"),
+            kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+            title="Hey you, yes you!",
+            description=description,
+            collapse_key="vaccines",
+        )
+
+    first_ids = bulk_create("We have a new vaccine available")
+    second_ids = bulk_create("We have two new vaccines available")
+
+    # The pending notification was already enqueued, so it's not returned again
+    assert second_ids == []
+    notification = models.PushNotification.objects.get(user=opted_in_user)
+    assert [notification.id] == first_ids
+    assert notification.description == "We have two new vaccines available"
+    # Failed notifications don't collapse
+    assert models.PushNotification.objects.count() == 3
+
+
+@pytest.mark.parametrize(
+    "now, time_zone, expected",
+    [
+        # 07:00 in Sao Paulo, it's still today
+        (datetime(2026, 10, 18, 10), "America/Sao_Paulo", datetime(2026, 10, 18, 12)),
+        # 10:00 in UTC, it's tomorrow
+        (datetime(2026, 10, 18, 10), "UTC", datetime(2026, 10, 19, 9)),
+        (datetime(2026, 10, 18, 9), "UTC", datetime(2026, 10, 19, 9)),
+    ],
+)
+def test_push_notification_local_delivery_at_is_the_next_local_time(now, time_zone, expected):
+    delivery_at = services._push_notification_local_delivery_at(
+        local_time=time(9), time_zone=time_zone, now=now.replace(tzinfo=timezone.utc)
+    )
+
+    assert delivery_at == expected.replace(tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+def test_push_notification_bulk_create_validates_payload(users: list[User]):
+    with pytest.raises(ValidationError):
+        services.push_notification_bulk_create(
+            users=users,
+            kind="unknown",  # type: ignore
+            title="Hey you, yes you!",
+            description="We have a new vaccine available",
+        )
+    assert not models.PushNotification.objects.exists()
+
+
+def test_push_notification_enqueue_send_dispatches_one_task_per_chunk(mocker: MockerFixture):
+    send_task = mocker.patch("push_notifications.tasks.push_notification_send.apply_async")
+
+    services.push_notification_enqueue_send(notification_ids=[1, 2, 3], chunk_size=2)
+
+    assert send_task.call_args_list == [
+        mocker.call(kwargs={"notification_ids": [1, 2]}),
+        mocker.call(kwargs={"notification_ids": [3]}),
+    ]
@@ -1,7 +1,9 @@
 import uuid
 
 import pytest
+from django.core.cache import cache
 from django.utils import timezone
+from pytest_mock import MockerFixture
 
 from app import consts
 from push_notifications import models, services
@@ -46,3 +48,91 @@ def test_push_notification_confirm_delivery_updates_status_to_delivered_when_rec
 
     assert push_notification.status == consts.push_notification.Status.DELIVERED
     assert push_notification.delivery_confirmation_received_at is not None
+
+
+@pytest.fixture
+def sent_notifications(visitor_user: User) -> list[models.PushNotification]:
+    return models.PushNotification.objects.bulk_create(
+        [
+            models.PushNotification(
+                user=visitor_user,
+                kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+                title="Hey you, yes you!",
+                description="We have a new vaccine available",
+                data={},
+                status=consts.push_notification.Status.SENT,
+                push_ticket_id=str(uuid.uuid4()),
+            )
+            for _ in range(3)
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_push_notification_confirm_delivery_fetches_receipts_page_by_page(
+    sent_notifications: list[models.PushNotification],
+    push_notification_service: FakePushNotificationExternalService,
+    mocker: MockerFixture,
+):
+    get_receipts = mocker.spy(push_notification_service, "get_receipts")
+
+    services.push_notification_confirm_delivery(
+        notification_service=push_notification_service, dt=timezone.now(), page_size=2
+    )
+
+    assert [call.args[0] for call in get_receipts.call_args_list] == [
+        [notification.push_ticket_id for notification in sent_notifications[:2]],
+        [sent_notifications[2].push_ticket_id],
+    ]
+    assert not models.PushNotification.objects.exclude(
+        status=consts.push_notification.Status.DELIVERED
+    ).exists()
+    # A finished run leaves no checkpoint behind
+    assert cache.get(services._CONFIRM_DELIVERY_CHECKPOINT_KEY) is None
+
+
+@pytest.mark.django_db
+def test_push_notification_confirm_delivery_resumes_from_checkpoint(
+    sent_notifications: list[models.PushNotification],
+    push_notification_service: FakePushNotificationExternalService,
+):
+    first = sent_notifications[0]
+    cache.set(services._CONFIRM_DELIVERY_CHECKPOINT_KEY, (first.created_at, first.id))
+
+    services.push_notification_confirm_delivery(
+        notification_service=push_notification_service, dt=timezone.now()
+    )
+
+    statuses = list(models.PushNotification.objects.order_by("id").values_list("status", flat=True))
+    assert statuses == [
+        consts.push_notification.Status.SENT,
+        consts.push_notification.Status.DELIVERED,
+        consts.push_notification.Status.DELIVERED,
+    ]
+    assert cache.get(services._CONFIRM_DELIVERY_CHECKPOINT_KEY) is None
+
+
+@pytest.mark.django_db
+def test_push_notification_confirm_delivery_skips_overlapping_runs(
+    sent_notifications: list[models.PushNotification],
+    push_notification_service: FakePushNotificationExternalService,
+    mocker: MockerFixture,
+):
+    get_receipts = mocker.spy(push_notification_service, "get_receipts")
+    cache.set(services._CONFIRM_DELIVERY_LOCK_KEY, "another-run")
+
+    services.push_notification_confirm_delivery(
+        notification_service=push_notification_service, dt=timezone.now()
+    )
+
+    get_receipts.assert_not_called()
+    # The lock of the other run is left alone
+    assert cache.get(services._CONFIRM_DELIVERY_LOCK_KEY) == "another-run"
+
+    cache.delete(services._CONFIRM_DELIVERY_LOCK_KEY)
+    services.push_notification_confirm_delivery(
+        notification_service=push_notification_service, dt=timezone.now()
+    )
+
+    get_receipts.assert_called_once()
+    assert cache.get(services._CONFIRM_DELIVERY_LOCK_KEY) is None
@@ -1,7 +1,7 @@
 import pytest
 
 from app import consts
-from push_notifications import services
+from push_notifications import models, services
 from users.models import User
 
 
@@ -42,3 +42,54 @@ def test_push_notification_create_succeeds(
     assert push_notification.title == "Hey you, yes you!"
     assert push_notification.description == "We have a new vaccine available"
     assert push_notification.data == {"foo": "bar"}
+
+
+@pytest.mark.django_db
+def test_push_notification_create_collapses_into_the_pending_notification(visitor_user: User):
+    visitor_user.notification_token = "foo"
+    visitor_user.save()
+
+    first = services.push_notification_create(
+        user=visitor_user,
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Your profile changed",
+        description="Your name changed",
+        source_object=visitor_user,
+    )
+    second = services.push_notification_create(
+        user=visitor_user,
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Your profile changed",
+        description="Your email changed",
+        source_object=visitor_user,
+    )
+
+    assert second.id == first.id
+    first.refresh_from_db()
+    assert first.description == "Your email changed"
+    assert first.collapse_key is not None
+    assert models.PushNotification.objects.count() == 1
+    assert services.push_notification_get_unread_count(user=visitor_user) == 1
+
+
+@pytest.mark.django_db
+def test_push_notification_create_doesnt_collapse_sent_notifications(visitor_user: User, settings):
+    visitor_user.notification_token = "foo"
+    visitor_user.save()
+
+    def create():
+        return services.push_notification_create(
+            user=visitor_user,
+            kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+            title="Hey you, yes you!",
+            description="We have a new vaccine available",
+            collapse_key="vaccines",
+        )
+
+    first = create()
+    first.status = consts.push_notification.Status.SENT
+    first.save()
+    assert create().id != first.id
+
+    settings.PUSH_NOTIFICATION_COLLAPSE_WINDOW_SECONDS = 0
+    assert create().id != create().id
@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 import pytest
+from django.utils import timezone
 from pytest_mock import MockerFixture
 
 from app import consts
@@ -22,43 +25,16 @@ def push_notification(visitor_user: User) -> models.PushNotification:
 
 
 @pytest.mark.django_db
-def test_push_notification_delivery_failed_removes_notification_when_device_is_not_registered(
-    push_notification: models.PushNotification,
-):
-    """When a notification failed to be delivered due to the device (notification token) is
-    not registered on the provider, we are advised to no keep trying to send notifications
-    to them, so we should remove the bad notification token from the user"""
-
-    user: User = push_notification.user
-    assert user.notification_token is not None
-    # on a normal scenario the below information would be populated from the ticket or the receipt
-    # that we got back when we tried to send this notification, but here for simplicity we're
-    # setting them manually
-    push_notification.status = consts.push_notification.Status.FAILED
-    push_notification.failure_kind = consts.push_notification.FailureKind.DEVICE_NOT_REGISTERED
-    push_notification.save()
-
-    services.push_notification_delivery_failed(notification=push_notification)
-    push_notification.refresh_from_db()
-
-    # We expect that this values do not change
-    assert push_notification.status == consts.push_notification.Status.FAILED
-    assert (
-        push_notification.failure_kind == consts.push_notification.FailureKind.DEVICE_NOT_REGISTERED
-    )
-
-    # now the user must have their notification token removed
-    user.refresh_from_db()
-    assert user.notification_token is None, "Notification token was not removed from user"
-
-
-@pytest.mark.django_db
-def test_push_notification_delivery_failed_dispatches_a_resend_task_when_failure_kind_is_message_rate_exceeded(
+def test_push_notification_delivery_failed_schedules_a_retry_when_failure_kind_is_message_rate_exceeded(
     push_notification: models.PushNotification,
     mocker: MockerFixture,
+    settings,
 ):
     """When a notification failed to be delivered due to the message rate being exceeded, we should
-    try resend this notification a few times before giving up"""
+    try resend this notification a few times before giving up. The retry is scheduled with an
+    exponential backoff, and sent later together with the other retries"""
+    settings.PUSH_NOTIFICATION_RETRY_BASE_DELAY_SECONDS = 5
+    settings.PUSH_NOTIFICATION_SCHEDULE_BUCKET_SECONDS = 10
 
     # on a normal scenario the below information would be populated from the ticket or the receipt
     # that we got back when we tried to send this notification, but here for simplicity we're
@@ -66,16 +42,15 @@ def test_push_notification_delivery_failed_dispatches_a_resend_task_when_failure
     push_notification.status = consts.push_notification.Status.FAILED
     push_notification.failure_kind = consts.push_notification.FailureKind.MESSAGE_RATE_EXCEEDED
     push_notification.failure_message = "Too many requests being sent"
-    push_notification.delivery_attempts = 1
+    push_notification.delivery_attempts = 2
     push_notification.save()
 
     resend_task = mocker.patch(
         "push_notifications.tasks.push_notification_handle_resend.apply_async"
     )
+    before = timezone.now()
     services.push_notification_delivery_failed(push_notification)
-    resend_task.assert_called_once_with(
-        kwargs={"notification_id": push_notification.id}, countdown=5
-    )
+    resend_task.assert_not_called()
 
     # we're not using refresh_from_db because mypy complains on asserts
     notification = models.PushNotification.objects.get(pk=push_notification.pk)
@@ -85,7 +60,12 @@ def test_push_notification_delivery_failed_dispatches_a_resend_task_when_failure
     assert notification.failure_kind is None
     assert notification.failure_message is None
     # also, the delivery attempts should be increased by 1
-    assert notification.delivery_attempts == 2
+    assert notification.delivery_attempts == 3
+    # Second attempt waits 10s, with up to half of it as jitter, rounded up to the 10s bucket
+    assert notification.scheduled_for is not None
+    assert before + timedelta(seconds=5) <= notification.scheduled_for
+    assert notification.scheduled_for <= before + timedelta(seconds=20)
+    assert notification.scheduled_for.timestamp() % 10 == 0
 
 
 @pytest.mark.django_db
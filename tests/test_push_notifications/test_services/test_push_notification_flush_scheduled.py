@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def scheduled_notifications(visitor_user: User) -> list[models.PushNotification]:
+    now = timezone.now()
+    return models.PushNotification.objects.bulk_create(
+        [
+            models.PushNotification(
+                user=visitor_user,
+                kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+                title="Hey you, yes you!",
+                description="We have a new vaccine available",
+                data={},
+                status=consts.push_notification.Status.ENQUEUED,
+                scheduled_for=now - timedelta(seconds=i),
+            )
+            for i in range(250)
+        ]
+        + [
+            models.PushNotification(
+                user=visitor_user,
+                kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+                title="Not yet",
+                description="We have a new vaccine available",
+                data={},
+                status=consts.push_notification.Status.ENQUEUED,
+                scheduled_for=now + timedelta(minutes=5),
+            )
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_push_notification_flush_scheduled_sends_due_notifications_in_batches(
+    scheduled_notifications: list[models.PushNotification], mocker: MockerFixture, settings
+):
+    settings.PUSH_NOTIFICATION_FLUSH_BATCH_SIZE = 100
+    send_task = mocker.patch("push_notifications.tasks.push_notification_send.apply_async")
+
+    flushed = services.push_notification_flush_scheduled()
+
+    assert flushed == 250
+    batches = [call.kwargs["kwargs"]["notification_ids"] for call in send_task.call_args_list]
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    # The ones that were scheduled first are sent first
+    assert batches[0][0] == scheduled_notifications[249].id
+
+    # Claimed notifications are not flushed again, and the future ones wait for their time
+    assert models.PushNotification.objects.filter(scheduled_for__isnull=False).count() == 1
+    assert services.push_notification_flush_scheduled() == 0
+
+
+@pytest.mark.django_db
+def test_push_notification_flush_scheduled_sends_the_notifications(
+    scheduled_notifications: list[models.PushNotification],
+    push_notification_service,
+    mocker: MockerFixture,
+):
+    mocker.patch(
+        "app.ext.push_notifications.abc.PushNotificationExternalService.service_loader",
+        return_value=push_notification_service,
+    )
+
+    services.push_notification_flush_scheduled()
+
+    statuses = models.PushNotification.objects.values_list("status", flat=True).distinct()
+    assert sorted(statuses) == sorted(
+        [consts.push_notification.Status.SENT, consts.push_notification.Status.ENQUEUED]
+    )
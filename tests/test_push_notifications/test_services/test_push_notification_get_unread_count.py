@@ -0,0 +1,87 @@
+import pytest
+from django.core.cache import cache
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+def create_notification(user: User) -> models.PushNotification:
+    return services.push_notification_create(
+        user=user,
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Hey you, yes you!",
+        description="We have a new vaccine available",
+    )
+
+
+@pytest.mark.django_db
+def test_push_notification_get_unread_count_bootstraps_counter(visitor_user: User):
+    """Users created without a counter (e.g: with bulk_create) have their notifications
+    counted on the first call"""
+    create_notification(visitor_user)
+    create_notification(visitor_user)
+    models.PushNotificationUnreadCounter.objects.all().delete()
+
+    assert services.push_notification_get_unread_count(user=visitor_user) == 2
+    assert models.PushNotificationUnreadCounter.objects.get(user=visitor_user).count == 2
+
+
+@pytest.mark.django_db
+def test_push_notification_get_unread_count_follows_create_and_read(visitor_user: User, settings):
+    settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT = 0
+    assert services.push_notification_get_unread_count(user=visitor_user) == 0
+
+    notification = create_notification(visitor_user)
+    create_notification(visitor_user)
+    services.push_notification_bulk_create(
+        users=[visitor_user],
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Hey you, yes you!",
+        description="We have a new vaccine available",
+    )
+    assert services.push_notification_get_unread_count(user=visitor_user) == 3
+
+    services.push_notification_read(push_notification=notification)
+    # Reading twice doesn't decrement twice
+    services.push_notification_read(push_notification=notification)
+    assert services.push_notification_get_unread_count(user=visitor_user) == 2
+
+    assert services.push_notification_read_many(reader=visitor_user, ids=[]) == 2
+    assert services.push_notification_get_unread_count(user=visitor_user) == 0
+
+
+@pytest.mark.django_db
+def test_push_notification_get_unread_count_uses_cache(
+    visitor_user: User, django_assert_num_queries
+):
+    create_notification(visitor_user)
+    assert services.push_notification_get_unread_count(user=visitor_user) == 1
+
+    with django_assert_num_queries(0):
+        assert services.push_notification_get_unread_count(user=visitor_user) == 1
+
+    # Changes to the counter invalidate the cached value
+    create_notification(visitor_user)
+    assert services.push_notification_get_unread_count(user=visitor_user) == 2
+
+
+@pytest.mark.django_db
+def test_push_notification_get_unread_count_ignores_counts_cached_before_a_change(
+    visitor_user: User,
+):
+    assert services.push_notification_get_unread_count(user=visitor_user) == 0
+    version = cache.get(services._push_notification_unread_count_version_key(visitor_user.pk))
+
+    create_notification(visitor_user)
+    # A read that started before the notification was created caches its count afterwards
+    cache.set(services._push_notification_unread_count_cache_key(visitor_user.pk), (version, 0))
+
+    assert services.push_notification_get_unread_count(user=visitor_user) == 1
+
+
+@pytest.mark.django_db
+def test_push_notification_unread_counter_is_created_with_the_user():
+    user = User.objects.create_user(email="jane@doe.com", password="password")
+
+    assert models.PushNotificationUnreadCounter.objects.get(user=user).count == 0
@@ -0,0 +1,58 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def push_notifications(visitor_user: User) -> list[models.PushNotification]:
+    visitor_user.notification_token = "foo"
+    visitor_user.save()
+
+    return [
+        services.push_notification_create(
+            user=visitor_user,
+            kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+            title=f"Notification {i}",
+            description="We have a new vaccine available",
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_push_notification_handle_push_receipts_writes_one_update_per_status(
+    push_notifications: list[models.PushNotification],
+    mocker: MockerFixture,
+    django_assert_num_queries,
+):
+    handle_delivery_failures_task = mocker.patch(
+        "push_notifications.tasks.push_notification_handle_delivery_failures.apply_async"
+    )
+    delivered, failed = push_notifications[:2], push_notifications[2]
+    receipts = [
+        *[(notification, {"status": "ok"}) for notification in delivered],
+        (
+            failed,
+            {
+                "status": "error",
+                "message": "The device is gone",
+                "details": {"error": "DeviceNotRegistered"},
+            },
+        ),
+    ]
+
+    with django_assert_num_queries(2):
+        services.push_notification_handle_push_receipts(receipts=receipts)  # type: ignore
+
+    for notification in delivered:
+        notification = models.PushNotification.objects.get(pk=notification.pk)
+        assert notification.status == consts.push_notification.Status.DELIVERED
+        assert notification.delivery_confirmation_received_at is not None
+
+    failed = models.PushNotification.objects.get(pk=failed.pk)
+    assert failed.status == consts.push_notification.Status.FAILED
+    assert failed.failure_kind == consts.push_notification.FailureKind.DEVICE_NOT_REGISTERED
+    handle_delivery_failures_task.assert_called_once_with(kwargs={"notification_ids": [failed.id]})
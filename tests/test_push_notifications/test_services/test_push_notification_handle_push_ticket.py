@@ -46,7 +46,7 @@ def test_push_notification_handle_push_ticket_failed(
     update the status with the ticket info and dispatch a task to handle this failure."""
 
     handle_delivery_failure_task = mocker.patch(
-        "push_notifications.tasks.push_notification_handle_delivery_failure.apply_async"
+        "push_notifications.tasks.push_notification_handle_delivery_failures.apply_async"
     )
     services.push_notification_handle_push_ticket(
         notification=push_notification,
@@ -62,5 +62,5 @@ def test_push_notification_handle_push_ticket_failed(
     assert push_notification.failure_message == "Oops, failed to communicate"
 
     handle_delivery_failure_task.assert_called_once_with(
-        kwargs={"notification_id": push_notification.id}
+        kwargs={"notification_ids": [push_notification.id]}
     )
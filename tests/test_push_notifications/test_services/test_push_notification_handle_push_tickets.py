@@ -0,0 +1,86 @@
+import uuid
+
+import pytest
+from pytest_mock import MockerFixture
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def push_notifications(visitor_user: User) -> list[models.PushNotification]:
+    visitor_user.notification_token = "foo"
+    visitor_user.save()
+
+    return [
+        services.push_notification_create(
+            user=visitor_user,
+            kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+            title=f"Notification {i}",
+            description="We have a new vaccine available",
+        )
+        for i in range(4)
+    ]
+
+
+@pytest.mark.django_db
+def test_push_notification_handle_push_tickets_writes_one_update_per_status(
+    push_notifications: list[models.PushNotification],
+    mocker: MockerFixture,
+    django_assert_num_queries,
+):
+    """Each resulting status is persisted with a single UPDATE, and all the failures are
+    handled by a single task"""
+
+    handle_delivery_failures_task = mocker.patch(
+        "push_notifications.tasks.push_notification_handle_delivery_failures.apply_async"
+    )
+    ok_ticket_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    tickets = [
+        (push_notifications[0], {"status": "ok", "id": ok_ticket_ids[0]}),
+        (push_notifications[1], {"status": "ok", "id": ok_ticket_ids[1]}),
+        *[
+            (
+                notification,
+                {
+                    "status": "error",
+                    "message": "Too many requests",
+                    "details": {"error": "MessageRateExceeded"},
+                },
+            )
+            for notification in push_notifications[2:]
+        ],
+    ]
+
+    with django_assert_num_queries(2):
+        services.push_notification_handle_push_tickets(tickets=tickets)  # type: ignore
+
+    for notification, ticket_id in zip(push_notifications[:2], ok_ticket_ids):
+        notification = models.PushNotification.objects.get(pk=notification.pk)
+        assert notification.status == consts.push_notification.Status.SENT
+        assert notification.push_ticket_id == ticket_id
+
+    for notification in push_notifications[2:]:
+        notification = models.PushNotification.objects.get(pk=notification.pk)
+        assert notification.status == consts.push_notification.Status.FAILED
+        assert (
+            notification.failure_kind == consts.push_notification.FailureKind.MESSAGE_RATE_EXCEEDED
+        )
+
+    handle_delivery_failures_task.assert_called_once_with(
+        kwargs={"notification_ids": [n.id for n in push_notifications[2:]]}
+    )
+
+
+@pytest.mark.django_db
+def test_push_notification_handle_push_tickets_without_failures_doesnt_dispatch_task(
+    push_notifications: list[models.PushNotification], mocker: MockerFixture
+):
+    handle_delivery_failures_task = mocker.patch(
+        "push_notifications.tasks.push_notification_handle_delivery_failures.apply_async"
+    )
+    services.push_notification_handle_push_tickets(
+        tickets=[(n, {"status": "ok", "id": str(uuid.uuid4())}) for n in push_notifications]
+    )
+    handle_delivery_failures_task.assert_not_called()
@@ -0,0 +1,21 @@
+import pytest
+
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.mark.django_db
+def test_push_notification_prune_devices_falls_back_to_the_remaining_device(
+    visitor_user: User,
+):
+    services.push_notification_set_token(user=visitor_user, notification_token="phone")
+    services.push_notification_set_token(user=visitor_user, notification_token="tablet")
+
+    assert services.push_notification_prune_devices(tokens=["tablet", "unknown"]) == 1
+
+    visitor_user.refresh_from_db()
+    assert visitor_user.notification_token == "phone"
+    assert services.push_notification_prune_devices(tokens=["phone"]) == 1
+    visitor_user.refresh_from_db()
+    assert visitor_user.notification_token is None
+    assert not models.Device.objects.exists()
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def notifications(visitor_user: User) -> list[models.PushNotification]:
+    notifications = models.PushNotification.objects.bulk_create(
+        [
+            models.PushNotification(
+                user=visitor_user,
+                kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+                title="Hey you, yes you!",
+                description="We have a new vaccine available",
+                data={},
+                status=consts.push_notification.Status.SENT,
+            )
+            for _ in range(10)
+        ]
+    )
+    now = timezone.now()
+    # The first 7 are old, 2 of them were read
+    for i, notification in enumerate(notifications):
+        days = 200 - i if i < 7 else 10
+        models.PushNotification.objects.filter(id=notification.id).update(
+            created_at=now - timedelta(days=days),
+            read_at=now if i < 2 else None,
+        )
+    # Written without the services, so the counter is counted again on its first read
+    models.PushNotificationUnreadCounter.objects.filter(user=visitor_user).delete()
+    return notifications
+
+
+@pytest.mark.django_db
+def test_push_notification_purge_old_deletes_in_batches(
+    visitor_user: User, notifications: list[models.PushNotification], mocker: MockerFixture
+):
+    assert services.push_notification_get_unread_count(user=visitor_user) == 8
+    sleep = mocker.patch.object(services, "sleep")
+
+    deleted = services.push_notification_purge_old(retention_days=180, batch_size=3)
+
+    assert deleted == 7
+    assert list(models.PushNotification.objects.values_list("id", flat=True)) == [
+        notification.id for notification in notifications[7:]
+    ]
+    # Paused after the two full batches, not after the last one
+    assert sleep.call_count == 2
+    assert services.push_notification_get_unread_count(user=visitor_user) == 3
+
+
+@pytest.mark.django_db
+def test_push_notification_purge_old_stops_at_the_first_recent_notification(
+    notifications: list[models.PushNotification], django_assert_num_queries
+):
+    models.PushNotification.objects.filter(id__in=[n.id for n in notifications[:7]]).delete()
+
+    with django_assert_num_queries(1):
+        assert services.push_notification_purge_old(retention_days=180) == 0
@@ -0,0 +1,66 @@
+import pytest
+
+from app import consts
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def unread_notifications(visitor_user: User) -> list[models.PushNotification]:
+    return [
+        services.push_notification_create(
+            user=visitor_user,
+            kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+            title=f"Notification {i}",
+            description="We have a new vaccine available",
+        )
+        for i in range(5)
+    ]
+
+
+@pytest.mark.django_db
+def test_push_notification_read_many_reads_all_in_batches(
+    visitor_user: User,
+    unread_notifications: list[models.PushNotification],
+    settings,
+    django_assert_num_queries,
+):
+    settings.PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE = 2
+    settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT = 0
+    assert services.push_notification_get_unread_count(user=visitor_user) == 5
+
+    # An UPDATE of the notifications and of the counter per batch, in its own transaction
+    with django_assert_num_queries(3 * 4):
+        assert services.push_notification_read_many(reader=visitor_user, ids=[]) == 5
+
+    assert not models.PushNotification.objects.filter(read_at__isnull=True).exists()
+    assert not models.PushNotification.objects.exclude(
+        status=consts.push_notification.Status.READ
+    ).exists()
+    assert services.push_notification_get_unread_count(user=visitor_user) == 0
+
+
+@pytest.mark.django_db
+def test_push_notification_read_many_only_reads_the_unread_ids_of_the_reader(
+    visitor_user: User, unread_notifications: list[models.PushNotification], settings
+):
+    settings.PUSH_NOTIFICATION_READ_MANY_BATCH_SIZE = 2
+    settings.PUSH_NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT = 0
+    other_user = User.objects.create(email="jane@doe.com", full_name="Jane Doe")
+    other_notification = services.push_notification_create(
+        user=other_user,
+        kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+        title="Hey you, yes you!",
+        description="We have a new vaccine available",
+    )
+    services.push_notification_read(push_notification=unread_notifications[0])
+    ids = [notification.pk for notification in unread_notifications[:3]]
+
+    assert (
+        services.push_notification_read_many(reader=visitor_user, ids=[*ids, other_notification.pk])
+        == 2
+    )
+
+    assert services.push_notification_get_unread_count(user=visitor_user) == 2
+    other_notification.refresh_from_db()
+    assert other_notification.read_at is None
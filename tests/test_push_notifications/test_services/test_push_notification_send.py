@@ -1,7 +1,11 @@
+from datetime import timedelta
+
 import pytest
+from django.utils import timezone
 from pytest_mock import MockerFixture
 
 from app import consts
+from app.ext.push_notifications.backends.expo import ExpoPushNotificationExternalService
 from push_notifications import models, services
 from tests.fakes import FakePushNotificationExternalService
 from users.models import User
@@ -59,3 +63,72 @@ def test_push_notification_send_sends_when_on_expected_status(
     push_notification.refresh_from_db()
     assert push_notification.status == consts.push_notification.Status.SENT
     assert str(push_notification.push_ticket_id) == push_notification_service.result_ticket["id"]
+
+
+@pytest.mark.django_db
+def test_push_notification_send_skips_notifications_scheduled_for_later(
+    push_notification: models.PushNotification,
+    push_notification_service: FakePushNotificationExternalService,
+    mocker: MockerFixture,
+):
+    push_notification.scheduled_for = timezone.now() + timedelta(hours=1)
+    push_notification.save()
+
+    bulk_send_spy = mocker.spy(push_notification_service, "bulk_send")
+    services.push_notification_send(
+        notification_service=push_notification_service, notifications=[push_notification]
+    )
+
+    bulk_send_spy.assert_not_called()
+    push_notification.refresh_from_db()
+    assert push_notification.status == consts.push_notification.Status.CREATED
+
+
+@pytest.mark.django_db
+def test_push_notification_send_schedules_the_unsent_notifications_again(
+    push_notification: models.PushNotification,
+    push_notification_service: FakePushNotificationExternalService,
+    mocker: MockerFixture,
+):
+    """The notifications without tickets weren't taken by the provider (e.g: it timed out),
+    they're scheduled to be sent again with a backoff, until they reach the max attempts"""
+    services.push_notification_set_token(user=push_notification.user, notification_token="foo")
+    mocker.patch.object(push_notification_service, "bulk_send", return_value={})
+
+    services.push_notification_send(
+        notification_service=push_notification_service, notifications=[push_notification]
+    )
+
+    push_notification.refresh_from_db()
+    assert push_notification.status == consts.push_notification.Status.ENQUEUED
+    assert push_notification.scheduled_for > timezone.now()
+    assert push_notification.delivery_attempts == 2
+
+    push_notification.delivery_attempts = push_notification.MAX_DELIVERY_ATTEMPTS + 1
+    push_notification.scheduled_for = None
+    services.push_notification_send(
+        notification_service=push_notification_service, notifications=[push_notification]
+    )
+
+    push_notification.refresh_from_db()
+    assert push_notification.status == consts.push_notification.Status.FAILED
+    assert push_notification.failure_kind == (
+        consts.push_notification.FailureKind.TOO_MANY_DELIVERY_ATTEMPTS
+    )
+
+
+@pytest.mark.django_db
+def test_push_notification_send_schedules_the_rate_limited_notifications_again(
+    push_notification: models.PushNotification, mocker: MockerFixture
+):
+    services.push_notification_set_token(user=push_notification.user, notification_token="foo")
+    expo_service = ExpoPushNotificationExternalService()
+    mocker.patch.object(expo_service.s, "post", return_value=mocker.Mock(status_code=429, text=""))
+
+    services.push_notification_send(
+        notification_service=expo_service, notifications=[push_notification]
+    )
+
+    push_notification.refresh_from_db()
+    assert push_notification.status == consts.push_notification.Status.ENQUEUED
+    assert push_notification.scheduled_for > timezone.now()
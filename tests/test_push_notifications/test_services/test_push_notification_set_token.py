@@ -0,0 +1,48 @@
+import pytest
+
+from push_notifications import models, services
+from users.models import User
+
+
+@pytest.fixture
+def other_user() -> User:
+    return User.objects.create(email="jane@doe.com", full_name="Jane Doe")
+
+
+@pytest.mark.django_db
+def test_push_notification_set_token_registers_each_device_of_the_user(visitor_user: User):
+    services.push_notification_set_token(user=visitor_user, notification_token="phone")
+    services.push_notification_set_token(user=visitor_user, notification_token="tablet")
+    services.push_notification_set_token(user=visitor_user, notification_token="phone")
+
+    assert sorted(visitor_user.get_notification_tokens()) == ["phone", "tablet"]
+    assert models.Device.objects.count() == 2
+    visitor_user.refresh_from_db()
+    assert visitor_user.notification_token == "phone"
+
+
+@pytest.mark.django_db
+def test_push_notification_set_token_moves_the_device_to_the_new_user(
+    visitor_user: User, other_user: User
+):
+    services.push_notification_set_token(user=other_user, notification_token="tablet")
+    services.push_notification_set_token(user=other_user, notification_token="phone")
+
+    services.push_notification_set_token(user=visitor_user, notification_token="phone")
+
+    assert visitor_user.get_notification_tokens() == ["phone"]
+    assert other_user.get_notification_tokens() == ["tablet"]
+    other_user.refresh_from_db()
+    assert other_user.notification_token == "tablet"
+
+
+@pytest.mark.django_db
+def test_push_notification_set_token_without_token_removes_all_devices(visitor_user: User):
+    services.push_notification_set_token(user=visitor_user, notification_token="phone")
+    services.push_notification_set_token(user=visitor_user, notification_token="tablet")
+
+    services.push_notification_set_token(user=visitor_user, notification_token=None)
+
+    assert not models.Device.objects.filter(user=visitor_user).exists()
+    visitor_user.refresh_from_db()
+    assert visitor_user.notification_token is None
@@ -0,0 +1,87 @@
+import json
+import uuid
+
+import pytest
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from app import consts
+from app.ext.push_notifications.abc import PushNotificationExternalService
+from app.ext.push_notifications.backends.expo import ExpoPushNotificationExternalService
+from push_notifications import models, tasks
+from users.models import User
+
+
+@pytest.fixture
+def notification_ids() -> list[int]:
+    now = timezone.now()
+    users = User.objects.bulk_create(
+        [
+            User(
+                email=f"user{i}@example.com",
+                full_name=f"User {i}",
+                notification_token=f"ExponentPushToken[{i}]",
+            )
+            for i in range(10)
+        ]
+    )
+    # Each user has a phone and a tablet
+    models.Device.objects.bulk_create(
+        [
+            models.Device(user=user, token=f"{user.notification_token}:{device}", last_seen_at=now)
+            for user in users
+            for device in ["phone", "tablet"]
+        ]
+    )
+    notifications = models.PushNotification.objects.bulk_create(
+        [
+            models.PushNotification(
+                user=users[i % len(users)],
+                kind=consts.push_notification.Kind.INTERNAL_COMMUNICATION,
+                title="Hey you, yes you!",
+                description="We have a new vaccine available",
+                data={"foo": "bar"},
+                status=consts.push_notification.Status.CREATED,
+            )
+            for i in range(1000)
+        ]
+    )
+    return [notification.id for notification in notifications]
+
+
+@pytest.fixture
+def expo_service(mocker: MockerFixture) -> ExpoPushNotificationExternalService:
+    def post(url, data, headers, timeout):
+        response = mocker.Mock(status_code=200, text="")
+        response.json.return_value = {
+            "data": [{"status": "ok", "id": str(uuid.uuid4())} for _ in json.loads(data)]
+        }
+        return response
+
+    service = ExpoPushNotificationExternalService(max_concurrent_requests=1)
+    mocker.patch.object(service.s, "post", side_effect=post)
+    mocker.patch.object(PushNotificationExternalService, "service_loader", return_value=service)
+    return service
+
+
+@pytest.mark.django_db
+def test_push_notification_send_task_loads_users_with_the_notifications(
+    notification_ids: list[int],
+    expo_service: ExpoPushNotificationExternalService,
+    django_assert_max_num_queries,
+):
+    """Building the payloads must not query the user, nor the devices, of each notification"""
+
+    with django_assert_max_num_queries(10) as ctx:
+        tasks.push_notification_send(notification_ids=notification_ids)
+
+    selects = [query for query in ctx.captured_queries if query["sql"].startswith("SELECT")]
+    # The notifications with their users, then the devices of all of them
+    assert len(selects) == 2
+    # One message per device, 100 on each request
+    assert expo_service.s.post.call_count == 20  # type: ignore
+    sent_payload = json.loads(expo_service.s.post.call_args.kwargs["data"])[0]  # type: ignore
+    assert sent_payload["to"].startswith("ExponentPushToken[")
+    assert not models.PushNotification.objects.exclude(
+        status=consts.push_notification.Status.SENT
+    ).exists()
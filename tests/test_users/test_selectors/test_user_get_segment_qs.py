@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from users import selectors
+from users.models import User
+
+
+@pytest.fixture
+def users() -> list[User]:
+    users = [
+        User(email="pt@doe.com", full_name="Pt", language_code="pt-br", notification_token="foo"),
+        User(email="en@doe.com", full_name="En", language_code="en-us", notification_token="bar"),
+        User(email="none@doe.com", full_name="None", language_code="en-us"),
+        User(
+            email="inactive@doe.com", full_name="Inactive", language_code="en-us", is_active=False
+        ),
+    ]
+    return User.objects.bulk_create(users)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "filters, expected_emails",
+    [
+        ({}, {"pt@doe.com", "en@doe.com", "none@doe.com", "inactive@doe.com"}),
+        ({"language_code": "en-us"}, {"en@doe.com", "none@doe.com", "inactive@doe.com"}),
+        ({"language_code": "en-us", "has_notification_token": True}, {"en@doe.com"}),
+        ({"has_notification_token": False}, {"none@doe.com", "inactive@doe.com"}),
+        ({"is_active": False}, {"inactive@doe.com"}),
+    ],
+)
+def test_user_get_segment_qs_filters_users(users: list[User], filters, expected_emails):
+    qs = selectors.user_get_segment_qs(filters=filters)
+
+    assert set(qs.values_list("email", flat=True)) == expected_emails
+
+
+@pytest.mark.django_db
+def test_user_get_segment_qs_filters_by_date_joined(users: list[User]):
+    User.objects.filter(email="pt@doe.com").update(date_joined=timezone.now() - timedelta(days=10))
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+
+    joined_after = selectors.user_get_segment_qs(filters={"date_joined_after": since})
+    joined_before = selectors.user_get_segment_qs(filters={"date_joined_before": since})
+
+    assert "pt@doe.com" not in joined_after.values_list("email", flat=True)
+    assert list(joined_before.values_list("email", flat=True)) == ["pt@doe.com"]
+
+
+@pytest.mark.django_db
+def test_user_get_segment_qs_rejects_invalid_filters():
+    with pytest.raises(ValidationError):
+        selectors.user_get_segment_qs(filters={"language_code": "klingon"})
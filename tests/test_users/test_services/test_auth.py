@@ -1,8 +1,13 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 import pytest
+from django.db import connection
 from django.utils import timezone
+from rest_framework.authtoken.models import Token
 
+from app.security import password_hashing
 from users.models import User
 from users.services import auth
 
@@ -68,6 +73,10 @@ def test_user_updated_last_login_on_succesfull_api_authentication(visitor_user:
     auth.user_update_last_login_on_succesfull_api_authentication(user=visitor_user)
     visitor_user = get_user(visitor_user)
     assert visitor_user.last_login is not None
+    # It's written later
+    assert User.objects.get(pk=visitor_user.pk).last_login is None
+    assert auth.user_flush_buffered_last_logins() == 1
+    assert User.objects.get(pk=visitor_user.pk).last_login == visitor_user.last_login
 
     # User logged-in yesterday, update last login
     yesterday_user = User.objects.get(pk=visitor_user.pk)
@@ -81,3 +90,102 @@ def test_user_updated_last_login_on_succesfull_api_authentication(visitor_user:
     visitor_user.last_login = last_login
     auth.user_update_last_login_on_succesfull_api_authentication(user=visitor_user)
     assert visitor_user.last_login == last_login
+
+
+@pytest.mark.django_db
+def test_user_flush_buffered_last_logins(visitor_user: User, django_assert_num_queries):
+    users = [visitor_user] + [
+        User.objects.create(email=f"user{i}@example.com", full_name="User") for i in range(4)
+    ]
+    for user in users:
+        auth.user_update_last_login_on_succesfull_api_authentication(user=user)
+    first_last_login = users[0].last_login
+    # Only the first authentication of the day is kept
+    users[0].last_login = None
+    auth.user_update_last_login_on_succesfull_api_authentication(user=users[0])
+    # Logged in with the password after the buffered authentication
+    logged_in_later = timezone.now() + timedelta(minutes=1)
+    User.objects.filter(pk=users[1].pk).update(last_login=logged_in_later)
+
+    with django_assert_num_queries(3):
+        assert auth.user_flush_buffered_last_logins(batch_size=2) == 5
+
+    last_logins = dict(User.objects.values_list("pk", "last_login"))
+    assert last_logins[users[0].pk] == first_last_login
+    assert last_logins[users[1].pk] == logged_in_later
+    for user in users[2:]:
+        assert last_logins[user.pk] == user.last_login
+    assert auth.user_flush_buffered_last_logins() == 0
+
+
+@pytest.mark.django_db
+def test_authenticate_rehashes_the_password_with_the_preferred_hasher(visitor_user: User, settings):
+    assert visitor_user.password.startswith("pbkdf2_sha256$")
+    settings.PASSWORD_HASHERS = [
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    ]
+
+    auth.authenticate(username=visitor_user.get_username(), password="password")
+
+    visitor_user.refresh_from_db()
+    assert visitor_user.password.startswith("md5$")
+    assert visitor_user.check_password("password")
+
+
+@pytest.mark.django_db
+def test_authenticate_fails_when_too_many_logins_are_hashing(visitor_user: User, settings):
+    settings.PASSWORD_HASHING_MAX_CONCURRENCY = 1
+    settings.PASSWORD_HASHING_TIMEOUT_SECONDS = 0.01
+    password_hashing.shutdown()
+    slots = password_hashing._get_slots()
+    slots.acquire()
+    try:
+        with pytest.raises(password_hashing.PasswordHashingUnavailable):
+            auth.authenticate(username=visitor_user.get_username(), password="password")
+    finally:
+        slots.release()
+        password_hashing.shutdown()
+
+    assert auth.authenticate(username=visitor_user.get_username(), password="password")
+
+
+@pytest.mark.django_db
+def test_token_authenticate_returns_the_existing_token(
+    visitor_user: User, django_assert_num_queries
+):
+    # The user, its last login and the token upsert, the last two are a single query on Postgres
+    with django_assert_num_queries(3):
+        _user, token = auth.token_authenticate(
+            username=visitor_user.get_username(), password="password"
+        )
+    user, existing_token = auth.token_authenticate(
+        username=visitor_user.get_username(), password="password"
+    )
+
+    assert existing_token.key == token.key
+    assert existing_token.created == Token.objects.get(user=visitor_user).created
+    assert User.objects.get(pk=visitor_user.pk).last_login == user.last_login
+
+
+@pytest.mark.django_db(transaction=True)
+def test_token_authenticate_concurrent_logins_get_the_same_token(visitor_user: User, settings):
+    logins = 8
+    # Only a few of them hash the password at once, the others wait their turn
+    settings.PASSWORD_HASHING_TIMEOUT_SECONDS = 60
+    barrier = threading.Barrier(logins)
+
+    def login() -> str:
+        barrier.wait()
+        try:
+            _user, token = auth.token_authenticate(
+                username=visitor_user.get_username(), password="password"
+            )
+            return token.key
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=logins) as executor:
+        keys = list(executor.map(lambda _i: login(), range(logins)))
+
+    assert set(keys) == {Token.objects.get(user=visitor_user).key}